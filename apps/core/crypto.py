@@ -0,0 +1,29 @@
+"""
+Criptografia simétrica de segredos guardados temporariamente no banco (ex.:
+a senha do super usuário enquanto o provisionamento do tenant está na fila).
+
+A chave Fernet é derivada do SECRET_KEY: trocar o SECRET_KEY torna ilegíveis
+os segredos gravados antes da troca.
+"""
+import base64
+import hashlib
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
+
+
+def _fernet() -> Fernet:
+    digest = hashlib.sha256(f"apps.core.crypto:{settings.SECRET_KEY}".encode("utf-8")).digest()
+    return Fernet(base64.urlsafe_b64encode(digest))
+
+
+def encrypt_secret(value: str) -> str:
+    return _fernet().encrypt(value.encode("utf-8")).decode("ascii")
+
+
+def decrypt_secret(token: str) -> str:
+    """Valor original de ``token``; levanta ValueError se não puder ser lido."""
+    try:
+        return _fernet().decrypt(token.encode("ascii")).decode("utf-8")
+    except InvalidToken as exc:
+        raise ValueError("Segredo ilegível: o SECRET_KEY mudou ou o valor foi alterado.") from exc
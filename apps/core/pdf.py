@@ -0,0 +1,63 @@
+"""
+Elementos comuns dos PDFs gerados com o ReportLab (relatórios, recibos).
+"""
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+
+def add_header_and_footer(canvas, doc, configuracao=None):
+    """Adiciona cabeçalho e rodapé em todas as páginas"""
+    page_num = canvas.getPageNumber()
+
+    # CABEÇALHO - sempre no topo de cada página
+    canvas.setFont("Helvetica-Bold", 10)
+    canvas.setFillColor(colors.darkblue)
+
+    # Logo no cabeçalho (esquerda)
+    if configuracao and configuracao.logo_principal:
+        try:
+            logo_path = configuracao.logo_principal.path
+            canvas.drawImage(logo_path, 0.5*inch, 10.5*inch, width=1*inch, height=0.5*inch, mask='auto')
+        except:
+            pass
+
+    # Nome da prefeitura no cabeçalho (centro)
+    nome_prefeitura = configuracao.nome_prefeitura if configuracao and configuracao.nome_prefeitura else "PREFEITURA MUNICIPAL"
+    canvas.drawCentredString(4.25*inch, 10.7*inch, nome_prefeitura)
+
+    # Sistema no cabeçalho (direita)
+    canvas.setFont("Helvetica", 8)
+    canvas.setFillColor(colors.gray)
+    canvas.drawRightString(7.5*inch, 10.7*inch, "Sistema de Gestão de Assinaturas")
+
+    # Linha separadora do cabeçalho
+    canvas.setStrokeColor(colors.lightgrey)
+    canvas.setLineWidth(0.5)
+    canvas.line(0.5*inch, 10.3*inch, 7.5*inch, 10.3*inch)
+
+    # RODAPÉ
+    canvas.setFont("Helvetica", 8)
+    canvas.setFillColor(colors.gray)
+
+    # Informações da prefeitura no rodapé esquerdo
+    footer_left = ""
+    if configuracao:
+        if configuracao.footer_text1:
+            footer_left += configuracao.footer_text1
+        if configuracao.footer_text2:
+            if footer_left:
+                footer_left += " | "
+            footer_left += configuracao.footer_text2
+
+    # Desenhar informações da prefeitura à esquerda
+    if footer_left:
+        canvas.drawString(0.5*inch, 0.5*inch, footer_left)
+
+    # Numeração de página à direita
+    page_text = f"Página {page_num}"
+    canvas.drawRightString(7.5*inch, 0.5*inch, page_text)
+
+    # Linha separadora do rodapé
+    canvas.setStrokeColor(colors.lightgrey)
+    canvas.setLineWidth(0.5)
+    canvas.line(0.5*inch, 0.8*inch, 7.5*inch, 0.8*inch)
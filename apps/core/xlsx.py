@@ -0,0 +1,68 @@
+"""
+Planilhas XLSX com memória constante (exportação de pagamentos e relatórios).
+
+As linhas são gravadas uma a uma em um workbook write-only do openpyxl, em
+arquivo temporário que é então enviado em blocos (FileResponse) e removido
+quando a resposta termina de ser enviada.
+"""
+import datetime
+import re
+import tempfile
+
+from django.http import FileResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# O Excel não aceita / \ * ? : [ ] em nomes de planilha, limitados a 31 caracteres.
+SHEET_NAME_INVALID_RE = re.compile(r"[\\/*?:\[\]]")
+SHEET_NAME_MAX_LENGTH = 31
+
+# Texto que começa com um destes caracteres é interpretado como fórmula pelas
+# planilhas (injeção de fórmulas).
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def safe_title(title: str) -> str:
+    return SHEET_NAME_INVALID_RE.sub("-", title)
+
+
+def xlsx_cell(sheet, value):
+    # Planilhas não aceitam datas com fuso: usa o horário local, sem tzinfo.
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Célula de texto explícita: o openpyxl gravaria "=..." como fórmula.
+        cell = WriteOnlyCell(sheet, value)
+        cell.data_type = "s"
+        return cell
+    # Células vazias não são escritas: menos XML para campos opcionais.
+    return None if value == "" else value
+
+
+def write_xlsx(file, title: str, headers, rows) -> None:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(safe_title(title)[:SHEET_NAME_MAX_LENGTH])
+    sheet.append(headers)
+    for row in rows:
+        sheet.append([xlsx_cell(sheet, value) for value in row])
+    workbook.save(file)
+
+
+def temp_file_response(write, filename: str, content_type=None) -> FileResponse:
+    """Resposta com o conteúdo gravado por ``write(file)`` em um arquivo temporário."""
+    file = tempfile.TemporaryFile()
+    write(file)
+    file.seek(0)
+    return FileResponse(file, as_attachment=True, filename=filename, content_type=content_type)
+
+
+def xlsx_response(filename: str, title: str, headers, rows) -> FileResponse:
+    return temp_file_response(
+        lambda file: write_xlsx(file, title, headers, rows),
+        filename,
+        XLSX_CONTENT_TYPE,
+    )
@@ -0,0 +1,13 @@
+"""
+Exportação de relatórios em XLSX com memória constante: as linhas vêm de
+``iter_report`` e são gravadas com apps.core.xlsx.
+"""
+from apps.core.xlsx import safe_title, xlsx_response as build_xlsx_response
+
+from .registry import iter_report
+
+
+def xlsx_response(report, **filtros):
+    keys = [column.key for column in report.columns]
+    rows = ([item.get(key) for key in keys] for item in iter_report(report, **filtros))
+    return build_xlsx_response(f"{safe_title(report.title)}.xlsx", report.title, report.headers, rows)
@@ -0,0 +1,296 @@
+"""
+Registro dos relatórios disponíveis.
+
+Cada relatório é declarado uma única vez (consulta, colunas, formatos e
+cache) com ``register``; a tela de seleção, a pré-visualização do Centro de
+Relatórios e a exportação em PDF usam ``run_report``, e a exportação em
+Excel percorre as linhas com ``iter_report`` (apps.relatorios.exports).
+Para adicionar um relatório basta registrá-lo neste módulo.
+"""
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'relatorios:{code}:{filtros}'
+
+FORMATOS = ('visualizacao', 'excel', 'pdf')
+
+TIPO_COMBUSTIVEL_MAP = {
+    1: 'Gasolina',
+    2: 'Diesel',
+    3: 'Etanol',
+    4: 'Gás Natural (GNV)',
+    5: 'Flex (Gasolina/Etanol)',
+    6: 'Elétrico',
+    'gasolina': 'Gasolina',
+    'diesel': 'Diesel',
+    'etanol': 'Etanol',
+    'gas_natural': 'Gás Natural',
+}
+
+
+def get_tipo_combustivel_display(tipo_combustivel):
+    """Converte código ou string de combustível para nome legível"""
+    if tipo_combustivel is None:
+        return 'N/A'
+    return TIPO_COMBUSTIVEL_MAP.get(tipo_combustivel, str(tipo_combustivel))
+
+
+def formatar_moeda_br(valor):
+    """Formata valor monetário no padrão brasileiro (R$ 1.234,56)"""
+    if valor is None or valor == 0:
+        return 'R$ 0,00'
+    try:
+        valor_formatado = f"{float(valor):,.2f}"
+    except (ValueError, TypeError):
+        return f"R$ {valor}"
+    return 'R$ ' + valor_formatado.replace('.', ' ').replace(',', '.').replace(' ', ',')
+
+
+@dataclass(frozen=True)
+class Column:
+    """Coluna de um relatório: ``key`` é a chave em cada linha retornada pela consulta."""
+
+    key: str
+    label: str
+    # 'texto', 'numero' (2 casas), 'inteiro', 'moeda' ou 'data'
+    tipo: str = 'texto'
+
+    def format(self, value):
+        """Valor exibido na pré-visualização e no PDF."""
+        if value is None or value == '':
+            return 'N/A'
+        if self.tipo == 'moeda':
+            return formatar_moeda_br(value)
+        if self.tipo == 'numero':
+            return f"{float(value):.2f}"
+        if self.tipo == 'inteiro':
+            return f"{float(value):.0f}"
+        if self.tipo == 'data' and hasattr(value, 'strftime'):
+            return value.strftime('%d/%m/%Y')
+        return str(value)
+
+
+@dataclass(frozen=True)
+class Report:
+    code: str
+    title: str
+    # Recebe os filtros (data_inicial, data_final, veiculo, condutor,
+    # secretaria) como argumentos nomeados e retorna dicts: uma lista ou um
+    # queryset ``.values()``, que as exportações percorrem com ``iterator()``.
+    query: Callable
+    columns: tuple
+    template: str = ''
+    formats: tuple = FORMATOS
+    # Segundos em cache do resultado para os mesmos filtros; 0 desativa.
+    cache_timeout: int = 0
+    # Colunas somadas no resumo do PDF.
+    totals: tuple = ()
+
+    def __post_init__(self):
+        if not self.template:
+            object.__setattr__(self, 'template', f"relatorios/partials/{self.code}_table.html")
+
+    @property
+    def headers(self):
+        return [column.label for column in self.columns]
+
+    def format_rows(self, data):
+        return [[column.format(item.get(column.key)) for column in self.columns] for item in data]
+
+
+@dataclass
+class ReportResult:
+    report: Report
+    data: list = field(default_factory=list)
+    duration: float = 0.0
+    cached: bool = False
+
+    def context(self):
+        """Chaves usadas pelos templates de relatórios."""
+        return {
+            'report_title': self.report.title,
+            'report_data': self.data,
+            'report_template': self.report.template,
+        }
+
+
+REPORTS = {}
+
+
+def register(report):
+    REPORTS[report.code] = report
+    return report
+
+
+def get_report(code):
+    return REPORTS.get(code)
+
+
+def report_choices():
+    return [(report.code, report.title) for report in REPORTS.values()]
+
+
+def _cache_key(code, filtros):
+    payload = json.dumps(filtros, sort_keys=True, default=str)
+    return CACHE_KEY.format(code=code, filtros=hashlib.sha1(payload.encode('utf-8')).hexdigest())
+
+
+def run_report(report, **filtros):
+    """
+    Executa a consulta do relatório com os filtros informados, usando o cache
+    quando ``report.cache_timeout`` estiver definido, e registra o tempo gasto.
+    """
+    key = _cache_key(report.code, filtros) if report.cache_timeout else None
+    if key:
+        data = cache.get(key)
+        if data is not None:
+            return ReportResult(report, data, cached=True)
+
+    started = time.perf_counter()
+    data = list(report.query(**filtros))
+    duration = time.perf_counter() - started
+    logger.info('Relatório %s: %d registro(s) em %.3fs', report.code, len(data), duration)
+    if key:
+        cache.set(key, data, report.cache_timeout)
+    return ReportResult(report, data, duration)
+
+
+def iter_report(report, chunk_size=2000, **filtros):
+    """
+    Linhas do relatório uma a uma, para exportações: o resultado não é
+    carregado inteiro na memória nem gravado no cache (mas é lido do cache
+    se uma pré-visualização com os mesmos filtros já o colocou lá).
+    """
+    if report.cache_timeout:
+        data = cache.get(_cache_key(report.code, filtros))
+        if data is not None:
+            yield from data
+            return
+    rows = report.query(**filtros)
+    if hasattr(rows, 'iterator'):
+        rows = rows.iterator(chunk_size=chunk_size)
+    yield from rows
+
+
+def _sem_dados(**filtros):
+    # Os modelos de frota (Veiculo, Condutor, Abastecimento...) foram removidos
+    # deste sistema: os relatórios seguem registrados, sem dados.
+    return []
+
+
+register(Report(
+    code='abastecimento_por_secretaria',
+    title='Abastecimento por Secretaria',
+    query=_sem_dados,
+    columns=(
+        Column('secretaria_nome', 'Secretaria'),
+        Column('tipo_combustivel', 'Tipo de Combustível'),
+        Column('total_litros', 'Total Litros', 'numero'),
+        Column('total_valor', 'Total Valor (R$)', 'moeda'),
+    ),
+    cache_timeout=300,
+    totals=('total_litros', 'total_valor'),
+))
+
+register(Report(
+    code='gastos_por_tipo_combustivel',
+    title='Gastos por Tipo de Combustível',
+    query=_sem_dados,
+    columns=(
+        Column('tipo_combustivel', 'Tipo de Combustível'),
+        Column('total_litros', 'Total Litros', 'numero'),
+        Column('total_valor', 'Total Valor (R$)', 'moeda'),
+    ),
+    cache_timeout=300,
+    totals=('total_litros', 'total_valor'),
+))
+
+register(Report(
+    code='consumo_medio_por_veiculo',
+    title='Consumo Médio por Veículo',
+    query=_sem_dados,
+    columns=(
+        Column('veiculo__placa', 'Placa do Veículo'),
+        Column('veiculo__modelo', 'Modelo do Veículo'),
+        Column('total_litros', 'Total Litros', 'numero'),
+        Column('distancia_total', 'Distância Total (KM)', 'numero'),
+        Column('media_consumo', 'Média de Consumo (KM/L)', 'numero'),
+    ),
+    cache_timeout=300,
+))
+
+register(Report(
+    code='historico_abastecimento_por_condutor',
+    title='Histórico de Abastecimento por Condutor',
+    query=_sem_dados,
+    columns=(
+        Column('condutor_nome', 'Condutor'),
+        Column('data_abastecimento', 'Data', 'data'),
+        Column('quilometragem_atual', 'KM Atual', 'inteiro'),
+        Column('tipo_combustivel', 'Tipo Combustível'),
+        Column('litros', 'Litros', 'numero'),
+        Column('valor_litro', 'Valor Litro', 'moeda'),
+        Column('valor_total', 'Valor Total', 'moeda'),
+    ),
+))
+
+register(Report(
+    code='veiculos_por_status_e_secretaria',
+    title='Veículos por Status e Secretaria',
+    query=_sem_dados,
+    columns=(
+        Column('secretaria__nome', 'Secretaria'),
+        Column('situacao', 'Status do Veículo'),
+        Column('count', 'Quantidade', 'inteiro'),
+    ),
+))
+
+register(Report(
+    code='abastecimento_mes_veiculos_km',
+    title='Abastecimento/Mês - Veículos, KM Inicial/Final',
+    query=_sem_dados,
+    columns=(
+        Column('veiculo_placa', 'Veículo (Placa)'),
+        Column('quilometragem_anterior', 'KM Inicial', 'inteiro'),
+        Column('quilometragem_atual', 'KM Final', 'inteiro'),
+        Column('litros', 'Litros Abastecidos', 'numero'),
+        Column('valor_litro', 'Valor Unitário (R$/L)', 'moeda'),
+        Column('valor_abastecido', 'Valor Total (R$)', 'moeda'),
+        Column('data_abastecimento', 'Data Abastecimento', 'data'),
+        Column('posto_nome', 'Posto'),
+    ),
+    cache_timeout=300,
+))
+
+register(Report(
+    code='veiculos_manutencao',
+    title='Veículos em Manutenção',
+    query=_sem_dados,
+    columns=(Column('mensagem', 'Mensagem'),),
+    formats=('visualizacao',),
+))
+
+register(Report(
+    code='veiculos_documentacao_vencida',
+    title='Veículos com Documentação Vencida',
+    query=_sem_dados,
+    columns=(Column('mensagem', 'Mensagem'),),
+    formats=('visualizacao',),
+))
+
+register(Report(
+    code='condutores_documentacao_vencida',
+    title='Condutores com Documentação Vencida',
+    query=_sem_dados,
+    columns=(Column('mensagem', 'Mensagem'),),
+    formats=('visualizacao',),
+))
@@ -0,0 +1,83 @@
+import io
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, modify_settings, override_settings
+from openpyxl import load_workbook
+
+from apps.core.xlsx import XLSX_CONTENT_TYPE
+
+from .registry import REPORTS, Column, Report, get_report, run_report
+
+
+def _abastecimentos(**filtros):
+    return [
+        {'secretaria_nome': 'Saúde', 'total_litros': 120.5, 'total_valor': 700, 'data': date(2026, 1, 10)},
+        {'secretaria_nome': 'Educação', 'total_litros': 80, 'total_valor': 450.25, 'data': date(2026, 1, 12)},
+    ]
+
+
+TESTE = Report(
+    code='teste_abastecimento',
+    title='Abastecimento: Teste',
+    query=_abastecimentos,
+    columns=(
+        Column('secretaria_nome', 'Secretaria'),
+        Column('total_litros', 'Total Litros', 'numero'),
+        Column('total_valor', 'Total Valor (R$)', 'moeda'),
+        Column('data', 'Data', 'data'),
+    ),
+    totals=('total_litros', 'total_valor'),
+)
+
+
+# apps.relatorios não está em INSTALLED_APPS: os testes o ativam e usam as URLs do app.
+@modify_settings(INSTALLED_APPS={'append': 'apps.relatorios'})
+@override_settings(ROOT_URLCONF='apps.relatorios.urls')
+class ReportRegistryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch.dict(REPORTS, {TESTE.code: TESTE}))
+
+    def test_unknown_report_returns_404(self):
+        self.assertIsNone(get_report('nao_existe'))
+        for url in ('/export/excel/', '/export/pdf/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, {'report_type': 'nao_existe'}).status_code, 404)
+
+    def test_format_not_allowed_returns_400(self):
+        response = self.client.get('/export/pdf/', {'report_type': 'veiculos_manutencao'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_run_report_caches_result(self):
+        query = mock.Mock(side_effect=_abastecimentos)
+        report = Report(code='teste_cache', title='Cache', query=query, columns=TESTE.columns, cache_timeout=60)
+        first = run_report(report, secretaria='1')
+        second = run_report(report, secretaria='1')
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.data, first.data)
+        run_report(report, secretaria='2')
+        self.assertEqual(query.call_count, 2)
+
+    def test_pdf_export(self):
+        response = self.client.get('/export/pdf/', {'report_type': TESTE.code, 'data_inicial': '2026-01-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('Abastecimento: Teste', response['Content-Disposition'])
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertEqual(
+            TESTE.format_rows(_abastecimentos()[:1]),
+            [['Saúde', '120.50', 'R$ 700,00', '10/01/2026']],
+        )
+
+    def test_excel_export(self):
+        response = self.client.get('/export/excel/', {'report_type': TESTE.code})
+        self.assertEqual(response['Content-Type'], XLSX_CONTENT_TYPE)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Abastecimento- Teste.xlsx"')
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = list(workbook['Abastecimento- Teste'].iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('Secretaria', 'Total Litros', 'Total Valor (R$)', 'Data'))
+        self.assertEqual(rows[1][:3], ('Saúde', 120.5, 700))
+        self.assertEqual(len(rows), 3)
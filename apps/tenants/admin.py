@@ -0,0 +1,66 @@
+from urllib.parse import urlencode
+
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.urls import reverse
+
+from .jobs import resume_bulk_update
+from .models import Tenant, TenantBulkUpdate, TenantProvisioningJob, TenantStatementImport
+
+
+@admin.register(Tenant)
+class TenantAdmin(admin.ModelAdmin):
+    list_display = ('schema_name', 'client_name', 'on_trial', 'paid_until', 'monthly_price', 'synced_at')
+    list_filter = ('on_trial', 'paid_until')
+    search_fields = ('schema_name', 'client_name', 'primary_domain')
+    actions = ['bulk_update']
+
+    # A tabela é uma cópia da API do SaaS: alterações são feitas pela API.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description='Atualizar em lote na API')
+    def bulk_update(self, request, queryset):
+        query = urlencode([('schema_name', name) for name in queryset.values_list('schema_name', flat=True)])
+        return redirect(f"{reverse('tenants:bulk-update')}?{query}")
+
+
+@admin.register(TenantBulkUpdate)
+class TenantBulkUpdateAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'status', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    readonly_fields = ('schema_names', 'patch', 'status', 'results', 'created_by', 'created_at', 'started_at', 'finished_at')
+    actions = ['resume']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Reenviar tenants com falha')
+    def resume(self, request, queryset):
+        resumed = sum(1 for bulk in queryset if resume_bulk_update(bulk))
+        self.message_user(request, f'{resumed} atualização(ões) recolocada(s) na fila.', messages.SUCCESS)
+
+
+@admin.register(TenantProvisioningJob)
+class TenantProvisioningJobAdmin(admin.ModelAdmin):
+    list_display = ('schema_name', 'client_name', 'status', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('schema_name', 'client_name')
+    readonly_fields = ('schema_name', 'client_name', 'payload', 'status', 'error', 'result', 'created_by', 'created_at', 'started_at', 'finished_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(TenantStatementImport)
+class TenantStatementImportAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'file_format', 'dry_run', 'created_by', 'created_at', 'duration')
+    list_filter = ('file_format', 'dry_run', 'created_at')
+    search_fields = ('file_name',)
+    readonly_fields = ('file_name', 'file_format', 'dry_run', 'lines', 'error', 'created_by', 'created_at', 'duration')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,194 @@
+"""
+Indicadores de receita calculados a partir de TenantPayment: receita mensal,
+MRR, tenants pagantes, churn e tenants em atraso.
+
+Os totais por mês e tenant vêm do consolidado TenantPaymentMonthly
+(rollup.py), sem varrer TenantPayment, e o pandas calcula os indicadores
+sobre essa matriz mês x tenant. Os totais de cada mês também ficam no cache
+e são descartados quando um pagamento do mês é gravado ou excluído
+(signals.py, rollup.py); meses fechados praticamente não mudam e expiram só
+após TENANT_ANALYTICS_CLOSED_MONTH_TTL, o que limita o efeito de uma
+invalidação perdida.
+
+Somente pagamentos com status "Pago" na moeda TENANT_ANALYTICS_CURRENCY
+entram nos cálculos.
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DateField, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Tenant, TenantPayment, TenantPaymentMonthly
+
+
+MONTH_CACHE_KEY = "tenants:analytics:{currency}:{month}"
+
+
+def _currency() -> str:
+    return getattr(settings, "TENANT_ANALYTICS_CURRENCY", "BRL")
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_cache_key(month: date) -> str:
+    return MONTH_CACHE_KEY.format(currency=_currency(), month=month.strftime("%Y-%m"))
+
+
+def invalidate_month(payment_date: date) -> None:
+    """
+    Descarta a agregação em cache do mês do pagamento quando a transação atual
+    for confirmada: antes disso, uma leitura concorrente ainda veria os totais
+    antigos e os gravaria de volta no cache.
+    """
+    # Antes de recarregado do banco, o valor pode ainda ser uma string ISO.
+    payment_date = TenantPayment._meta.get_field("payment_date").to_python(payment_date)
+    key = month_cache_key(month_start(payment_date))
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _aggregate(first: date, last: date) -> dict:
+    """
+    Receita por tenant de cada mês entre ``first`` e ``last`` (inclusive),
+    em uma única consulta: ``{mês: {schema_name: total}}``.
+    """
+    rows = TenantPaymentMonthly.objects.filter(
+        status=TenantPayment.STATUS_PAID,
+        currency=_currency(),
+        month__gte=first,
+        month__lte=last,
+    ).values_list("month", "schema_name", "total")
+    months = {}
+    for month, schema_name, total in rows:
+        months.setdefault(month, {})[schema_name] = float(total)
+    return months
+
+
+def monthly_revenue_by_tenant(first: date, last: date) -> dict:
+    """
+    Mesma saída de ``_aggregate``, reaproveitando os meses em cache. Os meses
+    ausentes são consultados de uma vez; o mês corrente expira em
+    TENANT_ANALYTICS_CURRENT_MONTH_TTL segundos e os fechados em
+    TENANT_ANALYTICS_CLOSED_MONTH_TTL.
+    """
+    months = []
+    month = first
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+
+    keys = {month_cache_key(month): month for month in months}
+    cached = cache.get_many(keys)
+    result = {keys[key]: value for key, value in cached.items()}
+    missing = [month for month in months if month not in result]
+    if missing:
+        fetched = _aggregate(missing[0], missing[-1])
+        current = month_start(timezone.localdate())
+        current_ttl = getattr(settings, "TENANT_ANALYTICS_CURRENT_MONTH_TTL", 300)
+        closed_ttl = getattr(settings, "TENANT_ANALYTICS_CLOSED_MONTH_TTL", 86400)
+        for month in missing:
+            result[month] = fetched.get(month, {})
+            timeout = current_ttl if month >= current else closed_ttl
+            cache.set(month_cache_key(month), result[month], timeout=timeout)
+    return {month: result[month] for month in months}
+
+
+def revenue_frame(first: date, last: date) -> pd.DataFrame:
+    """
+    Indicadores por mês, de ``first`` a ``last``:
+
+    - revenue: soma dos pagamentos do mês;
+    - paying_tenants: tenants com pagamento no mês;
+    - mrr: receita recorrente, somando para cada tenant ativo o último valor
+      mensal pago. Um tenant continua ativo por TENANT_ANALYTICS_GRACE_MONTHS
+      meses após o último pagamento;
+    - active_tenants, new_tenants, churned_tenants e churn_rate (fração dos
+      ativos do mês anterior que deixaram de estar ativos);
+    - arpa: MRR médio por tenant ativo.
+    """
+    grace = getattr(settings, "TENANT_ANALYTICS_GRACE_MONTHS", 1)
+    # Meses anteriores ao período entram no cálculo de ativos/churn do início.
+    data = monthly_revenue_by_tenant(add_months(first, -(grace + 1)), last)
+    index = pd.DatetimeIndex(pd.to_datetime(list(data)), name="month")
+    matrix = pd.DataFrame.from_records(list(data.values()), index=index).astype("float64")
+
+    if matrix.shape[1]:
+        paid = matrix.notna()
+        recurring = matrix.ffill(limit=grace) if grace else matrix
+        active = recurring.notna()
+        was_active = active.shift(1, fill_value=False)
+        frame = pd.DataFrame(
+            {
+                "revenue": matrix.sum(axis=1),
+                "paying_tenants": paid.sum(axis=1),
+                "mrr": recurring.sum(axis=1),
+                "active_tenants": active.sum(axis=1),
+                "new_tenants": (active & ~was_active).sum(axis=1),
+                "churned_tenants": (was_active & ~active).sum(axis=1),
+            }
+        )
+    else:
+        frame = pd.DataFrame(
+            0,
+            index=index,
+            columns=["revenue", "paying_tenants", "mrr", "active_tenants", "new_tenants", "churned_tenants"],
+        )
+
+    previous_active = frame["active_tenants"].shift(1)
+    frame["churn_rate"] = (frame["churned_tenants"] / previous_active.where(previous_active > 0)).fillna(0)
+    frame["arpa"] = (frame["mrr"] / frame["active_tenants"].where(frame["active_tenants"] > 0)).fillna(0)
+    return frame.loc[pd.Timestamp(first):]
+
+
+def revenue_summary(months: int = 12, last: date = None) -> list:
+    """Indicadores dos últimos ``months`` meses (até ``last``), prontos para JSON/templates."""
+    last = month_start(last or timezone.localdate())
+    frame = revenue_frame(add_months(last, -(months - 1)), last).round(
+        {"revenue": 2, "mrr": 2, "arpa": 2, "churn_rate": 4}
+    )
+    return [
+        {
+            "month": month.strftime("%Y-%m"),
+            "revenue": row.revenue,
+            "paying_tenants": int(row.paying_tenants),
+            "mrr": row.mrr,
+            "active_tenants": int(row.active_tenants),
+            "new_tenants": int(row.new_tenants),
+            "churned_tenants": int(row.churned_tenants),
+            "churn_rate": row.churn_rate,
+            "arpa": row.arpa,
+        }
+        for month, row in frame.iterrows()
+    ]
+
+
+def overdue_tenants(today: date = None):
+    """
+    Tenants fora do período de teste com ``paid_until`` vencido e sem pagamento
+    nos últimos TENANT_OVERDUE_RECENT_DAYS dias, anotados com ``last_payment``.
+    """
+    today = today or timezone.localdate()
+    recent = today - timedelta(days=getattr(settings, "TENANT_OVERDUE_RECENT_DAYS", 30))
+    last_payment = (
+        TenantPayment.objects.filter(schema_name=OuterRef("schema_name"), status=TenantPayment.STATUS_PAID)
+        .order_by("-payment_date")
+        .values("payment_date")[:1]
+    )
+    return (
+        Tenant.objects.filter(on_trial=False, paid_until__lt=today)
+        .annotate(last_payment=Subquery(last_payment, output_field=DateField()))
+        # Sem pagamento algum, last_payment é NULL: exclude(last_payment__gte=...)
+        # descartaria esses tenants.
+        .filter(Q(last_payment__isnull=True) | Q(last_payment__lt=recent))
+        .order_by("paid_until", "client_name")
+    )
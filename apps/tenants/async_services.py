@@ -0,0 +1,361 @@
+"""
+Versão assíncrona do SaasApiClient, usada pelas views async (async_views.py)
+quando a aplicação roda sob ASGI (uvicorn).
+
+Compartilha com o cliente síncrono as chaves de cache, o circuit breaker, as
+métricas e a política de repetições; muda apenas o transporte, que passa a ser
+um httpx.AsyncClient com pool de conexões por event loop. Enquanto espera a API
+o worker continua atendendo outras requisições.
+"""
+import asyncio
+import logging
+import time
+import uuid
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import httpx
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .models import Tenant
+from .services import (
+    IDEMPOTENT_METHODS,
+    RETRY_STATUSES,
+    TENANT_LIST_CACHE_KEY,
+    SaasApiClient,
+    SaasApiError,
+    SaasApiUnavailable,
+    TenantResult,
+    _count_transfer,
+    tenant_cache_key,
+)
+
+
+logger = logging.getLogger("apps.tenants.services")
+
+# Um httpx.AsyncClient por event loop: conexões não podem ser compartilhadas
+# entre loops. Sob uvicorn há um único loop por worker.
+_clients = weakref.WeakKeyDictionary()
+
+# Revalidações em segundo plano em andamento (referência evita o GC das tasks).
+_background_tasks = set()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        max_connections = getattr(settings, "SAAS_API_ASYNC_MAX_CONNECTIONS", 100)
+        # Assim como na sessão síncrona, a API é autenticada por header e os
+        # cookies são descartados.
+        jar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        client = httpx.AsyncClient(
+            cookies=httpx.Cookies(jar),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+class AsyncSaasApiClient(SaasApiClient):
+    """
+    Mesma interface de leitura/escrita do SaasApiClient, com métodos async:
+
+        client = AsyncSaasApiClient.for_request(request)
+        tenant = await client.retrieve_tenant(schema_name)
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.http = get_async_client()
+
+    @classmethod
+    def for_request(cls, request) -> "AsyncSaasApiClient":
+        client = getattr(request, "_async_saas_api_client", None)
+        if client is None:
+            client = cls()
+            request._async_saas_api_client = client
+        return client
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        action: str,
+        timeout=None,
+        headers=None,
+        idempotency_key=None,
+        template: str = None,
+        **kwargs,
+    ):
+        url = self._get_url(path)
+        headers = {**self._get_headers(), **(headers or {})}
+        if idempotency_key:
+            headers["Idempotency-Key"] = str(idempotency_key)
+        retries = 0
+        if method in IDEMPOTENT_METHODS or idempotency_key:
+            retries = getattr(settings, "SAAS_API_RETRIES", 2)
+        # Mesma política de SaasApiClient._send: uma consulta e um resultado no
+        # breaker por chamada, e só erros de conexão são repetidos.
+        if not await self.breaker.aallow_request():
+            raise SaasApiUnavailable(f"{action}: API indisponível, tente novamente em instantes.")
+
+        started = time.monotonic()
+        attempt = 0
+        response = None
+        succeeded = False
+        try:
+            while True:
+                attempt += 1
+                response = None
+                try:
+                    response = await self.http.request(
+                        method,
+                        url,
+                        headers=headers,
+                        timeout=timeout or self.DEFAULT_TIMEOUT,
+                        **kwargs,
+                    )
+                except (httpx.ConnectError, httpx.ConnectTimeout) as exc:
+                    if attempt > retries:
+                        raise SaasApiError(f"{action}: {exc}") from exc
+                    await asyncio.sleep(self._backoff(attempt - 1))
+                    continue
+                except httpx.HTTPError as exc:
+                    raise SaasApiError(f"{action}: {exc}") from exc
+                _count_transfer(received=len(response.content))
+                if response.status_code in RETRY_STATUSES and attempt <= retries:
+                    await asyncio.sleep(self._backoff(attempt - 1, response))
+                    continue
+                succeeded = response.status_code < 500
+                return response
+        finally:
+            if succeeded:
+                await self.breaker.arecord_success()
+            else:
+                await self.breaker.arecord_failure()
+            elapsed = (time.monotonic() - started) * 1000
+            status = response.status_code if response is not None else "erro"
+            log = logger.warning if attempt > 1 else logger.debug
+            log(
+                "%s %s -> %s em %.0f ms (%d tentativa(s))",
+                method, path, status, elapsed, attempt,
+            )
+            metrics.record_call(
+                method,
+                template or path,
+                status,
+                len(response.content) if response is not None else 0,
+                elapsed,
+                attempt,
+            )
+
+    async def _request(self, method: str, path: str, action: str, timeout=None, **kwargs):
+        response = await self._send(method, path, action, timeout=timeout, **kwargs)
+        return self._handle_response(response, action)
+
+    async def _get_entry(self, path: str, action: str, entry: dict = None, template: str = None) -> dict:
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = await self._send("GET", path, action, headers=headers, template=template)
+        if response.status_code == 304 and entry is not None:
+            _count_transfer(not_modified=1, saved=entry.get("size") or 0)
+            return {**entry, "fetched_at": time.time()}
+        return {
+            "data": self._handle_response(response, action),
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "size": len(response.content),
+        }
+
+    async def _cached(self, key: str, fetch_entry):
+        """Mesma política de TTL/stale-while-revalidate de SaasApiClient._cached."""
+        ttl = getattr(settings, "SAAS_API_CACHE_TTL", 60)
+        if ttl <= 0:
+            return (await fetch_entry(None))["data"]
+        stale_ttl = getattr(settings, "SAAS_API_CACHE_STALE_TTL", 300)
+        entry = await cache.aget(key)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < ttl:
+                return entry["data"]
+            if age < ttl + stale_ttl:
+                await self._revalidate(key, entry, fetch_entry)
+                return entry["data"]
+        entry = await fetch_entry(entry)
+        await self._store(key, entry)
+        return entry["data"]
+
+    async def _store(self, key: str, entry: dict) -> None:
+        ttl = getattr(settings, "SAAS_API_CACHE_TTL", 60)
+        stale_ttl = getattr(settings, "SAAS_API_CACHE_STALE_TTL", 300)
+        retention = getattr(settings, "SAAS_API_CACHE_RETENTION", 86400)
+        await cache.aset(key, entry, timeout=max(retention, ttl + stale_ttl))
+
+    async def _revalidate(self, key: str, entry: dict, fetch_entry) -> None:
+        lock_key = f"{key}:refreshing"
+        if not await cache.aadd(lock_key, True, timeout=self.DEFAULT_TIMEOUT * 2):
+            return
+
+        async def refresh():
+            try:
+                await self._store(key, await fetch_entry(entry))
+            except SaasApiError as exc:
+                logger.warning("Falha ao revalidar %s em segundo plano: %s", key, exc)
+            finally:
+                await cache.adelete(lock_key)
+
+        task = asyncio.create_task(refresh())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def _fetch_tenants(self, entry: dict = None) -> dict:
+        entry = await self._get_entry("api/tenants/", "Erro ao buscar tenants na API", entry)
+        if not isinstance(entry["data"], list):
+            entry["data"] = []
+        return entry
+
+    async def _fetch_tenant(self, schema_name: str, entry: dict = None) -> dict:
+        entry = await self._get_entry(
+            f"api/tenants/{schema_name}/",
+            "Erro ao buscar tenant na API",
+            entry,
+            template="api/tenants/{schema_name}/",
+        )
+        if not isinstance(entry["data"], dict):
+            raise SaasApiError("Resposta inesperada da API ao buscar tenant.")
+        return entry
+
+    async def _mirrored_tenants(self, schema_name: str = None) -> list:
+        tenants = Tenant.objects.all()
+        if schema_name:
+            tenants = tenants.filter(schema_name=schema_name)
+        return [tenant.as_api_dict() async for tenant in tenants]
+
+    async def list_tenants(self, use_cache: bool = True) -> list:
+        if use_cache:
+            try:
+                tenants = await self._cached(TENANT_LIST_CACHE_KEY, self._fetch_tenants)
+            except SaasApiUnavailable:
+                tenants = await self._mirrored_tenants()
+                if not tenants:
+                    raise
+        else:
+            tenants = (await self._fetch_tenants())["data"]
+        for tenant in tenants:
+            if isinstance(tenant, dict) and tenant.get("schema_name"):
+                self._identity_map[tenant["schema_name"]] = tenant
+        return tenants
+
+    async def retrieve_tenant(self, schema_name: str, use_cache: bool = True) -> dict:
+        if use_cache and schema_name in self._identity_map:
+            return self._identity_map[schema_name]
+        if use_cache:
+            try:
+                tenant = await self._cached(
+                    tenant_cache_key(schema_name),
+                    lambda entry: self._fetch_tenant(schema_name, entry),
+                )
+            except SaasApiUnavailable:
+                mirrored = await self._mirrored_tenants(schema_name)
+                if not mirrored:
+                    raise
+                tenant = mirrored[0]
+        else:
+            tenant = (await self._fetch_tenant(schema_name))["data"]
+        self._identity_map[schema_name] = tenant
+        return tenant
+
+    async def _gather(self, func, schema_names: list, max_workers: int = None, on_result=None) -> list:
+        """
+        Equivalente async de ``SaasApiClient._parallel``: as chamadas são
+        concorrentes no mesmo event loop, limitadas por SAAS_API_MAX_WORKERS.
+        ``on_result`` é uma função async, aguardada para cada resultado na
+        ordem em que chegam (para gravar no banco, use ``sync_to_async``).
+        """
+        semaphore = asyncio.Semaphore(max_workers or getattr(settings, "SAAS_API_MAX_WORKERS", 8))
+
+        async def call(schema_name):
+            async with semaphore:
+                try:
+                    result = TenantResult(schema_name, await func(schema_name), None)
+                except SaasApiError as exc:
+                    result = TenantResult(schema_name, None, exc)
+            if on_result is not None:
+                await on_result(result)
+            return result
+
+        return list(await asyncio.gather(*(call(name) for name in schema_names)))
+
+    async def retrieve_many(self, schema_names, max_workers: int = None, use_cache: bool = True) -> list:
+        return await self._gather(
+            lambda schema_name: self.retrieve_tenant(schema_name, use_cache=use_cache),
+            list(schema_names),
+            max_workers,
+        )
+
+    async def update_many(
+        self,
+        schema_names,
+        payload: dict,
+        max_workers: int = None,
+        idempotency_prefix: str = None,
+        on_result=None,
+    ) -> list:
+        async def update(schema_name):
+            key = f"{idempotency_prefix}:{schema_name}" if idempotency_prefix else None
+            return await self.update_tenant(schema_name, payload, idempotency_key=key)
+
+        return await self._gather(update, list(schema_names), max_workers, on_result)
+
+    async def _invalidate(self, schema_name: str = None) -> None:
+        keys = [TENANT_LIST_CACHE_KEY]
+        if schema_name:
+            keys.append(tenant_cache_key(schema_name))
+        await cache.adelete_many(keys)
+        self._identity_map.pop(schema_name, None)
+
+    async def create_tenant(self, payload: dict, idempotency_key: str = None) -> dict:
+        data = await self._request(
+            "POST",
+            "api/tenants/create/",
+            "Erro ao criar tenant na API",
+            timeout=self.CREATE_TIMEOUT,
+            idempotency_key=idempotency_key or uuid.uuid4().hex,
+            json=payload,
+        )
+        await self._invalidate(payload.get("schema_name"))
+        if isinstance(data, dict):
+            return data
+        return {}
+
+    async def update_tenant(self, schema_name: str, payload: dict, partial: bool = True, idempotency_key: str = None) -> dict:
+        data = await self._request(
+            "PATCH" if partial else "PUT",
+            f"api/tenants/{schema_name}/update/",
+            "Erro ao atualizar tenant na API",
+            idempotency_key=idempotency_key or uuid.uuid4().hex,
+            template="api/tenants/{schema_name}/update/",
+            json=payload,
+        )
+        await self._invalidate(schema_name)
+        if isinstance(data, dict):
+            return data
+        return {}
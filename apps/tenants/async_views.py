@@ -0,0 +1,64 @@
+"""
+Views async das telas que esperam pela API do SaaS, ativadas com
+TENANT_ASYNC_VIEWS sob ASGI.
+
+A chamada à API é feita com o AsyncSaasApiClient, liberando o event loop
+enquanto a resposta não chega; a montagem da página (formulários, ORM e
+templates) continua a cargo das views síncronas, que recebem o tenant já
+buscado em ``prefetched_tenant``. Envios de formulário (POST) são delegados
+sem alterações.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from .async_services import AsyncSaasApiClient
+from .models import Tenant, TenantPayment
+from .services import SaasApiError
+from .sync import upsert_tenant
+from .views import TenantPaymentUpdateView, TenantUpdateView
+
+
+async def _retrieve_tenant(request, schema_name: str, use_cache: bool = True) -> dict:
+    client = AsyncSaasApiClient.for_request(request)
+    try:
+        return await client.retrieve_tenant(schema_name, use_cache=use_cache)
+    except SaasApiError as exc:
+        messages.error(request, str(exc))
+        return {}
+
+
+@login_required
+async def tenant_detail(request, schema_name: str):
+    tenant = await Tenant.objects.filter(schema_name=schema_name).afirst()
+    if tenant is None:
+        # Tenant ainda não sincronizado: busca na API e grava localmente.
+        data = await _retrieve_tenant(request, schema_name)
+        if data:
+            tenant = await sync_to_async(upsert_tenant)(data)
+    context = {
+        "schema_name": schema_name,
+        "tenant": tenant,
+        "payments": [payment async for payment in TenantPayment.objects.filter(schema_name=schema_name)],
+    }
+    return await sync_to_async(render)(request, "tenants/tenant_detail.html", context)
+
+
+@login_required
+async def tenant_update(request, schema_name: str):
+    view = TenantUpdateView.as_view()
+    if request.method == "GET":
+        # O formulário de edição parte sempre do estado atual da API.
+        tenant = await _retrieve_tenant(request, schema_name, use_cache=False)
+        view = TenantUpdateView.as_view(prefetched_tenant=tenant)
+    return await sync_to_async(view)(request, schema_name=schema_name)
+
+
+@login_required
+async def tenant_payment(request, schema_name: str):
+    view = TenantPaymentUpdateView.as_view()
+    if request.method == "GET":
+        tenant = await _retrieve_tenant(request, schema_name)
+        view = TenantPaymentUpdateView.as_view(prefetched_tenant=tenant)
+    return await sync_to_async(view)(request, schema_name=schema_name)
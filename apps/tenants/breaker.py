@@ -0,0 +1,117 @@
+"""
+Circuit breaker da API do SaaS, com estado guardado no cache do Django para
+ser compartilhado por todos os workers.
+
+- fechado: chamadas passam normalmente; falhas consecutivas são contadas;
+- aberto: após SAAS_API_BREAKER_THRESHOLD falhas, as chamadas falham na hora
+  durante SAAS_API_BREAKER_RESET_TIMEOUT segundos;
+- semiaberto: passado esse tempo, uma única chamada de teste é liberada. Se ela
+  funcionar o circuito fecha, se falhar o circuito abre de novo.
+
+Os métodos com prefixo ``a`` são as versões para código async: executam o
+acesso ao cache (Redis, banco...) em uma thread, sem bloquear o event loop.
+"""
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str = "saas_api") -> None:
+        self.name = name
+        self.failures_key = f"{name}:breaker:failures"
+        self.opened_at_key = f"{name}:breaker:opened_at"
+        self.probe_key = f"{name}:breaker:probe"
+
+    @property
+    def threshold(self) -> int:
+        return getattr(settings, "SAAS_API_BREAKER_THRESHOLD", 5)
+
+    @property
+    def reset_timeout(self) -> float:
+        return getattr(settings, "SAAS_API_BREAKER_RESET_TIMEOUT", 30)
+
+    def state(self) -> str:
+        opened_at = cache.get(self.opened_at_key)
+        if opened_at is None:
+            return self.CLOSED
+        if time.time() - opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow_request(self) -> bool:
+        state = self.state()
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            # Apenas um worker faz a chamada de teste.
+            return cache.add(self.probe_key, True, timeout=self.reset_timeout)
+        return False
+
+    def record_success(self) -> None:
+        current = cache.get_many([self.failures_key, self.opened_at_key])
+        if not current:
+            return
+        if self.opened_at_key in current:
+            self._transition(self.CLOSED)
+        cache.delete_many([self.failures_key, self.opened_at_key, self.probe_key])
+
+    def record_failure(self) -> None:
+        if self.state() == self.HALF_OPEN:
+            self._open()
+            return
+        cache.add(self.failures_key, 0, timeout=None)
+        try:
+            failures = cache.incr(self.failures_key)
+        except ValueError:
+            failures = 1
+            cache.set(self.failures_key, failures, timeout=None)
+        if failures >= self.threshold and cache.get(self.opened_at_key) is None:
+            self._open()
+
+    async def aallow_request(self) -> bool:
+        return await sync_to_async(self.allow_request, thread_sensitive=False)()
+
+    async def arecord_success(self) -> None:
+        await sync_to_async(self.record_success, thread_sensitive=False)()
+
+    async def arecord_failure(self) -> None:
+        await sync_to_async(self.record_failure, thread_sensitive=False)()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state(),
+            "failures": cache.get(self.failures_key, 0),
+            "transitions": {
+                state: cache.get(self._transitions_key(state), 0)
+                for state in (self.OPEN, self.CLOSED)
+            },
+        }
+
+    def _open(self) -> None:
+        cache.set(self.opened_at_key, time.time(), timeout=None)
+        cache.delete(self.probe_key)
+        self._transition(self.OPEN)
+
+    def _transitions_key(self, state: str) -> str:
+        return f"{self.name}:breaker:transitions:{state}"
+
+    def _transition(self, state: str) -> None:
+        key = self._transitions_key(state)
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+        log = logger.warning if state == self.OPEN else logger.info
+        log("Circuit breaker %s: %s", self.name, state)
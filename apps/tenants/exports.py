@@ -0,0 +1,97 @@
+"""
+Exportação de pagamentos em CSV e XLSX com memória constante.
+
+As linhas são lidas com ``values_list(...).iterator(chunk_size=...)``, sem
+instanciar os models nem carregar o resultado inteiro. O CSV é enviado à
+medida que é gerado (StreamingHttpResponse); o XLSX usa apps.core.xlsx.
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from apps.core.xlsx import FORMULA_PREFIXES, xlsx_response as build_xlsx_response
+
+from .models import TenantPayment
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = [
+    "payment_date",
+    "schema_name",
+    "client_name",
+    "amount",
+    "currency",
+    "status",
+    "reference",
+    "notes",
+    "created_at",
+]
+
+STATUS_LABELS = dict(TenantPayment.STATUS_CHOICES)
+
+# Campos livres que, no CSV, recebem um apóstrofo antes quando começam como
+# fórmula (FORMULA_PREFIXES); no XLSX, apps.core.xlsx grava-os como texto.
+FREE_TEXT_FIELDS = ("client_name", "reference", "notes")
+
+
+def export_headers() -> list:
+    return [str(TenantPayment._meta.get_field(name).verbose_name) for name in EXPORT_FIELDS]
+
+
+def export_rows(queryset, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Tuplas na ordem de EXPORT_FIELDS, com o status já traduzido."""
+    status_index = EXPORT_FIELDS.index("status")
+    created_index = EXPORT_FIELDS.index("created_at")
+    current_timezone = timezone.get_current_timezone()
+    for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        row = list(row)
+        row[status_index] = STATUS_LABELS.get(row[status_index], row[status_index])
+        # Horário local, sem tzinfo, tanto no CSV quanto no XLSX.
+        row[created_index] = timezone.localtime(row[created_index], current_timezone).replace(tzinfo=None)
+        yield row
+
+
+class _Echo:
+    """Buffer mínimo para csv.writer: devolve a linha em vez de armazená-la."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_text(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(queryset, chunk_size: int = EXPORT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    text_indexes = [EXPORT_FIELDS.index(name) for name in FREE_TEXT_FIELDS]
+    # BOM para o Excel reconhecer o arquivo como UTF-8.
+    yield "\ufeff" + writer.writerow(export_headers())
+    lines = []
+    for row in export_rows(queryset, chunk_size):
+        for index in text_indexes:
+            row[index] = _csv_text(row[index])
+        lines.append(writer.writerow(row))
+        if len(lines) >= chunk_size:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def _filename(extension: str) -> str:
+    return f"pagamentos-{timezone.localdate():%Y%m%d}.{extension}"
+
+
+def csv_response(queryset) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(iter_csv(queryset), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{_filename("csv")}"'
+    return response
+
+
+def xlsx_response(queryset):
+    return build_xlsx_response(_filename("xlsx"), "Pagamentos", export_headers(), export_rows(queryset))
@@ -79,6 +79,12 @@ class TenantForm(forms.Form):
             attrs={"class": "form-control", "type": "date"},
         ),
     )
+    # Gerada ao abrir o formulário; identifica reenvios do mesmo formulário.
+    idempotency_key = forms.CharField(
+        required=False,
+        max_length=64,
+        widget=forms.HiddenInput,
+    )
 
 
 class TenantPaymentForm(forms.ModelForm):
@@ -150,3 +156,98 @@ class TenantPaymentForm(forms.ModelForm):
                 self.initial["payment_date"] = date.today()
             if "currency" not in self.initial:
                 self.initial["currency"] = "BRL"
+
+
+class TenantBulkUpdateForm(forms.Form):
+    """Campos deixados em branco não são alterados nos tenants selecionados."""
+
+    TRIAL_CHOICES = [
+        ("", "Não alterar"),
+        ("true", "Sim"),
+        ("false", "Não"),
+    ]
+
+    schema_names = forms.MultipleChoiceField(
+        label="Clientes",
+        widget=forms.SelectMultiple(attrs={"class": "form-select", "size": 10}),
+    )
+    paid_until = forms.DateField(
+        label="Pago até",
+        required=False,
+        widget=forms.DateInput(attrs={"class": "form-control", "type": "date"}),
+    )
+    manager_licenses = forms.IntegerField(
+        label="Licenças Manager",
+        required=False,
+        min_value=0,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+    staff_licenses = forms.IntegerField(
+        label="Licenças Staff",
+        required=False,
+        min_value=0,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+    storage_gb = forms.IntegerField(
+        label="Storage (GB)",
+        required=False,
+        min_value=0,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+    monthly_price = forms.DecimalField(
+        label="Valor mensal",
+        required=False,
+        min_value=0,
+        max_digits=10,
+        decimal_places=2,
+        widget=forms.NumberInput(attrs={"class": "form-control", "step": "0.01", "min": "0"}),
+    )
+    on_trial = forms.ChoiceField(
+        label="Em período de teste",
+        required=False,
+        choices=TRIAL_CHOICES,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def __init__(self, *args, tenant_choices=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["schema_names"].choices = tenant_choices or []
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.get_patch():
+            raise forms.ValidationError("Informe ao menos um campo para alterar.")
+        return cleaned_data
+
+    def get_patch(self) -> dict:
+        """Payload do PATCH com apenas os campos preenchidos."""
+        data = self.cleaned_data
+        patch = {}
+        if data.get("paid_until"):
+            patch["paid_until"] = data["paid_until"].isoformat()
+        for name in ("manager_licenses", "staff_licenses", "storage_gb"):
+            if data.get(name) is not None:
+                patch[name] = data[name]
+        if data.get("monthly_price") is not None:
+            patch["monthly_price"] = float(data["monthly_price"])
+        if data.get("on_trial"):
+            patch["on_trial"] = data["on_trial"] == "true"
+        return patch
+
+
+class StatementImportForm(forms.Form):
+    file = forms.FileField(
+        label="Extrato (OFX ou CSV)",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".ofx,.csv,.txt"}),
+    )
+    dry_run = forms.BooleanField(
+        label="Apenas conferir (não criar pagamentos)",
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        if not file.name.lower().endswith((".ofx", ".csv", ".txt")):
+            raise forms.ValidationError("Envie um arquivo OFX ou CSV.")
+        return file
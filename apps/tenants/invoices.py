@@ -0,0 +1,183 @@
+"""
+Armazenamento e download das notas fiscais anexadas a TenantPayment.
+
+Os anexos são gravados por conteúdo: o nome em disco é o SHA-256 do arquivo
+(``invoices/ab/cd/<sha256>.pdf``), então reenviar o mesmo PDF em outra
+edição, ou em outro pagamento, reaproveita o arquivo já armazenado. O nome
+original fica em TenantPayment.invoice_name.
+
+O download passa pela view ``payments-invoice`` (com login), enviado em
+blocos por FileResponse, com ETag (o próprio hash), Last-Modified e suporte
+a requisições parciais (Range), sem carregar o arquivo na memória.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+
+# Links com ``?v=<hash>`` apontam sempre para o mesmo conteúdo.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage que grava cada arquivo em
+    ``<diretório do upload_to>/ab/cd/<sha256><extensão>``.
+
+    Arquivos idênticos ocupam um único arquivo em disco e podem ser
+    referenciados por vários pagamentos: não apague um arquivo a partir de
+    um pagamento sem verificar os demais.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # O nome definitivo só é conhecido após o hash, em _save.
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()[:10]
+        os.makedirs(self.path(directory), exist_ok=True)
+        # O hash é calculado enquanto o arquivo é gravado em um temporário, que
+        # é então renomeado (ou descartado, se o conteúdo já existir). Uploads
+        # simultâneos do mesmo arquivo nunca expõem um arquivo parcial.
+        fd, temp_path = tempfile.mkstemp(dir=self.path(directory), suffix=".part")
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    file.write(chunk)
+            digest = digest.hexdigest()
+            name = f"{directory}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+
+invoice_storage = ContentAddressedStorage()
+
+
+def file_digest(name: str) -> str:
+    """SHA-256 contido no nome de um arquivo do ContentAddressedStorage, ou ""."""
+    stem = os.path.splitext(os.path.basename(name or ""))[0]
+    return stem if DIGEST_RE.match(stem) else ""
+
+
+class _FileRange:
+    """Leitura de ``length`` bytes de ``file`` a partir da posição atual."""
+
+    def __init__(self, file, length: int):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _byte_range(header: str, size: int):
+    """
+    (início, fim) inclusivos do cabeçalho Range, None para ignorá-lo (sintaxe
+    não suportada ou vários intervalos) ou ValueError se não for satisfazível.
+    """
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if not match or not any(match.groups()):
+        return None
+    if not size:
+        raise ValueError(header)
+    first, last = match.groups()
+    if not first:
+        # bytes=-N: os últimos N bytes.
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def invoice_response(request, payment):
+    """
+    Resposta com a nota fiscal de ``payment``. Levanta FileNotFoundError se o
+    arquivo não existir no storage.
+    """
+    file_field = payment.invoice_file
+    storage = file_field.storage
+    size = storage.size(file_field.name)
+    modified = int(storage.get_modified_time(file_field.name).timestamp())
+    digest = file_digest(file_field.name)
+    # Anexos antigos, gravados antes do armazenamento por conteúdo, usam data e tamanho.
+    etag = f'"{digest}"' if digest else f'"{modified:x}-{size:x}"'
+    if digest and request.GET.get("v") == digest:
+        cache_control = f"private, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        cache_control = "private, no-cache"
+
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    if etag in if_none_match or "*" in if_none_match or (
+        not if_none_match and if_modified_since and modified <= if_modified_since
+    ):
+        response = HttpResponseNotModified()
+    else:
+        byte_range = None
+        range_header = request.headers.get("Range", "")
+        if_range = request.headers.get("If-Range", etag)
+        # If-Range: só atende o intervalo se o cliente ainda tem esta versão.
+        if range_header and (if_range == etag or parse_http_date_safe(if_range) == modified):
+            try:
+                byte_range = _byte_range(range_header, size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+        filename = payment.invoice_name or os.path.basename(file_field.name)
+        as_attachment = bool(request.GET.get("download"))
+        file = storage.open(file_field.name, "rb")
+        if byte_range:
+            start, end = byte_range
+            file.seek(start)
+            response = FileResponse(
+                _FileRange(file, end - start + 1),
+                status=206,
+                as_attachment=as_attachment,
+                filename=filename,
+            )
+            response["Content-Length"] = end - start + 1
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            response = FileResponse(file, as_attachment=as_attachment, filename=filename)
+        response["Accept-Ranges"] = "bytes"
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(modified)
+    response["Cache-Control"] = cache_control
+    return response
@@ -0,0 +1,220 @@
+"""
+Execução em segundo plano da criação de tenants e das atualizações em lote.
+
+O backend é escolhido por TENANT_JOBS_BACKEND:
+
+- ``thread``: o job roda em um pool de threads do próprio processo web, logo
+  após o commit da transação que o criou;
+- ``worker``: o job fica na fila (banco de dados) até ser processado pelo
+  comando ``process_tenant_jobs``;
+- ``sync``: o job roda na própria requisição (útil em testes).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import TenantBulkUpdate, TenantProvisioningJob
+from .services import SaasApiClient, SaasApiError
+from .sync import upsert_tenant
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "TENANT_JOBS_THREADS", 2),
+                    thread_name_prefix="tenant-jobs",
+                )
+    return _executor
+
+
+def _run_in_thread(func, job_id: int) -> None:
+    try:
+        func(job_id)
+    except Exception:
+        logger.exception("Erro inesperado no job %s (%s)", job_id, func.__name__)
+    finally:
+        close_old_connections()
+
+
+def _backend() -> str:
+    return getattr(settings, "TENANT_JOBS_BACKEND", "thread")
+
+
+def _enqueue(func, job_id: int) -> None:
+    backend = _backend()
+    if backend == "sync":
+        func(job_id)
+    elif backend == "thread":
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, func, job_id))
+
+
+def enqueue_provisioning(job: TenantProvisioningJob) -> None:
+    _enqueue(run_provisioning_job, job.pk)
+
+
+def enqueue_bulk_update(bulk: TenantBulkUpdate) -> None:
+    _enqueue(run_bulk_update, bulk.pk)
+
+
+def run_provisioning_job(job_id: int) -> bool:
+    """
+    Executa o job se ele ainda estiver na fila. Retorna False quando outro
+    processo já o reivindicou.
+    """
+    claimed = TenantProvisioningJob.objects.filter(
+        pk=job_id,
+        status=TenantProvisioningJob.STATUS_PENDING,
+    ).update(status=TenantProvisioningJob.STATUS_RUNNING, started_at=timezone.now())
+    if not claimed:
+        return False
+
+    job = TenantProvisioningJob.objects.get(pk=job_id)
+    job.status = TenantProvisioningJob.STATUS_FAILED
+    try:
+        created = SaasApiClient().create_tenant(
+            {**job.payload, "password": job.get_password()},
+            idempotency_key=job.idempotency_key or f"tenant-job-{job.pk}",
+        )
+        job.status = TenantProvisioningJob.STATUS_SUCCEEDED
+        job.result = created
+        upsert_tenant(created if created.get("schema_name") else job.payload)
+    except SaasApiError as exc:
+        job.error = str(exc)
+    except Exception as exc:
+        logger.exception("Erro inesperado no provisionamento %s", job_id)
+        job.error = f"Erro inesperado: {exc}"
+    finally:
+        # A senha só é necessária durante a chamada à API.
+        job.encrypted_password = ""
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "result", "encrypted_password", "finished_at"])
+    return True
+
+
+def _stale_before():
+    return timezone.now() - timedelta(seconds=getattr(settings, "TENANT_JOBS_STALE_AFTER", 900))
+
+
+def run_bulk_update(bulk_id: int) -> bool:
+    """
+    Envia o patch aos tenants ainda sem sucesso registrado, em paralelo
+    (SAAS_API_MAX_WORKERS), e grava o resultado de cada um assim que ele
+    termina. Retorna False quando outro processo já reivindicou a execução.
+    """
+    claimed = TenantBulkUpdate.objects.filter(
+        pk=bulk_id,
+        status=TenantBulkUpdate.STATUS_PENDING,
+    ).update(
+        status=TenantBulkUpdate.STATUS_RUNNING,
+        attempts=F("attempts") + 1,
+        started_at=timezone.now(),
+        finished_at=None,
+        updated_at=timezone.now(),
+    )
+    if not claimed:
+        return False
+
+    bulk = TenantBulkUpdate.objects.get(pk=bulk_id)
+
+    def save_result(result):
+        at = timezone.now().isoformat()
+        if result.error is None:
+            bulk.results[result.schema_name] = {"ok": True, "error": "", "at": at}
+            if result.data.get("schema_name"):
+                upsert_tenant(result.data)
+        else:
+            bulk.results[result.schema_name] = {"ok": False, "error": str(result.error), "at": at}
+        # Gravado a cada tenant: se o processo cair, a retomada parte daqui.
+        bulk.save(update_fields=["results", "updated_at"])
+
+    # A API guarda a resposta de cada Idempotency-Key, inclusive as de erro:
+    # cada execução usa um prefixo próprio para que a retomada não receba de
+    # novo a falha anterior.
+    SaasApiClient().update_many(
+        bulk.pending_schema_names,
+        bulk.patch,
+        idempotency_prefix=f"tenant-bulk-{bulk.pk}-{bulk.attempts}",
+        on_result=save_result,
+    )
+
+    if not bulk.pending_schema_names:
+        bulk.status = TenantBulkUpdate.STATUS_SUCCEEDED
+    elif bulk.succeeded_count:
+        bulk.status = TenantBulkUpdate.STATUS_PARTIAL
+    else:
+        bulk.status = TenantBulkUpdate.STATUS_FAILED
+    bulk.finished_at = timezone.now()
+    bulk.save(update_fields=["status", "results", "finished_at", "updated_at"])
+    return True
+
+
+def resume_bulk_update(bulk: TenantBulkUpdate) -> bool:
+    """
+    Recoloca na fila uma atualização que terminou com falhas, ou que está
+    "em execução" sem progresso há TENANT_JOBS_STALE_AFTER segundos (o
+    processo que a executava foi encerrado).
+    """
+    requeued = TenantBulkUpdate.objects.filter(
+        Q(status__in=[TenantBulkUpdate.STATUS_PARTIAL, TenantBulkUpdate.STATUS_FAILED])
+        | Q(status=TenantBulkUpdate.STATUS_RUNNING, updated_at__lt=_stale_before()),
+        pk=bulk.pk,
+    ).update(status=TenantBulkUpdate.STATUS_PENDING, updated_at=timezone.now())
+    if requeued:
+        enqueue_bulk_update(bulk)
+    return bool(requeued)
+
+
+def recover_stale_jobs() -> int:
+    """
+    Marca como falhos os provisionamentos parados há TENANT_JOBS_STALE_AFTER
+    segundos: em execução (o processo foi encerrado durante a chamada) ou,
+    com o backend ``thread``, ainda na fila (a thread que os executaria não
+    existe mais). Com o backend ``worker``, jobs na fila apenas aguardam o
+    worker voltar. A senha criptografada é descartada. Retorna quantos jobs
+    foram marcados.
+    """
+    stale_before = _stale_before()
+    stale = Q(status=TenantProvisioningJob.STATUS_RUNNING, started_at__lt=stale_before)
+    if _backend() == "thread":
+        stale |= Q(status=TenantProvisioningJob.STATUS_PENDING, created_at__lt=stale_before)
+    return TenantProvisioningJob.objects.filter(stale).update(
+        status=TenantProvisioningJob.STATUS_FAILED,
+        error="Interrompido: o job ficou parado por tempo demais. Confira o tenant na API antes de criá-lo de novo.",
+        encrypted_password="",
+        finished_at=timezone.now(),
+    )
+
+
+def process_pending_jobs() -> dict:
+    """Processa a fila; retorna as contagens ``{"provisioning", "bulk_updates"}``."""
+    processed = {"provisioning": 0, "bulk_updates": 0}
+    pending = TenantProvisioningJob.objects.filter(
+        status=TenantProvisioningJob.STATUS_PENDING,
+    ).order_by("created_at").values_list("pk", flat=True)
+    for job_id in pending:
+        if run_provisioning_job(job_id):
+            processed["provisioning"] += 1
+    pending = TenantBulkUpdate.objects.filter(
+        status=TenantBulkUpdate.STATUS_PENDING,
+    ).order_by("created_at").values_list("pk", flat=True)
+    for bulk_id in pending:
+        if run_bulk_update(bulk_id):
+            processed["bulk_updates"] += 1
+    # Depois de processar a fila: só o que não pôde ser executado é descartado.
+    recover_stale_jobs()
+    return processed
@@ -0,0 +1,68 @@
+import resource
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.tenants.exports import iter_csv, write_xlsx
+from apps.tenants.management.commands.bench_payment_queries import generate_payments
+from apps.tenants.models import TenantPayment
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera pagamentos sintéticos e mede tempo, tamanho e memória máxima do processo "
+        "(RSS) das exportações CSV e XLSX para volumes crescentes, mostrando que a memória "
+        "não cresce com o número de linhas. Os dados são descartados ao final (rollback)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--payments", type=int, default=1_000_000, help="Pagamentos gerados.")
+        parser.add_argument("--tenants", type=int, default=1000, help="Tenants distintos.")
+        parser.add_argument(
+            "--formats",
+            nargs="+",
+            choices=["csv", "xlsx"],
+            default=["csv", "xlsx"],
+        )
+        parser.add_argument(
+            "--baseline",
+            action="store_true",
+            help="Mede também o pico de memória de carregar todos os pagamentos em uma lista.",
+        )
+
+    def handle(self, *args, **options):
+        total = options["payments"]
+        with transaction.atomic():
+            started = time.perf_counter()
+            generate_payments(total, options["tenants"], days=5 * 365)
+            self.stdout.write(f"{total} pagamentos gerados em {time.perf_counter() - started:.1f}s\n")
+            # O RSS máximo nunca diminui: as exportações rodam em volumes
+            # crescentes e a lista completa (--baseline) só no final.
+            self.stdout.write(f"{'formato':<8} {'linhas':>9} {'tempo':>9} {'tamanho':>10} {'RSS máximo':>12}")
+            sizes = sorted({max(total // 100, 1), max(total // 10, 1), total})
+            for size in sizes:
+                for export_format in options["formats"]:
+                    self._measure(export_format, getattr(self, f"_export_{export_format}"), size)
+            if options["baseline"]:
+                for size in sizes:
+                    self._measure("list()", lambda queryset: None if list(queryset) else None, size)
+            transaction.set_rollback(True)
+
+    def _measure(self, label: str, func, rows: int) -> None:
+        started = time.perf_counter()
+        written = func(TenantPayment.objects.all()[:rows])
+        elapsed = time.perf_counter() - started
+        # ru_maxrss em KB no Linux.
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        size = f"{written / 1024 / 1024:.1f} MB" if written is not None else "-"
+        self.stdout.write(f"{label:<8} {rows:>9} {elapsed:>8.2f}s {size:>10} {max_rss:>9.0f} MB")
+
+    def _export_csv(self, queryset) -> int:
+        return sum(len(chunk.encode("utf-8")) for chunk in iter_csv(queryset))
+
+    def _export_xlsx(self, queryset) -> int:
+        with tempfile.TemporaryFile() as file:
+            write_xlsx(queryset, file)
+            return file.tell()
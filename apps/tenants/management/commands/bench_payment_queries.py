@@ -0,0 +1,114 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.tenants.models import TenantPayment
+from apps.tenants.pagination import ORDERING, keyset_filter
+
+
+def generate_payments(total: int, tenants: int, days: int, batch_size: int = 10_000) -> None:
+    """Cria ``total`` pagamentos sintéticos (bulk_create, sem signals) para os benchmarks."""
+    rng = random.Random(0)
+    today = date.today()
+    for offset in range(0, total, batch_size):
+        TenantPayment.objects.bulk_create(
+            [
+                TenantPayment(
+                    schema_name=f"bench{rng.randrange(tenants):05d}",
+                    amount=Decimal(rng.randrange(5000, 50000)) / 100,
+                    payment_date=today - timedelta(days=rng.randrange(days)),
+                )
+                for _ in range(min(batch_size, total - offset))
+            ],
+            batch_size=batch_size,
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera pagamentos sintéticos e mede as consultas das telas de detalhe do tenant e "
+        "de pagamentos, com e sem os índices de TenantPayment, mostrando o plano de "
+        "execução. Tudo roda em uma transação desfeita ao final (rollback)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--payments", type=int, default=2_000_000, help="Pagamentos gerados.")
+        parser.add_argument("--tenants", type=int, default=1000, help="Tenants distintos.")
+        parser.add_argument("--days", type=int, default=3 * 365, help="Período coberto pelos pagamentos, em dias.")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=20, help="Execuções por consulta.")
+        parser.add_argument("--explain", action="store_true", help="Mostra o plano completo de cada consulta.")
+        parser.add_argument(
+            "--page",
+            type=int,
+            default=1000,
+            help="Página (de 50 linhas) da listagem comparada entre OFFSET e cursor.",
+        )
+
+    def scenarios(self, options):
+        schema = f"bench{options['tenants'] // 2:05d}"
+        end = date.today()
+        start = end - timedelta(days=30)
+        payments = TenantPayment.objects.all()
+        # Mesmos filtros e ordenação de TenantDetailView e TenantPaymentListView.
+        # Página N da listagem: OFFSET percorre todas as linhas anteriores; o
+        # cursor (pagination.py) parte direto da última linha da página N-1.
+        offset = (options["page"] - 1) * 50
+        last = payments.order_by(*ORDERING).values_list("payment_date", "created_at", "id")[offset - 1] if offset else None
+        return {
+            "detalhe do tenant": payments.filter(schema_name=schema),
+            "tenant + período": payments.filter(schema_name=schema, payment_date__range=(start, end)),
+            "período (50 primeiros)": payments.filter(payment_date__range=(start, end))[:50],
+            "página 1": payments[:50],
+            f"página {options['page']} (OFFSET)": payments[offset : offset + 50],
+            f"página {options['page']} (cursor)": (payments.filter(keyset_filter(last, "lt")) if last else payments)[:50],
+        }
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            generate_payments(options["payments"], options["tenants"], options["days"], options["batch_size"])
+            self.stdout.write(
+                f"{options['payments']} pagamentos gerados em {time.perf_counter() - started:.1f}s"
+            )
+            self._analyze()
+            self._measure("com índices", options)
+
+            # DROP INDEX é transacional no SQLite e no PostgreSQL: o rollback os recria.
+            with connection.cursor() as cursor:
+                for index in TenantPayment._meta.indexes:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+            self._analyze()
+            self._measure("sem índices", options)
+            transaction.set_rollback(True)
+
+    def _analyze(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {TenantPayment._meta.db_table}")
+
+    def _measure(self, label: str, options) -> None:
+        self.stdout.write(f"\n{label}")
+        self.stdout.write(f"{'consulta':<28} {'linhas':>7} {'mediana':>10} {'p95':>10}  ordenação pelo índice")
+        for name, queryset in self.scenarios(options).items():
+            plan = queryset.explain()
+            durations = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                rows = len(list(queryset.all()))
+                durations.append((time.perf_counter() - started) * 1000)
+            durations.sort()
+            p95 = durations[max(0, round(len(durations) * 0.95) - 1)]
+            # SQLite anota "TEMP B-TREE FOR ORDER BY" e o PostgreSQL um nó "Sort"
+            # quando precisam ordenar o resultado fora do índice.
+            sorted_by_index = "TEMP B-TREE" not in plan and "Sort" not in plan
+            self.stdout.write(
+                f"{name:<28} {rows:>7} {statistics.median(durations):>8.2f}ms {p95:>8.2f}ms  "
+                f"{'sim' if sorted_by_index else 'não'}"
+            )
+            if options["explain"]:
+                self.stdout.write(plan)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from apps.tenants.services import SaasApiClient, close_session, transfer_stats
+from apps.tenants.stub_api import StubSaasApi, make_tenants
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede os bytes transferidos ao revalidar a lista de tenants com e sem "
+        "GET condicional (ETag/Last-Modified), usando a API local simulada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--revalidations", type=int, default=100, help="Revalidações por cenário.")
+        parser.add_argument("--tenants", type=int, default=300, help="Tenants retornados pela API simulada.")
+
+    def handle(self, *args, **options):
+        revalidations = options["revalidations"]
+        tenants = make_tenants(options["tenants"])
+        results = {}
+        for label, validators in (("sem validadores", False), ("com validadores", True)):
+            with StubSaasApi(tenants=tenants, validators=validators) as stub:
+                client = SaasApiClient()
+                client.base_url = stub.base_url
+                entry = client._fetch_tenants()
+                stub.reset_counters()
+                transfer_stats(reset=True)
+                for _ in range(revalidations):
+                    entry = client._fetch_tenants(entry)
+                results[label] = stub.bytes_sent
+                stats = transfer_stats()
+                self.stdout.write(
+                    f"{label:<16} bytes enviados={stub.bytes_sent:<10} respostas 304={stub.not_modified:<5} "
+                    f"bytes economizados={stats['saved']}"
+                )
+        close_session()
+        baseline = results["sem validadores"] or 1
+        saving = 100 * (1 - results["com validadores"] / baseline)
+        self.stdout.write(f"Economia de transferência: {saving:.1f}%")
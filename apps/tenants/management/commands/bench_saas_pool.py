@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+from apps.tenants.services import SaasApiClient, close_session
+from apps.tenants.stub_api import StubSaasApi, make_tenants
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara conexões abertas e tempo total entre requisições avulsas "
+        "(requests.get) e a sessão com pool do SaasApiClient, usando a API local simulada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=500, help="Requisições por cenário.")
+        parser.add_argument("--threads", type=int, default=8, help="Threads concorrentes.")
+        parser.add_argument("--tenants", type=int, default=20, help="Tenants retornados pela API simulada.")
+
+    def handle(self, *args, **options):
+        calls = options["calls"]
+        threads = options["threads"]
+        with StubSaasApi(tenants=make_tenants(options["tenants"])) as stub:
+            url = f"{stub.base_url}/api/tenants/"
+
+            def unpooled(_):
+                requests.get(url, timeout=SaasApiClient.DEFAULT_TIMEOUT).json()
+
+            def pooled(_):
+                client = SaasApiClient()
+                client.base_url = stub.base_url
+                client.list_tenants()
+
+            close_session()
+            for label, func in (("requests.get avulso", unpooled), ("SaasApiClient (pool)", pooled)):
+                stub.reset_counters()
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    list(executor.map(func, range(calls)))
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{label:<22} requisições={stub.requests:<6} conexões={stub.connections:<6} "
+                    f"tempo={elapsed:.3f}s ({calls / elapsed:.0f} req/s)"
+                )
+            close_session()
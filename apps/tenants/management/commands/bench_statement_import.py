@@ -0,0 +1,77 @@
+import io
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.tenants.models import Tenant
+from apps.tenants.statements import LINE_STATUS_LABELS, import_statement
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera tenants e um extrato OFX sintético e mede a importação com conciliação, "
+        "seguida de uma reimportação do mesmo arquivo (todos os lançamentos duplicados). "
+        "Os dados são descartados ao final (rollback)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=10_000, help="Lançamentos no extrato.")
+        parser.add_argument("--tenants", type=int, default=2000, help="Tenants gerados.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        tenants = options["tenants"]
+        prices = [Decimal(rng.randrange(5000, 50000)) / 100 for _ in range(tenants)]
+        content = self._ofx(rng, options["lines"], prices)
+        self.stdout.write(f"Extrato com {options['lines']} lançamentos ({len(content) / 1024:.0f} KB)")
+        now = timezone.now()
+        with transaction.atomic():
+            Tenant.objects.bulk_create(
+                [
+                    Tenant(
+                        schema_name=f"bench{index:05d}",
+                        client_name=f"Cliente {index}",
+                        monthly_price=price,
+                        synced_at=now,
+                    )
+                    for index, price in enumerate(prices)
+                ]
+            )
+            for label in ("importação", "reimportação"):
+                started = time.perf_counter()
+                record = import_statement(io.BytesIO(content), "bench.ofx")
+                elapsed = time.perf_counter() - started
+                summary = ", ".join(
+                    f"{LINE_STATUS_LABELS[status]}: {count}" for status, count in sorted(record.summary.items())
+                )
+                self.stdout.write(f"{label:<13} {elapsed:>6.2f}s  {summary}")
+            transaction.set_rollback(True)
+
+    def _ofx(self, rng, lines: int, prices) -> bytes:
+        """Extrato com créditos por referência, por valor, não identificados e débitos."""
+        today = date.today()
+        parts = ["OFXHEADER:100\nDATA:OFXSGML\nCHARSET:1252\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>"]
+        parts.append("<BANKACCTFROM><BANKID>0001<ACCTID>12345-6</BANKACCTFROM><BANKTRANLIST>")
+        for number in range(lines):
+            index = rng.randrange(len(prices))
+            kind = rng.random()
+            if kind < 0.6:
+                amount, memo = prices[index], f"PIX RECEBIDO bench{index:05d}"
+            elif kind < 0.8:
+                amount, memo = prices[index], "TED RECEBIDA"
+            elif kind < 0.9:
+                amount, memo = Decimal(rng.randrange(100, 999)) / 100, "DEPOSITO"
+            else:
+                amount, memo = -Decimal(rng.randrange(1000, 99999)) / 100, "PAGAMENTO FORNECEDOR"
+            posted = today - timedelta(days=rng.randrange(60))
+            parts.append(
+                f"<STMTTRN><TRNTYPE>{'CREDIT' if amount > 0 else 'DEBIT'}<DTPOSTED>{posted:%Y%m%d}120000[-3:BRT]"
+                f"<TRNAMT>{amount}<FITID>{number:08d}<MEMO>{memo}</STMTTRN>\n"
+            )
+        parts.append("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+        return "".join(parts).encode("cp1252")
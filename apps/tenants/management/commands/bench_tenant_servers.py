@@ -0,0 +1,151 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tenants.management.commands.bench_tenant_views import latency_summary
+from apps.tenants.stub_api import StubSaasApi, make_tenants
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara gunicorn (views síncronas) e uvicorn (views async, TENANT_ASYNC_VIEWS) "
+        "sob carga concorrente na tela de pagamentos do tenant, que consulta a API "
+        "local simulada a cada requisição. Usa o banco configurado apenas para um "
+        "usuário e uma sessão temporários."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400, help="Requisições por servidor.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requisições simultâneas.")
+        parser.add_argument("--workers", type=int, default=1, help="Processos por servidor.")
+        parser.add_argument("--threads", type=int, default=1, help="Threads por worker do gunicorn.")
+        parser.add_argument("--latency", type=float, default=0.1, help="Latência da API simulada, em segundos.")
+        parser.add_argument("--tenants", type=int, default=50, help="Tenants retornados pela API simulada.")
+        parser.add_argument(
+            "--servers",
+            nargs="+",
+            choices=["gunicorn", "uvicorn"],
+            default=["gunicorn", "uvicorn"],
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.create_user(f"bench-servers-{os.getpid()}", password=None)
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        cookies = {settings.SESSION_COOKIE_NAME: session.session_key}
+
+        stub = StubSaasApi(tenants=make_tenants(options["tenants"]), latency=options["latency"]).start()
+        schemas = [tenant["schema_name"] for tenant in stub.tenants]
+        try:
+            self.stdout.write(
+                f"{options['requests']} requisições, {options['concurrency']} simultâneas, "
+                f"API com {options['latency'] * 1000:.0f} ms de latência"
+            )
+            self.stdout.write(f"{'servidor':<28} {'p50':>9} {'p95':>9} {'req/s':>8} {'erros':>6}")
+            for server in options["servers"]:
+                port = _free_port()
+                process = self._start(server, port, stub, options)
+                try:
+                    base_url = f"http://127.0.0.1:{port}"
+                    self._wait_ready(base_url, process)
+                    summary, errors = asyncio.run(self._load(base_url, cookies, schemas, options))
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+                label = server if server == "uvicorn" else f"gunicorn ({options['threads']} thread(s))"
+                self.stdout.write(
+                    f"{label:<28} {summary['p50_ms']:>7.1f}ms {summary['p95_ms']:>7.1f}ms "
+                    f"{summary['rps']:>8.1f} {errors:>6}"
+                )
+        finally:
+            stub.stop()
+            session.delete()
+            user.delete()
+
+    def _start(self, server: str, port: int, stub: StubSaasApi, options) -> subprocess.Popen:
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "velzon.settings.development"),
+            "SAAS_API_BASE_URL": stub.base_url,
+            # Sem cache, toda requisição espera pela API.
+            "SAAS_API_CACHE_TTL": "0",
+            "SAAS_API_DEBUG_PANEL": "False",
+            "ALLOWED_HOSTS": "127.0.0.1",
+            "TENANT_ASYNC_VIEWS": "True" if server == "uvicorn" else "False",
+        }
+        workers = str(options["workers"])
+        if server == "gunicorn":
+            command = [
+                sys.executable, "-m", "gunicorn", "velzon.wsgi:application",
+                "--bind", f"127.0.0.1:{port}",
+                "--workers", workers,
+                "--threads", str(options["threads"]),
+                "--log-level", "warning",
+            ]
+        else:
+            command = [
+                sys.executable, "-m", "uvicorn", "velzon.asgi:application",
+                "--host", "127.0.0.1",
+                "--port", str(port),
+                "--workers", workers,
+                "--log-level", "warning",
+                "--no-access-log",
+            ]
+        return subprocess.Popen(command, env=env, cwd=settings.BASE_DIR)
+
+    def _wait_ready(self, base_url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"O servidor terminou com código {process.returncode}.")
+            try:
+                httpx.get(f"{base_url}/account/login/", timeout=1)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        raise CommandError("O servidor não respondeu a tempo.")
+
+    async def _load(self, base_url: str, cookies: dict, schemas: list, options):
+        total = options["requests"]
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        limits = httpx.Limits(max_connections=options["concurrency"])
+        durations = []
+        errors = 0
+
+        async with httpx.AsyncClient(base_url=base_url, cookies=cookies, limits=limits, timeout=60) as client:
+
+            async def fetch(i):
+                nonlocal errors
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(f"/tenants/{schemas[i % len(schemas)]}/pagamentos/")
+                        ok = response.status_code == 200
+                    except httpx.HTTPError:
+                        ok = False
+                    durations.append(time.perf_counter() - started)
+                    if not ok:
+                        errors += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(fetch(i) for i in range(total)))
+            elapsed = time.perf_counter() - started
+        return latency_summary(durations, elapsed), errors
@@ -0,0 +1,136 @@
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from apps.tenants.models import TenantPayment
+from apps.tenants.services import close_session
+from apps.tenants.stub_api import StubSaasApi, make_tenants
+from apps.tenants.sync import sync_tenants
+
+
+def latency_summary(durations: list, elapsed: float) -> dict:
+    """p50/p95 em milissegundos e vazão (requisições por segundo)."""
+    durations_ms = sorted(d * 1000 for d in durations)
+    if len(durations_ms) > 1:
+        percentiles = statistics.quantiles(durations_ms, n=100, method="inclusive")
+        p50, p95 = percentiles[49], percentiles[94]
+    else:
+        p50 = p95 = durations_ms[0] if durations_ms else 0
+    return {
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "rps": len(durations_ms) / elapsed if elapsed else 0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede p50/p95 e requisições por segundo das telas de tenants e pagamentos, "
+        "chamadas pelo test client do Django contra a API local simulada. Os dados "
+        "criados para o teste são descartados ao final (rollback)."
+    )
+
+    SCENARIOS = {
+        "lista": lambda schema: (reverse("tenants:list"), {}),
+        "detalhe": lambda schema: (reverse("tenants:detail", kwargs={"schema_name": schema}), {}),
+        "pagamentos": lambda schema: (reverse("tenants:payments-list"), {}),
+        "novo-pagamento": lambda schema: (reverse("tenants:payments-create"), {}),
+        "valores-mensais": lambda schema: (reverse("tenants:monthly-prices"), {}),
+        "pagamentos-cliente": lambda schema: (reverse("tenants:payment", kwargs={"schema_name": schema}), {}),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requisições por tela.")
+        parser.add_argument("--warmup", type=int, default=5, help="Requisições descartadas antes da medição.")
+        parser.add_argument("--tenants", type=int, default=50, help="Tenants retornados pela API simulada.")
+        parser.add_argument("--payments", type=int, default=500, help="Pagamentos criados para o teste.")
+        parser.add_argument("--latency", type=float, default=0.02, help="Latência da API simulada, em segundos.")
+        parser.add_argument("--jitter", type=float, default=0, help="Latência aleatória adicional máxima, em segundos.")
+        parser.add_argument("--error-rate", type=float, default=0, help="Fração das chamadas respondidas com 503.")
+        parser.add_argument("--no-cache", action="store_true", help="Desliga o cache das leituras (SAAS_API_CACHE_TTL=0).")
+        parser.add_argument(
+            "--views",
+            nargs="+",
+            choices=sorted(self.SCENARIOS),
+            default=list(self.SCENARIOS),
+            help="Telas a medir.",
+        )
+
+    def handle(self, *args, **options):
+        stub = StubSaasApi(
+            tenants=make_tenants(options["tenants"]),
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+        ).start()
+        overrides = override_settings(
+            SAAS_API_BASE_URL=stub.base_url,
+            SAAS_API_CACHE_TTL=0 if options["no_cache"] else 60,
+            SAAS_API_DEBUG_PANEL=False,
+            ALLOWED_HOSTS=["testserver"],
+            # Cache isolado para não misturar com o cache real da aplicação.
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "bench"}},
+        )
+        try:
+            with overrides, transaction.atomic():
+                client = self._prepare(stub, options)
+                self.stdout.write(
+                    f"{'tela':<20} {'p50':>9} {'p95':>9} {'req/s':>8} {'API/req':>8} {'erros':>6}"
+                )
+                for name in options["views"]:
+                    self._run(client, stub, name, options)
+                transaction.set_rollback(True)
+        finally:
+            stub.stop()
+            close_session()
+
+    def _prepare(self, stub: StubSaasApi, options) -> Client:
+        sync_tenants()
+        schemas = [tenant["schema_name"] for tenant in stub.tenants]
+        today = date.today()
+        TenantPayment.objects.bulk_create(
+            TenantPayment(
+                schema_name=schemas[i % len(schemas)],
+                client_name=f"Cliente {i % len(schemas) + 1:04d}",
+                amount=Decimal("100.00") + i % 50,
+                payment_date=today - timedelta(days=i % 365),
+            )
+            for i in range(options["payments"])
+        )
+        user = get_user_model().objects.create_user("bench-tenant-views", password=None, is_staff=True)
+        client = Client()
+        client.force_login(user)
+        self.schemas = schemas
+        return client
+
+    def _run(self, client: Client, stub: StubSaasApi, name: str, options) -> None:
+        scenario = self.SCENARIOS[name]
+        for i in range(options["warmup"]):
+            path, kwargs = scenario(self.schemas[i % len(self.schemas)])
+            client.get(path, **kwargs)
+
+        stub.reset_counters()
+        durations = []
+        errors = 0
+        started = time.perf_counter()
+        for i in range(options["requests"]):
+            path, kwargs = scenario(self.schemas[i % len(self.schemas)])
+            request_started = time.perf_counter()
+            response = client.get(path, **kwargs)
+            durations.append(time.perf_counter() - request_started)
+            if response.status_code != 200:
+                errors += 1
+        elapsed = time.perf_counter() - started
+
+        summary = latency_summary(durations, elapsed)
+        self.stdout.write(
+            f"{name:<20} {summary['p50_ms']:>7.1f}ms {summary['p95_ms']:>7.1f}ms "
+            f"{summary['rps']:>8.1f} {stub.requests / options['requests']:>8.2f} {errors:>6}"
+        )
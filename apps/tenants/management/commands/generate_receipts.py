@@ -0,0 +1,40 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tenants.receipts import build_receipts_zip, month_payments
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera o zip com os recibos em PDF dos pagamentos de um mês. Recibos de "
+        "pagamentos não alterados desde a última geração são reaproveitados e "
+        "versões anteriores dos recibos gerados são apagadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("month", help="Mês no formato AAAA-MM.")
+        parser.add_argument("--output", help="Arquivo zip gerado (padrão: recibos-AAAA-MM.zip).")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processos usados na renderização (padrão: TENANT_RECEIPT_WORKERS ou número de CPUs).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            month = date.fromisoformat(f"{options['month']}-01")
+        except ValueError:
+            raise CommandError("Informe o mês no formato AAAA-MM.") from None
+        output = options["output"] or f"recibos-{month:%Y-%m}.zip"
+        started = time.perf_counter()
+        with open(output, "wb") as file:
+            counts = build_receipts_zip(month_payments(month), file, workers=options["workers"], prune=True)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{counts['total']} recibo(s) em {output}: {counts['rendered']} gerado(s), "
+                f"{counts['cached']} reaproveitado(s), em {time.perf_counter() - started:.2f}s."
+            )
+        )
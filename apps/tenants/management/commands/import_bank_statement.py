@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tenants.statements import LINE_STATUS_LABELS, import_statement
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa um extrato bancário (OFX ou CSV), conciliando os créditos com os tenants "
+        "e criando os pagamentos. O relatório fica disponível em Pagamentos > Importar extrato."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Arquivo OFX ou CSV.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas concilia e mostra o resumo, sem criar pagamentos.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            with open(path, "rb") as file:
+                record = import_statement(file, path.rsplit("/", 1)[-1], dry_run=options["dry_run"])
+        except OSError as exc:
+            raise CommandError(str(exc)) from exc
+        if record.error:
+            raise CommandError(record.error)
+        summary = record.summary
+        for status, label in LINE_STATUS_LABELS.items():
+            if summary.get(status):
+                self.stdout.write(f"{label}: {summary[status]}")
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(record.lines)} lançamentos processados em {record.duration:.2f}s (importação #{record.pk}).")
+        )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.tenants.jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa os provisionamentos e as atualizações em lote de tenants na fila. "
+        "Use com TENANT_JOBS_BACKEND=worker e --interval para rodar como worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Verifica a fila a cada N segundos (0 processa a fila uma única vez).",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            processed = process_pending_jobs()
+            if any(processed.values()) or not interval:
+                self.stdout.write(
+                    f"Provisionamentos processados: {processed['provisioning']}; "
+                    f"atualizações em lote: {processed['bulk_updates']}."
+                )
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.tenants.rollup import rebuild, refresh_changed
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza o consolidado mensal de pagamentos (TenantPaymentMonthly) a partir dos "
+        "pagamentos alterados desde a última execução. Use --rebuild para regenerá-lo por "
+        "completo e --interval para rodar como job periódico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Apaga e regenera todo o consolidado.",
+        )
+        parser.add_argument(
+            "--since",
+            help="Considera os pagamentos alterados a partir desta data/hora (ISO 8601).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Repete a atualização a cada N segundos (0 executa uma única vez).",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError("--since deve estar no formato ISO 8601, ex.: 2026-01-31T12:00:00.")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        if options["rebuild"]:
+            self.stdout.write(f"Consolidado regenerado: {rebuild()} totais mensais.")
+            return
+
+        interval = options["interval"]
+        while True:
+            refreshed = refresh_changed(since)
+            if refreshed or not interval:
+                self.stdout.write(f"Totais mensais recalculados: {refreshed}.")
+            if not interval:
+                break
+            since = None
+            time.sleep(interval)
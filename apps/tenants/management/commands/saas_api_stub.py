@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.tenants.stub_api import StubSaasApi, make_tenants
+
+
+class Command(BaseCommand):
+    help = (
+        "Sobe a API do SaaS simulada (apps/tenants/stub_api.py) para testes "
+        "manuais e de carga. Aponte SAAS_API_BASE_URL para o endereço exibido."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8081)
+        parser.add_argument("--tenants", type=int, default=50, help="Quantidade de tenants simulados.")
+        parser.add_argument("--latency", type=float, default=0.05, help="Latência fixa por requisição, em segundos.")
+        parser.add_argument("--jitter", type=float, default=0.02, help="Latência aleatória adicional máxima, em segundos.")
+        parser.add_argument("--error-rate", type=float, default=0, help="Fração das requisições respondidas com 503 (0 a 1).")
+        parser.add_argument("--no-validators", action="store_true", help="Não envia ETag/Last-Modified.")
+
+    def handle(self, *args, **options):
+        stub = StubSaasApi(
+            tenants=make_tenants(options["tenants"]),
+            host=options["host"],
+            port=options["port"],
+            validators=not options["no_validators"],
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+        ).start()
+        self.stdout.write(f"API simulada em {stub.base_url} ({options['tenants']} tenants). Ctrl+C para encerrar.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stub.stop()
+            self.stdout.write(f"Requisições atendidas: {stub.requests}.")
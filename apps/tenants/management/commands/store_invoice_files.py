@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.tenants.invoices import file_digest
+from apps.tenants.models import TenantPayment
+
+
+class Command(BaseCommand):
+    help = (
+        "Move as notas fiscais gravadas antes do armazenamento por conteúdo para "
+        "invoices/ab/cd/<sha256>, unificando arquivos idênticos. Os arquivos antigos "
+        "são removidos após a migração."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Mantém os arquivos antigos em disco.",
+        )
+
+    def handle(self, *args, **options):
+        payments = TenantPayment.objects.exclude(Q(invoice_file="") | Q(invoice_file__isnull=True)).only(
+            "invoice_file", "invoice_name"
+        )
+        storage = TenantPayment._meta.get_field("invoice_file").storage
+        moved = missing = 0
+        old_names = set()
+        for payment in payments.iterator(chunk_size=500):
+            old_name = payment.invoice_file.name
+            if file_digest(old_name):
+                continue
+            try:
+                with storage.open(old_name, "rb") as file:
+                    new_name = storage.save(old_name, file)
+            except FileNotFoundError:
+                missing += 1
+                self.stderr.write(f"Pagamento {payment.pk}: arquivo {old_name} não encontrado.")
+                continue
+            # update() não dispara signals nem altera updated_at: o valor do pagamento não muda.
+            TenantPayment.objects.filter(pk=payment.pk).update(
+                invoice_file=new_name,
+                invoice_name=payment.invoice_name or old_name.rsplit("/", 1)[-1],
+            )
+            old_names.add(old_name)
+            moved += 1
+
+        if not options["keep"]:
+            for old_name in old_names:
+                storage.delete(old_name)
+        unique = payments.values("invoice_file").distinct().count()
+        self.stdout.write(
+            self.style.SUCCESS(f"{moved} nota(s) migrada(s), {missing} ausente(s); {unique} arquivo(s) distinto(s) em uso.")
+        )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tenants.services import SaasApiError
+from apps.tenants.sync import sync_tenants
+
+
+class Command(BaseCommand):
+    help = (
+        "Sincroniza a tabela local de tenants com a API do SaaS. "
+        "Use --interval para manter o processo rodando como job periódico."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-prune",
+            action="store_true",
+            help="Não remove da tabela local os tenants ausentes na API.",
+        )
+        parser.add_argument(
+            "--details",
+            action="store_true",
+            help="Busca em paralelo o detalhe de cada tenant além da listagem.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Repete a sincronização a cada N segundos (0 executa uma única vez).",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        prune = not options["no_prune"]
+        while True:
+            try:
+                stats = sync_tenants(prune=prune, details=options["details"])
+            except SaasApiError as exc:
+                if not interval:
+                    raise CommandError(str(exc)) from exc
+                self.stderr.write(str(exc))
+            else:
+                self.stdout.write(
+                    "Tenants sincronizados: "
+                    f"{stats['created']} novos, {stats['updated']} atualizados, "
+                    f"{stats['unchanged']} sem alteração, {stats['deleted']} removidos."
+                )
+            if not interval:
+                break
+            time.sleep(interval)
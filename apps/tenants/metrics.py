@@ -0,0 +1,148 @@
+"""
+Métricas das chamadas à API do SaaS.
+
+Cada chamada feita pelo SaasApiClient é registrada em dois lugares:
+
+- ``registry``: histogramas de latência por método, template do caminho e
+  status, mantidos em memória pelo processo (cada worker do gunicorn tem o
+  seu). Expostos em /tenants/metricas/ no formato texto do Prometheus ou em
+  JSON;
+- a lista da requisição atual (``track_request``), usada pelo
+  SaasApiTimingMiddleware para montar o resumo por página.
+"""
+import contextvars
+import math
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+
+# Limites superiores dos buckets, em milissegundos.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf)
+
+ApiCall = namedtuple("ApiCall", ["method", "path", "status", "bytes", "duration_ms", "attempts"])
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.bytes = 0
+
+    def observe(self, duration_ms: float, size: int) -> None:
+        for index, bound in enumerate(self.buckets):
+            if duration_ms <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += duration_ms
+        self.bytes += size
+
+    def quantile(self, q: float) -> float:
+        """Estimativa do quantil pelo limite superior do bucket que o contém."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound if bound != math.inf else self.buckets[-2]
+        return self.buckets[-2]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, path: str, status, size: int, duration_ms: float) -> None:
+        key = (method, path, str(status))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(duration_ms, size)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> list:
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return [
+                {
+                    "method": method,
+                    "path": path,
+                    "status": status,
+                    "count": histogram.count,
+                    "bytes": histogram.bytes,
+                    "total_ms": round(histogram.sum, 1),
+                    "avg_ms": round(histogram.sum / histogram.count, 1),
+                    "p50_ms": histogram.quantile(0.5),
+                    "p95_ms": histogram.quantile(0.95),
+                    "p99_ms": histogram.quantile(0.99),
+                    "buckets": {
+                        ("+Inf" if bound == math.inf else str(bound)): count
+                        for bound, count in zip(histogram.buckets, histogram.counts)
+                    },
+                }
+                for (method, path, status), histogram in items
+            ]
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP saas_api_request_duration_ms Duração das chamadas à API do SaaS.",
+            "# TYPE saas_api_request_duration_ms histogram",
+        ]
+        sizes = [
+            "# HELP saas_api_response_bytes_total Bytes de corpo recebidos da API do SaaS.",
+            "# TYPE saas_api_response_bytes_total counter",
+        ]
+        with self._lock:
+            for (method, path, status), histogram in sorted(self._histograms.items()):
+                labels = f'method="{method}",path="{path}",status="{status}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else str(bound)
+                    lines.append(f'saas_api_request_duration_ms_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"saas_api_request_duration_ms_sum{{{labels}}} {histogram.sum:.3f}")
+                lines.append(f"saas_api_request_duration_ms_count{{{labels}}} {histogram.count}")
+                sizes.append(f"saas_api_response_bytes_total{{{labels}}} {histogram.bytes}")
+        return "\n".join(lines + sizes) + "\n"
+
+
+registry = MetricsRegistry()
+
+_request_calls = contextvars.ContextVar("saas_api_request_calls", default=None)
+
+
+@contextmanager
+def track_request():
+    """Coleta as chamadas à API feitas durante o bloco (ex.: uma requisição)."""
+    calls = []
+    token = _request_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _request_calls.reset(token)
+
+
+def record_call(method: str, path: str, status, size: int, duration_ms: float, attempts: int = 1) -> None:
+    registry.observe(method, path, status, size, duration_ms)
+    calls = _request_calls.get()
+    if calls is not None:
+        calls.append(ApiCall(method, path, status, size, duration_ms, attempts))
+
+
+def summarize(calls) -> dict:
+    return {
+        "count": len(calls),
+        "duration_ms": sum(call.duration_ms for call in calls),
+        "bytes": sum(call.bytes for call in calls),
+        "retries": sum(call.attempts - 1 for call in calls),
+    }
@@ -0,0 +1,91 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from .metrics import summarize, track_request
+
+
+logger = logging.getLogger(__name__)
+
+
+class SaasApiTimingMiddleware:
+    """
+    Mede quanto de cada requisição foi gasto em chamadas à API do SaaS.
+
+    O total vai no header Server-Timing (visível na aba de rede do navegador) e
+    no log. Com SAAS_API_DEBUG_PANEL (padrão: DEBUG), usuários staff também
+    veem no rodapé das páginas HTML um painel com cada chamada, no estilo da
+    debug toolbar.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.monotonic()
+        with track_request() as calls:
+            response = self.get_response(request)
+        return self.process_calls(request, response, calls, started, getattr(request, "user", None))
+
+    async def __acall__(self, request):
+        started = time.monotonic()
+        with track_request() as calls:
+            response = await self.get_response(request)
+        user = await request.auser() if calls and hasattr(request, "auser") else None
+        return self.process_calls(request, response, calls, started, user)
+
+    def process_calls(self, request, response, calls, started: float, user):
+        if not calls:
+            return response
+
+        total_ms = (time.monotonic() - started) * 1000
+        summary = summarize(calls)
+        timing = f'saas-api;dur={summary["duration_ms"]:.1f};desc="{summary["count"]} chamada(s)"'
+        if response.has_header("Server-Timing"):
+            timing = f'{response["Server-Timing"]}, {timing}'
+        response["Server-Timing"] = timing
+        logger.debug(
+            "%s %s: %d chamada(s) à API em %.0f ms de %.0f ms",
+            request.method, request.path, summary["count"], summary["duration_ms"], total_ms,
+        )
+        if self._show_panel(user, response):
+            self._inject_panel(response, calls, summary, total_ms)
+        return response
+
+    def _show_panel(self, user, response) -> bool:
+        if not getattr(settings, "SAAS_API_DEBUG_PANEL", settings.DEBUG):
+            return False
+        return (
+            user is not None
+            and user.is_staff
+            and not response.streaming
+            and "text/html" in response.get("Content-Type", "")
+        )
+
+    def _inject_panel(self, response, calls, summary: dict, total_ms: float) -> None:
+        content = response.content.decode(response.charset)
+        index = content.lower().rfind("</body>")
+        if index == -1:
+            return
+        panel = render_to_string(
+            "tenants/_saas_api_panel.html",
+            {
+                "calls": calls,
+                "summary": summary,
+                "total_ms": total_ms,
+                "share": min(100, summary["duration_ms"] * 100 / total_ms) if total_ms else 0,
+            },
+        )
+        response.content = (content[:index] + panel + content[index:]).encode(response.charset)
+        if response.has_header("Content-Length"):
+            response["Content-Length"] = str(len(response.content))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tenant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(max_length=100, unique=True, verbose_name='Schema do tenant')),
+                ('client_name', models.CharField(blank=True, max_length=255, verbose_name='Nome do cliente')),
+                ('primary_domain', models.CharField(blank=True, max_length=255, verbose_name='Domínio principal')),
+                ('on_trial', models.BooleanField(default=False, verbose_name='Em período de teste')),
+                ('paid_until', models.DateField(blank=True, null=True, verbose_name='Pago até')),
+                ('created_on', models.DateField(blank=True, null=True, verbose_name='Criado em')),
+                ('manager_licenses', models.PositiveIntegerField(blank=True, null=True, verbose_name='Licenças Manager')),
+                ('staff_licenses', models.PositiveIntegerField(blank=True, null=True, verbose_name='Licenças Staff')),
+                ('storage_gb', models.PositiveIntegerField(blank=True, null=True, verbose_name='Storage (GB)')),
+                ('storage_used_gb', models.FloatField(blank=True, null=True, verbose_name='Storage usado (GB)')),
+                ('storage_used_percent', models.FloatField(blank=True, null=True, verbose_name='Storage usado (%)')),
+                ('monthly_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor mensal')),
+                ('payload_hash', models.CharField(blank=True, max_length=64, verbose_name='Hash do payload da API')),
+                ('synced_at', models.DateTimeField(verbose_name='Sincronizado em')),
+            ],
+            options={
+                'verbose_name': 'Tenant',
+                'verbose_name_plural': 'Tenants',
+                'ordering': ['client_name', 'schema_name'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_tenant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantProvisioningJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(max_length=100, verbose_name='Schema do tenant')),
+                ('client_name', models.CharField(blank=True, max_length=255, verbose_name='Nome do cliente')),
+                ('payload', models.JSONField(default=dict, verbose_name='Payload enviado à API')),
+                ('status', models.CharField(choices=[('pending', 'Na fila'), ('running', 'Em execução'), ('succeeded', 'Concluído'), ('failed', 'Falhou')], default='pending', max_length=10, verbose_name='Status')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Resposta da API')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado em')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Provisionamento de tenant',
+                'verbose_name_plural': 'Provisionamentos de tenants',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0003_tenantprovisioningjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['client_name', 'schema_name'], name='tenants_ten_client__ab3982_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['on_trial', 'paid_until'], name='tenants_ten_on_tria_f5d7b9_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0004_tenant_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenantprovisioningjob',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True, verbose_name='Chave de idempotência'),
+        ),
+    ]
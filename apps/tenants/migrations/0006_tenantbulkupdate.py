@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0005_tenantprovisioningjob_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantBulkUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_names', models.JSONField(default=list, verbose_name='Tenants')),
+                ('patch', models.JSONField(default=dict, verbose_name='Alterações')),
+                ('status', models.CharField(choices=[('pending', 'Na fila'), ('running', 'Em execução'), ('succeeded', 'Concluído'), ('partial', 'Concluído com falhas'), ('failed', 'Falhou')], default='pending', max_length=10, verbose_name='Status')),
+                ('results', models.JSONField(blank=True, default=dict, verbose_name='Resultado por tenant')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado em')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Atualização em lote de tenants',
+                'verbose_name_plural': 'Atualizações em lote de tenants',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0006_tenantbulkupdate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tenantpayment',
+            index=models.Index(fields=['schema_name', '-payment_date', '-created_at'], name='tenants_ten_schema__269c9f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenantpayment',
+            index=models.Index(fields=['-payment_date', '-created_at'], name='tenants_ten_payment_324bfb_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:40
+
+from django.db import migrations, models
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_rollup(apps, schema_editor):
+    """Preenche o consolidado com os pagamentos já existentes."""
+    TenantPayment = apps.get_model('tenants', 'TenantPayment')
+    TenantPaymentMonthly = apps.get_model('tenants', 'TenantPaymentMonthly')
+    rows = (
+        TenantPayment.objects.annotate(month=TruncMonth('payment_date', output_field=DateField()))
+        .values('schema_name', 'month', 'currency', 'status')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    TenantPaymentMonthly.objects.bulk_create(
+        (TenantPaymentMonthly(**row) for row in rows.iterator(chunk_size=5000)),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0007_tenantpayment_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantPaymentMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(max_length=100, verbose_name='Schema do tenant')),
+                ('month', models.DateField(verbose_name='Mês')),
+                ('currency', models.CharField(max_length=10, verbose_name='Moeda')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('paid', 'Pago'), ('failed', 'Falhou'), ('refunded', 'Estornado')], max_length=10, verbose_name='Status')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Total')),
+                ('count', models.PositiveIntegerField(verbose_name='Pagamentos')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Total mensal de pagamentos',
+                'verbose_name_plural': 'Totais mensais de pagamentos',
+                'ordering': ['-month', 'schema_name'],
+                'indexes': [models.Index(fields=['month', 'currency', 'status'], name='tenants_ten_month_9fad3a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('schema_name', 'month', 'currency', 'status'), name='tenant_payment_monthly_unique')],
+            },
+        ),
+        migrations.RunPython(build_rollup, migrations.RunPython.noop),
+    ]
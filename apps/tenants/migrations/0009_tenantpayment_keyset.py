@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0008_tenantpaymentmonthly'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tenantpayment',
+            options={'ordering': ['-payment_date', '-created_at', '-id'], 'verbose_name': 'Pagamento de tenant', 'verbose_name_plural': 'Pagamentos de tenants'},
+        ),
+        migrations.RemoveIndex(
+            model_name='tenantpayment',
+            name='tenants_ten_schema__269c9f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tenantpayment',
+            name='tenants_ten_payment_324bfb_idx',
+        ),
+        migrations.AddIndex(
+            model_name='tenantpayment',
+            index=models.Index(fields=['schema_name', '-payment_date', '-created_at', '-id'], name='tenants_ten_schema__cf3327_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tenantpayment',
+            index=models.Index(fields=['-payment_date', '-created_at', '-id'], name='tenants_ten_payment_0b90d8_idx'),
+        ),
+    ]
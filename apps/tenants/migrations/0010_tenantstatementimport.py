@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0009_tenantpayment_keyset'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantStatementImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Arquivo')),
+                ('file_format', models.CharField(choices=[('ofx', 'OFX'), ('csv', 'CSV')], max_length=3, verbose_name='Formato')),
+                ('dry_run', models.BooleanField(default=False, verbose_name='Apenas conferência')),
+                ('lines', models.JSONField(blank=True, default=list, verbose_name='Lançamentos')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('duration', models.FloatField(blank=True, null=True, verbose_name='Duração (s)')),
+            ],
+            options={
+                'verbose_name': 'Importação de extrato',
+                'verbose_name_plural': 'Importações de extrato',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='tenantpayment',
+            name='bank_transaction_id',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='ID da transação bancária'),
+        ),
+        migrations.AddConstraint(
+            model_name='tenantpayment',
+            constraint=models.UniqueConstraint(condition=models.Q(('bank_transaction_id', ''), _negated=True), fields=('bank_transaction_id',), name='tenant_payment_bank_transaction_unique'),
+        ),
+        migrations.AddField(
+            model_name='tenantstatementimport',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Importado por'),
+        ),
+    ]
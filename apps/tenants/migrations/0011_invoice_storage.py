@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:13
+
+import apps.tenants.invoices
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0010_tenantstatementimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenantpayment',
+            name='invoice_name',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Nome do anexo'),
+        ),
+        migrations.AlterField(
+            model_name='tenantpayment',
+            name='invoice_file',
+            field=models.FileField(blank=True, null=True, storage=apps.tenants.invoices.ContentAddressedStorage(), upload_to='invoices/', verbose_name='Nota fiscal (anexo)'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0011_invoice_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenantbulkupdate',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='Execuções'),
+        ),
+        migrations.AddField(
+            model_name='tenantbulkupdate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Atualizado em'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+from apps.core.crypto import encrypt_secret
+
+
+def encrypt_queued_passwords(apps, schema_editor):
+    """Tira a senha em texto puro do payload dos jobs ainda não executados."""
+    TenantProvisioningJob = apps.get_model('tenants', 'TenantProvisioningJob')
+    for job in TenantProvisioningJob.objects.filter(payload__has_key='password'):
+        password = job.payload.pop('password') or ''
+        job.encrypted_password = encrypt_secret(password) if password and not job.finished_at else ''
+        job.save(update_fields=['payload', 'encrypted_password'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0012_tenantbulkupdate_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenantprovisioningjob',
+            name='encrypted_password',
+            field=models.TextField(blank=True, editable=False, verbose_name='Senha (criptografada)'),
+        ),
+        migrations.RunPython(encrypt_queued_passwords, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0013_tenantprovisioningjob_encrypted_password'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantPaymentRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('refreshed_until', models.DateTimeField(verbose_name='Pagamentos consolidados até')),
+            ],
+            options={
+                'verbose_name': 'Estado do consolidado mensal',
+                'verbose_name_plural': 'Estado do consolidado mensal',
+            },
+        ),
+    ]
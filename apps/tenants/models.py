@@ -1,4 +1,61 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from apps.core.crypto import decrypt_secret, encrypt_secret
+
+from .invoices import file_digest, invoice_storage
+
+
+class Tenant(models.Model):
+    """Cópia local dos tenants da API do SaaS, mantida por sync_tenants."""
+
+    schema_name = models.CharField("Schema do tenant", max_length=100, unique=True)
+    client_name = models.CharField("Nome do cliente", max_length=255, blank=True)
+    primary_domain = models.CharField("Domínio principal", max_length=255, blank=True)
+    on_trial = models.BooleanField("Em período de teste", default=False)
+    paid_until = models.DateField("Pago até", null=True, blank=True)
+    created_on = models.DateField("Criado em", null=True, blank=True)
+    manager_licenses = models.PositiveIntegerField("Licenças Manager", null=True, blank=True)
+    staff_licenses = models.PositiveIntegerField("Licenças Staff", null=True, blank=True)
+    storage_gb = models.PositiveIntegerField("Storage (GB)", null=True, blank=True)
+    storage_used_gb = models.FloatField("Storage usado (GB)", null=True, blank=True)
+    storage_used_percent = models.FloatField("Storage usado (%)", null=True, blank=True)
+    monthly_price = models.DecimalField("Valor mensal", max_digits=10, decimal_places=2, null=True, blank=True)
+    payload_hash = models.CharField("Hash do payload da API", max_length=64, blank=True)
+    synced_at = models.DateTimeField("Sincronizado em")
+
+    class Meta:
+        verbose_name = "Tenant"
+        verbose_name_plural = "Tenants"
+        ordering = ["client_name", "schema_name"]
+        indexes = [
+            models.Index(fields=["client_name", "schema_name"]),
+            models.Index(fields=["on_trial", "paid_until"]),
+        ]
+
+    def __str__(self):
+        return f"{self.client_name} ({self.schema_name})"
+
+    def as_api_dict(self):
+        """Representação no formato retornado pela API do SaaS."""
+        return {
+            "schema_name": self.schema_name,
+            "client_name": self.client_name,
+            "primary_domain": self.primary_domain,
+            "on_trial": self.on_trial,
+            "paid_until": self.paid_until.isoformat() if self.paid_until else None,
+            "created_on": self.created_on.isoformat() if self.created_on else None,
+            "manager_licenses": self.manager_licenses,
+            "staff_licenses": self.staff_licenses,
+            "storage_gb": self.storage_gb,
+            "storage_used_gb": self.storage_used_gb,
+            "storage_used_percent": self.storage_used_percent,
+            "monthly_price": float(self.monthly_price) if self.monthly_price is not None else None,
+        }
 
 
 class TenantPayment(models.Model):
@@ -25,17 +82,291 @@ class TenantPayment(models.Model):
     invoice_file = models.FileField(
         "Nota fiscal (anexo)",
         upload_to="invoices/",
+        storage=invoice_storage,
         blank=True,
         null=True,
     )
+    invoice_name = models.CharField("Nome do anexo", max_length=255, blank=True, editable=False)
+    # Identificador da transação no extrato bancário (FITID do OFX), usado para
+    # não importar o mesmo lançamento duas vezes (ver statements.py).
+    bank_transaction_id = models.CharField("ID da transação bancária", max_length=255, blank=True, editable=False)
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     updated_at = models.DateTimeField("Atualizado em", auto_now=True)
 
     class Meta:
         verbose_name = "Pagamento de tenant"
         verbose_name_plural = "Pagamentos de tenants"
-        ordering = ["-payment_date", "-created_at"]
+        # O id desempata pagamentos criados no mesmo instante e completa a
+        # chave da paginação por cursor (pagination.py).
+        ordering = ["-payment_date", "-created_at", "-id"]
+        # Acompanham a ordenação padrão: pagamentos de um tenant (detalhe e
+        # filtro por schema, com ou sem período) e a listagem geral por período.
+        indexes = [
+            models.Index(fields=["schema_name", "-payment_date", "-created_at", "-id"]),
+            models.Index(fields=["-payment_date", "-created_at", "-id"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bank_transaction_id"],
+                condition=~models.Q(bank_transaction_id=""),
+                name="tenant_payment_bank_transaction_unique",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.schema_name} - {self.amount} {self.currency} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        # O storage grava o anexo com o hash como nome: guarda o nome enviado.
+        if self.invoice_file and not self.invoice_file._committed:
+            self.invoice_name = os.path.basename(self.invoice_file.name)[:255]
+        super().save(*args, **kwargs)
+
+    @property
+    def invoice_sha256(self) -> str:
+        return file_digest(self.invoice_file.name) if self.invoice_file else ""
+
+
+class TenantPaymentMonthly(models.Model):
+    """
+    Totais de TenantPayment por tenant, mês, moeda e status, mantidos por
+    rollup.py (signals e comando rollup_tenant_payments). Consultas agregadas
+    leem daqui em vez de varrer todos os pagamentos.
+    """
+
+    schema_name = models.CharField("Schema do tenant", max_length=100)
+    month = models.DateField("Mês")
+    currency = models.CharField("Moeda", max_length=10)
+    status = models.CharField("Status", max_length=10, choices=TenantPayment.STATUS_CHOICES)
+    total = models.DecimalField("Total", max_digits=14, decimal_places=2)
+    count = models.PositiveIntegerField("Pagamentos")
+    refreshed_at = models.DateTimeField("Atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "Total mensal de pagamentos"
+        verbose_name_plural = "Totais mensais de pagamentos"
+        ordering = ["-month", "schema_name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schema_name", "month", "currency", "status"],
+                name="tenant_payment_monthly_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["month", "currency", "status"]),
+        ]
+
+    def __str__(self):
+        return f"{self.schema_name} {self.month:%Y-%m}: {self.total} {self.currency} ({self.status})"
+
+
+class TenantPaymentRollupState(models.Model):
+    """
+    Linha única com o ponto de partida do modo incremental do consolidado
+    (rollup.refresh_changed). Só o comando avança esta marca: as
+    atualizações feitas pelos signals não a alteram.
+    """
+
+    refreshed_until = models.DateTimeField("Pagamentos consolidados até")
+
+    class Meta:
+        verbose_name = "Estado do consolidado mensal"
+        verbose_name_plural = "Estado do consolidado mensal"
+
+    def __str__(self):
+        return f"Consolidado até {self.refreshed_until:%d/%m/%Y %H:%M}"
+
+
+class TenantProvisioningJob(models.Model):
+    """
+    Criação de tenant na API executada em segundo plano (ver jobs.py).
+
+    A senha do super usuário não faz parte de ``payload``: fica criptografada
+    em ``encrypted_password`` (apps.core.crypto) apenas até a execução do job.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Na fila"),
+        (STATUS_RUNNING, "Em execução"),
+        (STATUS_SUCCEEDED, "Concluído"),
+        (STATUS_FAILED, "Falhou"),
+    ]
+
+    schema_name = models.CharField("Schema do tenant", max_length=100)
+    client_name = models.CharField("Nome do cliente", max_length=255, blank=True)
+    payload = models.JSONField("Payload enviado à API", default=dict)
+    encrypted_password = models.TextField("Senha (criptografada)", blank=True, editable=False)
+    # Enviada como Idempotency-Key na criação e usada para ignorar reenvios do
+    # mesmo formulário.
+    idempotency_key = models.CharField(
+        "Chave de idempotência",
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    error = models.TextField("Erro", blank=True)
+    result = models.JSONField("Resposta da API", null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Solicitado por",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    started_at = models.DateTimeField("Iniciado em", null=True, blank=True)
+    finished_at = models.DateTimeField("Finalizado em", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Provisionamento de tenant"
+        verbose_name_plural = "Provisionamentos de tenants"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.schema_name} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    def set_password(self, password: str) -> None:
+        self.encrypted_password = encrypt_secret(password) if password else ""
+
+    def get_password(self) -> str:
+        return decrypt_secret(self.encrypted_password) if self.encrypted_password else ""
+
+    @property
+    def duration(self):
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+
+class TenantBulkUpdate(models.Model):
+    """
+    Alteração aplicada a vários tenants de uma vez (ver jobs.run_bulk_update).
+
+    ``results`` guarda o resultado por schema_name, gravado à medida que cada
+    tenant termina; ao retomar uma execução parcial (ou interrompida), apenas
+    os tenants sem sucesso registrado são enviados de novo. ``attempts`` conta
+    as execuções e compõe o Idempotency-Key, novo a cada retomada.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_PARTIAL = "partial"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Na fila"),
+        (STATUS_RUNNING, "Em execução"),
+        (STATUS_SUCCEEDED, "Concluído"),
+        (STATUS_PARTIAL, "Concluído com falhas"),
+        (STATUS_FAILED, "Falhou"),
+    ]
+
+    schema_names = models.JSONField("Tenants", default=list)
+    patch = models.JSONField("Alterações", default=dict)
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    results = models.JSONField("Resultado por tenant", default=dict, blank=True)
+    attempts = models.PositiveIntegerField("Execuções", default=0)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Solicitado por",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    started_at = models.DateTimeField("Iniciado em", null=True, blank=True)
+    finished_at = models.DateTimeField("Finalizado em", null=True, blank=True)
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "Atualização em lote de tenants"
+        verbose_name_plural = "Atualizações em lote de tenants"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{len(self.schema_names)} tenants ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_PARTIAL, self.STATUS_FAILED)
+
+    @property
+    def is_stale(self):
+        """Em execução, mas sem progresso há TENANT_JOBS_STALE_AFTER segundos."""
+        stale_after = timedelta(seconds=getattr(settings, "TENANT_JOBS_STALE_AFTER", 900))
+        return self.status == self.STATUS_RUNNING and self.updated_at < timezone.now() - stale_after
+
+    @property
+    def pending_schema_names(self):
+        """Tenants ainda sem atualização bem-sucedida, na ordem original."""
+        return [name for name in self.schema_names if not self.results.get(name, {}).get("ok")]
+
+    @property
+    def succeeded_count(self):
+        return len(self.schema_names) - len(self.pending_schema_names)
+
+    @property
+    def failed_count(self):
+        return sum(1 for result in self.results.values() if not result.get("ok"))
+
+    @property
+    def duration(self):
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+
+class TenantStatementImport(models.Model):
+    """
+    Importação de um extrato bancário (OFX/CSV) com a conciliação de cada
+    lançamento (ver statements.py). ``lines`` guarda o relatório por linha.
+    """
+
+    FORMAT_CHOICES = [
+        ("ofx", "OFX"),
+        ("csv", "CSV"),
+    ]
+
+    file_name = models.CharField("Arquivo", max_length=255)
+    file_format = models.CharField("Formato", max_length=3, choices=FORMAT_CHOICES)
+    dry_run = models.BooleanField("Apenas conferência", default=False)
+    lines = models.JSONField("Lançamentos", default=list, blank=True)
+    error = models.TextField("Erro", blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Importado por",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    duration = models.FloatField("Duração (s)", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Importação de extrato"
+        verbose_name_plural = "Importações de extrato"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.created_at:%d/%m/%Y %H:%M})"
+
+    @property
+    def summary(self) -> dict:
+        """Quantidade de lançamentos por status da conciliação."""
+        summary = {}
+        for line in self.lines:
+            summary[line["status"]] = summary.get(line["status"], 0) + 1
+        return summary
@@ -0,0 +1,98 @@
+"""
+Paginação por cursor (keyset) de TenantPayment na ordem
+(-payment_date, -created_at, -id).
+
+Em vez de OFFSET, cada página começa logo após a última linha da anterior
+(``WHERE (payment_date, created_at, id) < cursor``), percorrendo o índice a
+partir desse ponto: a página N custa o mesmo que a primeira. Os cursores são
+assinados (django.core.signing), então não podem ser alterados pelo cliente.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+CURSOR_SALT = "tenants.payments.cursor"
+
+ORDERING = ("-payment_date", "-created_at", "-id")
+
+AFTER = "a"
+BEFORE = "b"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    next_cursor: str = None
+    previous_cursor: str = None
+
+    @property
+    def has_other_pages(self) -> bool:
+        return bool(self.next_cursor or self.previous_cursor)
+
+
+def encode_cursor(payment, direction: str) -> str:
+    key = [payment.payment_date.isoformat(), payment.created_at.isoformat(), payment.pk]
+    return signing.dumps({"d": direction, "k": key}, salt=CURSOR_SALT)
+
+
+def decode_cursor(cursor: str):
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        payment_date, created_at, pk = data["k"]
+        key = (date.fromisoformat(payment_date), parse_datetime(created_at), int(pk))
+        direction = data["d"]
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor("Cursor de paginação inválido.") from exc
+    if direction not in (AFTER, BEFORE) or key[1] is None:
+        raise InvalidCursor("Cursor de paginação inválido.")
+    return direction, key
+
+
+def keyset_filter(key, lookup: str) -> Q:
+    """(payment_date, created_at, id) <lookup> key, expandido em Q (lt/gt)."""
+    payment_date, created_at, pk = key
+    # O limite redundante em payment_date deixa o banco posicionar o índice
+    # direto no cursor; só o OR faria percorrer o índice desde o início.
+    return Q(**{f"payment_date__{lookup}e": payment_date}) & (
+        Q(**{f"payment_date__{lookup}": payment_date})
+        | Q(payment_date=payment_date, **{f"created_at__{lookup}": created_at})
+        | Q(payment_date=payment_date, created_at=created_at, **{f"id__{lookup}": pk})
+    )
+
+
+def keyset_paginate(queryset, cursor: str = None, per_page: int = 50) -> KeysetPage:
+    """
+    Uma página de ``queryset`` (já filtrado) a partir de ``cursor``. Levanta
+    InvalidCursor se o cursor não for válido.
+    """
+    direction, key = decode_cursor(cursor) if cursor else (AFTER, None)
+    if direction == AFTER:
+        if key:
+            queryset = queryset.filter(keyset_filter(key, "lt"))
+        rows = list(queryset.order_by(*ORDERING)[: per_page + 1])
+        has_more = len(rows) > per_page
+        items = rows[:per_page]
+        page = KeysetPage(items)
+        if items:
+            page.next_cursor = encode_cursor(items[-1], AFTER) if has_more else None
+            page.previous_cursor = encode_cursor(items[0], BEFORE) if key else None
+        return page
+
+    # Página anterior: percorre o índice no sentido inverso e desfaz a inversão.
+    reverse_ordering = [name.lstrip("-") for name in ORDERING]
+    rows = list(queryset.filter(keyset_filter(key, "gt")).order_by(*reverse_ordering)[: per_page + 1])
+    has_more = len(rows) > per_page
+    items = rows[:per_page][::-1]
+    page = KeysetPage(items)
+    if items:
+        page.next_cursor = encode_cursor(items[-1], AFTER)
+        page.previous_cursor = encode_cursor(items[0], BEFORE) if has_more else None
+    return page
@@ -0,0 +1,221 @@
+"""
+Recibos em PDF dos pagamentos de um mês, empacotados em um arquivo zip.
+
+Cada recibo usa o cabeçalho e rodapé institucionais (apps.core.pdf) e é
+guardado em disco (TENANT_RECEIPT_DIR) com um nome que inclui o
+``updated_at`` do pagamento e a identidade visual (ConfiguracaoSite): numa
+nova geração, só os pagamentos alterados desde a anterior são renderizados.
+
+A renderização roda em um pool de processos (TENANT_RECEIPT_WORKERS) quando
+há recibos suficientes para compensar o custo de iniciar os processos; na
+view, que roda dentro de um worker web, o pool é limitado a
+TENANT_RECEIPT_VIEW_WORKERS processos (padrão: 1, no próprio processo).
+"""
+import hashlib
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from apps.configuracao.models_configuracao import ConfiguracaoSite
+from apps.core.pdf import add_header_and_footer
+
+from .models import TenantPayment
+
+
+# Abaixo disso, renderizar no próprio processo é mais rápido que iniciar o pool.
+POOL_MIN_RECEIPTS = 40
+
+# Criados uma vez por processo: getSampleStyleSheet é caro para cada recibo.
+_STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    "ReceiptTitle",
+    parent=_STYLES["Heading1"],
+    fontSize=16,
+    spaceAfter=20,
+    alignment=1,
+    textColor=colors.darkblue,
+)
+BODY_STYLE = ParagraphStyle("ReceiptBody", parent=_STYLES["Normal"], fontSize=11, leading=16)
+
+RECEIPT_FIELDS = (
+    "pk",
+    "schema_name",
+    "client_name",
+    "amount",
+    "currency",
+    "payment_date",
+    "reference",
+    "notes",
+    "updated_at",
+)
+
+
+def receipt_storage() -> FileSystemStorage:
+    return FileSystemStorage(location=getattr(settings, "TENANT_RECEIPT_DIR", settings.BASE_DIR / "var" / "receipts"))
+
+
+def _workers() -> int:
+    return getattr(settings, "TENANT_RECEIPT_WORKERS", None) or os.cpu_count() or 1
+
+
+def branding_version(configuracao) -> str:
+    """Muda quando a identidade visual usada nos recibos muda."""
+    parts = [
+        configuracao.nome_prefeitura,
+        configuracao.footer_text1,
+        configuracao.footer_text2,
+        configuracao.logo_principal.name if configuracao.logo_principal else "",
+    ]
+    return hashlib.sha1("|".join(part or "" for part in parts).encode("utf-8")).hexdigest()[:8]
+
+
+def receipt_name(receipt: dict, branding: str) -> str:
+    version = f"{receipt['updated_at'].timestamp():.6f}".replace(".", "")
+    return f"{receipt['pk']}/{version}-{branding}.pdf"
+
+
+def format_amount(amount, currency: str) -> str:
+    text = f"{amount:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    return f"R$ {text}" if currency == "BRL" else f"{text} {currency}"
+
+
+def render_receipt(receipt: dict, configuracao=None) -> bytes:
+    buffer = BytesIO()
+    nome_sistema = (configuracao.nome_prefeitura if configuracao else None) or "Sistema de Gestão de Assinaturas"
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=2 * cm,
+        leftMargin=2 * cm,
+        topMargin=4 * cm,
+        bottomMargin=3 * cm,
+        title=f"Recibo nº {receipt['pk']:06d} - {nome_sistema}",
+        author=nome_sistema,
+    )
+    client = receipt["client_name"] or receipt["schema_name"]
+    amount = format_amount(receipt["amount"], receipt["currency"])
+    payment_date = receipt["payment_date"].strftime("%d/%m/%Y")
+
+    rows = [
+        ["Recibo nº", f"{receipt['pk']:06d}"],
+        ["Cliente", client],
+        ["Identificador", receipt["schema_name"]],
+        ["Data do pagamento", payment_date],
+        ["Valor", amount],
+    ]
+    if receipt["reference"]:
+        rows.append(["Referência", receipt["reference"]])
+    table = Table(rows, colWidths=[5 * cm, 12 * cm])
+    table.setStyle(
+        TableStyle(
+            [
+                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 10),
+                ("TEXTCOLOR", (0, 0), (0, -1), colors.darkblue),
+                ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ]
+        )
+    )
+
+    story = [
+        Paragraph("RECIBO DE PAGAMENTO", TITLE_STYLE),
+        Paragraph(
+            f"Recebemos de <b>{escape(client)}</b> a importância de <b>{amount}</b>, "
+            f"referente à assinatura do sistema, paga em {payment_date}.",
+            BODY_STYLE,
+        ),
+        Spacer(1, 0.6 * cm),
+        table,
+    ]
+    if receipt["notes"]:
+        # Paragraph interpreta marcação: os textos do pagamento são escapados.
+        story += [Spacer(1, 0.6 * cm), Paragraph(f"Observações: {escape(receipt['notes'])}", BODY_STYLE)]
+
+    on_page = partial(add_header_and_footer, configuracao=configuracao)
+    doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+    return buffer.getvalue()
+
+
+def _render_many(receipts: list, configuracao) -> list:
+    return [render_receipt(receipt, configuracao) for receipt in receipts]
+
+
+def render_receipts(receipts: list, configuracao, workers: int = None):
+    """PDFs de ``receipts``, na mesma ordem, em paralelo quando compensa."""
+    workers = min(workers or _workers(), max(len(receipts) // POOL_MIN_RECEIPTS, 1))
+    if workers <= 1:
+        for receipt in receipts:
+            yield render_receipt(receipt, configuracao)
+        return
+    # Lotes de vários recibos: a configuração é enviada uma vez por lote.
+    size = -(-len(receipts) // (workers * 4))
+    batches = [receipts[start : start + size] for start in range(0, len(receipts), size)]
+    # django.setup: necessário se o pool iniciar processos com "spawn".
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        for batch in executor.map(_render_many, batches, [configuracao] * len(batches)):
+            yield from batch
+
+
+def month_payments(month: date):
+    next_month = (month + timedelta(days=32)).replace(day=1)
+    return TenantPayment.objects.filter(
+        status=TenantPayment.STATUS_PAID,
+        payment_date__gte=month,
+        payment_date__lt=next_month,
+    ).order_by("payment_date", "schema_name", "pk")
+
+
+def build_receipts_zip(payments, file, workers: int = None, prune: bool = False) -> dict:
+    """
+    Grava em ``file`` um zip com o recibo de cada pagamento de ``payments``,
+    renderizando apenas os que não estão no disco. Retorna as contagens
+    ``{"total", "rendered", "cached"}``.
+
+    Com ``prune``, as versões anteriores dos recibos gerados são apagadas
+    depois que o zip está completo. Outra geração simultânea do mesmo mês pode
+    ainda estar lendo essas versões, por isso a view não as apaga: a limpeza
+    fica com o comando generate_receipts.
+    """
+    configuracao, _ = ConfiguracaoSite.objects.get_or_create(pk=1)
+    branding = branding_version(configuracao)
+    storage = receipt_storage()
+    receipts = list(payments.values(*RECEIPT_FIELDS))
+    missing = [receipt for receipt in receipts if not storage.exists(receipt_name(receipt, branding))]
+
+    for receipt, pdf in zip(missing, render_receipts(missing, configuracao, workers)):
+        storage.save(receipt_name(receipt, branding), ContentFile(pdf))
+
+    # PDFs já são comprimidos: ZIP_STORED evita recomprimir.
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_STORED) as archive:
+        for receipt in receipts:
+            archive.write(
+                storage.path(receipt_name(receipt, branding)),
+                f"recibo-{receipt['pk']:06d}-{receipt['schema_name']}.pdf",
+            )
+    if prune:
+        for receipt in missing:
+            _prune_old_versions(storage, receipt, receipt_name(receipt, branding))
+    return {"total": len(receipts), "rendered": len(missing), "cached": len(receipts) - len(missing)}
+
+
+def _prune_old_versions(storage, receipt: dict, current: str) -> None:
+    # Versões anteriores do recibo deste pagamento não serão mais usadas.
+    directory = str(receipt["pk"])
+    for name in storage.listdir(directory)[1]:
+        if f"{directory}/{name}" != current:
+            storage.delete(f"{directory}/{name}")
@@ -0,0 +1,139 @@
+"""
+Manutenção de TenantPaymentMonthly, o consolidado mensal de TenantPayment.
+
+Cada linha do consolidado ("bucket") cobre um tenant, mês, moeda e status.
+Quando um pagamento muda, apenas os buckets afetados são recalculados a
+partir dos pagamentos daquele tenant no mês, o que é barato com o índice
+(schema_name, -payment_date, -created_at):
+
+- signals.py recalcula os buckets a cada save/delete de um pagamento;
+- ``refresh_changed`` cobre gravações que não disparam signals
+  (bulk_create, importações) a partir de ``updated_at``; é o modo padrão
+  do comando rollup_tenant_payments. O ponto de partida fica em
+  TenantPaymentRollupState, avançado apenas por esta função e por
+  ``rebuild``;
+- ``rebuild`` regenera todo o consolidado (rollup_tenant_payments --rebuild).
+
+Nos três casos, o cache dos indicadores dos meses afetados (analytics.py) é
+descartado.
+
+QuerySet.update() não atualiza ``updated_at``: após atualizações em massa
+de pagamentos, rode o comando com --rebuild.
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .analytics import invalidate_month
+from .models import TenantPayment, TenantPaymentMonthly, TenantPaymentRollupState
+
+
+Bucket = namedtuple("Bucket", "schema_name month currency status")
+
+# Folga aplicada ao ponto de partida do modo incremental, para cobrir
+# transações que gravaram pagamentos pouco antes da última atualização.
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def _month(value):
+    return TenantPayment._meta.get_field("payment_date").to_python(value).replace(day=1)
+
+
+def payment_bucket(payment) -> Bucket:
+    return Bucket(payment.schema_name, _month(payment.payment_date), payment.currency, payment.status)
+
+
+def refresh_buckets(buckets, batch_size: int = 500) -> int:
+    """
+    Recalcula os buckets informados; retorna quantos foram atualizados.
+
+    Os buckets são agrupados por mês: para cada lote de até ``batch_size``
+    tenants, os totais do mês vêm de uma única agregação e as linhas do
+    consolidado desses tenants no mês são regravadas de uma vez.
+    """
+    buckets = set(buckets)
+    by_month = defaultdict(set)
+    for bucket in buckets:
+        by_month[bucket.month].add(bucket.schema_name)
+    with transaction.atomic():
+        for month, schema_names in by_month.items():
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            schema_names = sorted(schema_names)
+            for start in range(0, len(schema_names), batch_size):
+                chunk = schema_names[start : start + batch_size]
+                payments = TenantPayment.objects.filter(
+                    schema_name__in=chunk,
+                    payment_date__gte=month,
+                    payment_date__lt=next_month,
+                )
+                TenantPaymentMonthly.objects.filter(month=month, schema_name__in=chunk).delete()
+                TenantPaymentMonthly.objects.bulk_create(TenantPaymentMonthly(**row) for row in _grouped(payments))
+    return len(buckets)
+
+
+def _grouped(payments):
+    return (
+        payments.annotate(month=TruncMonth("payment_date", output_field=DateField()))
+        .values("schema_name", "month", "currency", "status")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+
+
+def refresh_changed(since=None) -> int:
+    """
+    Recalcula os buckets dos pagamentos alterados desde ``since`` (por padrão,
+    a execução anterior deste modo incremental, com folga de REFRESH_OVERLAP).
+    Sem execução anterior registrada, regenera todo o consolidado.
+    """
+    started = timezone.now()
+    state = TenantPaymentRollupState.objects.filter(pk=1).first()
+    if state is None:
+        return rebuild()
+    if since is None:
+        since = state.refreshed_until - REFRESH_OVERLAP
+    changed = (
+        TenantPayment.objects.filter(updated_at__gte=since)
+        .annotate(month=TruncMonth("payment_date", output_field=DateField()))
+        .values_list("schema_name", "month", "currency", "status")
+        .distinct()
+        .order_by()
+    )
+    buckets = [Bucket(*row) for row in changed]
+    refreshed = refresh_buckets(buckets)
+    for month in {bucket.month for bucket in buckets}:
+        invalidate_month(month)
+    # Um ``since`` posterior à marca deixaria de fora o intervalo entre elas.
+    if since <= state.refreshed_until:
+        _set_refreshed_until(started)
+    return refreshed
+
+
+def _set_refreshed_until(value) -> None:
+    TenantPaymentRollupState.objects.update_or_create(pk=1, defaults={"refreshed_until": value})
+
+
+def rebuild(batch_size: int = 5000) -> int:
+    """Regenera todo o consolidado com uma única agregação; retorna o número de buckets."""
+    started = timezone.now()
+    created = 0
+    # Meses cujos indicadores podem mudar: os do consolidado antigo e os do novo.
+    months = set(TenantPaymentMonthly.objects.values_list("month", flat=True).distinct())
+    with transaction.atomic():
+        TenantPaymentMonthly.objects.all().delete()
+        batch = []
+        for row in _grouped(TenantPayment.objects.all()).iterator(chunk_size=batch_size):
+            batch.append(TenantPaymentMonthly(**row))
+            if len(batch) >= batch_size:
+                created += len(TenantPaymentMonthly.objects.bulk_create(batch))
+                batch = []
+        created += len(TenantPaymentMonthly.objects.bulk_create(batch))
+        _set_refreshed_until(started)
+    months.update(TenantPaymentMonthly.objects.values_list("month", flat=True).distinct())
+    for month in months:
+        invalidate_month(month)
+    return created
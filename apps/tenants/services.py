@@ -1,12 +1,128 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .breaker import CircuitBreaker
+from .models import Tenant
+
+
+logger = logging.getLogger(__name__)
+
+TENANT_LIST_CACHE_KEY = "saas_api:tenants"
+
+# Métodos que podem ser repetidos sem efeito colateral. POST e PATCH só são
+# repetidos quando acompanhados de um Idempotency-Key.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Respostas consideradas falhas transitórias.
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Resultado de retrieve_many: ``data`` é preenchido em caso de sucesso e
+# ``error`` guarda a SaasApiError da busca que falhou.
+TenantResult = namedtuple("TenantResult", ["schema_name", "data", "error"])
 
 
 class SaasApiError(Exception):
     pass
 
 
+class SaasApiUnavailable(SaasApiError):
+    """O circuit breaker está aberto: a chamada nem chegou a ser feita."""
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    # A API é autenticada por header; bloquear cookies evita que threads
+    # diferentes alterem o cookie jar compartilhado.
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(
+        pool_connections=getattr(settings, "SAAS_API_POOL_CONNECTIONS", 4),
+        pool_maxsize=getattr(settings, "SAAS_API_POOL_MAXSIZE", 10),
+        pool_block=getattr(settings, "SAAS_API_POOL_BLOCK", False),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Retorna a sessão HTTP compartilhada pelo processo.
+
+    A sessão mantém um pool de conexões keep-alive por host, reaproveitado por
+    todas as instâncias de SaasApiClient e por todas as threads do worker.
+    É criada sob demanda, portanto cada worker do gunicorn (após o fork)
+    possui o seu próprio pool.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def close_session() -> None:
+    """Fecha as conexões do pool; a próxima chamada cria uma nova sessão."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+_transfer = {"received": 0, "saved": 0, "not_modified": 0}
+_transfer_lock = threading.Lock()
+
+
+def _count_transfer(received: int = 0, saved: int = 0, not_modified: int = 0) -> None:
+    with _transfer_lock:
+        _transfer["received"] += received
+        _transfer["saved"] += saved
+        _transfer["not_modified"] += not_modified
+
+
+def transfer_stats(reset: bool = False) -> dict:
+    """
+    Bytes de corpo recebidos da API, bytes economizados por respostas 304
+    (tamanho do payload em cache) e quantidade de respostas 304.
+    """
+    with _transfer_lock:
+        stats = dict(_transfer)
+        if reset:
+            for key in _transfer:
+                _transfer[key] = 0
+    return stats
+
+
+def tenant_cache_key(schema_name: str) -> str:
+    return f"saas_api:tenant:{schema_name}"
+
+
+def invalidate_tenant_cache(schema_name: str = None) -> None:
+    """Remove do cache a lista de tenants e, se informado, o detalhe do tenant."""
+    keys = [TENANT_LIST_CACHE_KEY]
+    if schema_name:
+        keys.append(tenant_cache_key(schema_name))
+    cache.delete_many(keys)
+
+
 class SaasApiClient:
     DEFAULT_TIMEOUT = 10
     CREATE_TIMEOUT = 120  # criação de tenant envolve schema + migrations
@@ -14,6 +130,25 @@ class SaasApiClient:
     def __init__(self) -> None:
         self.base_url = getattr(settings, "SAAS_API_BASE_URL", None)
         self.api_key = getattr(settings, "SAAS_API_KEY", None)
+        self.session = get_session()
+        self.breaker = CircuitBreaker()
+        # Tenants já obtidos por este cliente, indexados por schema_name.
+        self._identity_map = {}
+
+    @classmethod
+    def for_request(cls, request) -> "SaasApiClient":
+        """
+        Retorna o cliente associado à requisição, criando-o na primeira chamada.
+
+        Como o cliente guarda os tenants já obtidos, uma view que chama
+        ``list_tenants`` e depois ``retrieve_tenant`` (ou busca o mesmo tenant
+        duas vezes) faz uma única chamada à API durante a requisição.
+        """
+        client = getattr(request, "_saas_api_client", None)
+        if client is None:
+            client = cls()
+            request._saas_api_client = client
+        return client
 
     def _get_headers(self) -> dict:
         headers = {"Content-Type": "application/json"}
@@ -44,47 +179,333 @@ class SaasApiClient:
             message = f"{message}: {detail}"
         raise SaasApiError(message)
 
-    def list_tenants(self) -> list:
-        try:
-            url = self._get_url("api/tenants/")
-            response = requests.get(url, headers=self._get_headers(), timeout=self.DEFAULT_TIMEOUT)
-            data = self._handle_response(response, "Erro ao buscar tenants na API")
-            if isinstance(data, list):
-                return data
-            return []
-        except requests.RequestException as exc:
-            raise SaasApiError(f"Erro ao buscar tenants na API: {exc}") from exc
+    def _backoff(self, attempt: int, response: requests.Response = None) -> float:
+        """
+        Espera antes da tentativa ``attempt + 1``: backoff exponencial com
+        "full jitter" (valor aleatório entre zero e o teto da tentativa), para
+        que vários workers não repitam a chamada ao mesmo tempo. Um
+        Retry-After numérico enviado pela API tem prioridade.
+        """
+        maximum = getattr(settings, "SAAS_API_RETRY_BACKOFF_MAX", 8)
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), maximum)
+        base = getattr(settings, "SAAS_API_RETRY_BACKOFF", 0.5)
+        return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        action: str,
+        timeout=None,
+        headers=None,
+        idempotency_key=None,
+        template: str = None,
+        **kwargs,
+    ):
+        """
+        Envia a requisição repetindo-a em falhas de conexão e em respostas
+        429/502/503/504, até SAAS_API_RETRIES vezes a mais. Apenas métodos
+        idempotentes, ou chamadas com ``idempotency_key``, são repetidos. Um
+        timeout de leitura não é repetido: a API recebeu a requisição e não
+        respondeu a tempo, e repetir multiplicaria a espera de quem chamou.
+        O circuit breaker é consultado uma vez e recebe um único resultado
+        por chamada, qualquer que seja o número de tentativas. Ao final
+        registra no log e nas métricas (agrupadas por ``template``, o caminho
+        sem o schema) a duração total e o número de tentativas.
+        """
+        url = self._get_url(path)
+        headers = {**self._get_headers(), **(headers or {})}
+        if idempotency_key:
+            headers["Idempotency-Key"] = str(idempotency_key)
+        retries = 0
+        if method in IDEMPOTENT_METHODS or idempotency_key:
+            retries = getattr(settings, "SAAS_API_RETRIES", 2)
+        if not self.breaker.allow_request():
+            raise SaasApiUnavailable(f"{action}: API indisponível, tente novamente em instantes.")
 
-    def retrieve_tenant(self, schema_name: str) -> dict:
+        started = time.monotonic()
+        attempt = 0
+        response = None
+        succeeded = False
         try:
-            url = self._get_url(f"api/tenants/{schema_name}/")
-            response = requests.get(url, headers=self._get_headers(), timeout=self.DEFAULT_TIMEOUT)
-            data = self._handle_response(response, "Erro ao buscar tenant na API")
-            if isinstance(data, dict):
-                return data
+            while True:
+                attempt += 1
+                response = None
+                try:
+                    response = self.session.request(
+                        method,
+                        url,
+                        headers=headers,
+                        timeout=timeout or self.DEFAULT_TIMEOUT,
+                        **kwargs,
+                    )
+                except requests.ConnectionError as exc:
+                    # Inclui ConnectTimeout: a requisição não chegou à API.
+                    if attempt > retries:
+                        raise SaasApiError(f"{action}: {exc}") from exc
+                    time.sleep(self._backoff(attempt - 1))
+                    continue
+                except requests.RequestException as exc:
+                    raise SaasApiError(f"{action}: {exc}") from exc
+                _count_transfer(received=len(response.content))
+                if response.status_code in RETRY_STATUSES and attempt <= retries:
+                    time.sleep(self._backoff(attempt - 1, response))
+                    continue
+                # Erros 4xx são respostas válidas da API e não contam como falha.
+                succeeded = response.status_code < 500
+                return response
+        finally:
+            if succeeded:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            elapsed = (time.monotonic() - started) * 1000
+            status = response.status_code if response is not None else "erro"
+            log = logger.warning if attempt > 1 else logger.debug
+            log(
+                "%s %s -> %s em %.0f ms (%d tentativa(s))",
+                method, path, status, elapsed, attempt,
+            )
+            metrics.record_call(
+                method,
+                template or path,
+                status,
+                len(response.content) if response is not None else 0,
+                elapsed,
+                attempt,
+            )
+
+    def _request(self, method: str, path: str, action: str, timeout=None, **kwargs):
+        response = self._send(method, path, action, timeout=timeout, **kwargs)
+        return self._handle_response(response, action)
+
+    def _get_entry(self, path: str, action: str, entry: dict = None, template: str = None) -> dict:
+        """
+        GET condicional: envia os validadores (ETag/Last-Modified) guardados em
+        ``entry``. Em um 304 a entrada existente é reaproveitada sem baixar nem
+        decodificar o corpo novamente.
+        """
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = self._send("GET", path, action, headers=headers, template=template)
+        if response.status_code == 304 and entry is not None:
+            _count_transfer(not_modified=1, saved=entry.get("size") or 0)
+            return {**entry, "fetched_at": time.time()}
+        return {
+            "data": self._handle_response(response, action),
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "size": len(response.content),
+        }
+
+    def _cached(self, key: str, fetch_entry):
+        """
+        Lê ``key`` do cache do Django (compartilhado entre os workers).
+
+        Dentro de SAAS_API_CACHE_TTL o valor é servido direto do cache. Depois
+        disso, e até SAAS_API_CACHE_STALE_TTL segundos a mais, o valor antigo
+        continua sendo servido enquanto uma única thread o revalida em segundo
+        plano. Fora dessa janela a revalidação é feita de forma síncrona. Em
+        ambos os casos a revalidação é um GET condicional, e a entrada (com os
+        validadores) é mantida por SAAS_API_CACHE_RETENTION segundos.
+        """
+        ttl = getattr(settings, "SAAS_API_CACHE_TTL", 60)
+        if ttl <= 0:
+            return fetch_entry(None)["data"]
+        stale_ttl = getattr(settings, "SAAS_API_CACHE_STALE_TTL", 300)
+        entry = cache.get(key)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < ttl:
+                return entry["data"]
+            if age < ttl + stale_ttl:
+                self._revalidate(key, entry, fetch_entry)
+                return entry["data"]
+        entry = fetch_entry(entry)
+        self._store(key, entry)
+        return entry["data"]
+
+    def _store(self, key: str, entry: dict) -> None:
+        ttl = getattr(settings, "SAAS_API_CACHE_TTL", 60)
+        stale_ttl = getattr(settings, "SAAS_API_CACHE_STALE_TTL", 300)
+        retention = getattr(settings, "SAAS_API_CACHE_RETENTION", 86400)
+        cache.set(key, entry, timeout=max(retention, ttl + stale_ttl))
+
+    def _revalidate(self, key: str, entry: dict, fetch_entry) -> None:
+        lock_key = f"{key}:refreshing"
+        # cache.add é atômico: apenas um worker/thread dispara a revalidação.
+        if not cache.add(lock_key, True, timeout=self.DEFAULT_TIMEOUT * 2):
+            return
+
+        def refresh():
+            try:
+                self._store(key, fetch_entry(entry))
+            except SaasApiError as exc:
+                logger.warning("Falha ao revalidar %s em segundo plano: %s", key, exc)
+            finally:
+                cache.delete(lock_key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _fetch_tenants(self, entry: dict = None) -> dict:
+        entry = self._get_entry("api/tenants/", "Erro ao buscar tenants na API", entry)
+        if not isinstance(entry["data"], list):
+            entry["data"] = []
+        return entry
+
+    def _fetch_tenant(self, schema_name: str, entry: dict = None) -> dict:
+        entry = self._get_entry(
+            f"api/tenants/{schema_name}/",
+            "Erro ao buscar tenant na API",
+            entry,
+            template="api/tenants/{schema_name}/",
+        )
+        if not isinstance(entry["data"], dict):
             raise SaasApiError("Resposta inesperada da API ao buscar tenant.")
-        except requests.RequestException as exc:
-            raise SaasApiError(f"Erro ao buscar tenant na API: {exc}") from exc
+        return entry
 
-    def create_tenant(self, payload: dict) -> dict:
-        try:
-            url = self._get_url("api/tenants/create/")
-            response = requests.post(url, json=payload, headers=self._get_headers(), timeout=self.CREATE_TIMEOUT)
-            data = self._handle_response(response, "Erro ao criar tenant na API")
-            if isinstance(data, dict):
-                return data
-            return {}
-        except requests.RequestException as exc:
-            raise SaasApiError(f"Erro ao criar tenant na API: {exc}") from exc
-
-    def update_tenant(self, schema_name: str, payload: dict, partial: bool = True) -> dict:
-        try:
-            url = self._get_url(f"api/tenants/{schema_name}/update/")
-            method = requests.patch if partial else requests.put
-            response = method(url, json=payload, headers=self._get_headers(), timeout=self.DEFAULT_TIMEOUT)
-            data = self._handle_response(response, "Erro ao atualizar tenant na API")
-            if isinstance(data, dict):
-                return data
-            return {}
-        except requests.RequestException as exc:
-            raise SaasApiError(f"Erro ao atualizar tenant na API: {exc}") from exc
+    def _mirrored_tenants(self, schema_name: str = None) -> list:
+        tenants = Tenant.objects.all()
+        if schema_name:
+            tenants = tenants.filter(schema_name=schema_name)
+        return [tenant.as_api_dict() for tenant in tenants]
+
+    def list_tenants(self, use_cache: bool = True) -> list:
+        if use_cache:
+            try:
+                tenants = self._cached(TENANT_LIST_CACHE_KEY, self._fetch_tenants)
+            except SaasApiUnavailable:
+                # Com o circuito aberto, a cópia local substitui a API.
+                tenants = self._mirrored_tenants()
+                if not tenants:
+                    raise
+        else:
+            tenants = self._fetch_tenants()["data"]
+        for tenant in tenants:
+            if isinstance(tenant, dict) and tenant.get("schema_name"):
+                self._identity_map[tenant["schema_name"]] = tenant
+        return tenants
+
+    def retrieve_tenant(self, schema_name: str, use_cache: bool = True) -> dict:
+        if use_cache and schema_name in self._identity_map:
+            return self._identity_map[schema_name]
+        if use_cache:
+            try:
+                tenant = self._cached(
+                    tenant_cache_key(schema_name),
+                    lambda entry: self._fetch_tenant(schema_name, entry),
+                )
+            except SaasApiUnavailable:
+                mirrored = self._mirrored_tenants(schema_name)
+                if not mirrored:
+                    raise
+                tenant = mirrored[0]
+        else:
+            tenant = self._fetch_tenant(schema_name)["data"]
+        self._identity_map[schema_name] = tenant
+        return tenant
+
+    def _parallel(self, func, schema_names: list, max_workers: int = None, on_result=None) -> list:
+        """
+        Aplica ``func(schema_name)`` a cada schema em paralelo e devolve um
+        TenantResult por schema, na mesma ordem da entrada. Falhas individuais
+        não interrompem as demais chamadas. ``on_result(result)``, se
+        informado, é chamado na thread de quem chamou, à medida que os
+        resultados chegam (na ordem da entrada). A concorrência é limitada por
+        SAAS_API_MAX_WORKERS, que deve ser menor ou igual a
+        SAAS_API_POOL_MAXSIZE para reaproveitar as conexões do pool.
+        """
+        if not schema_names:
+            return []
+        max_workers = max_workers or getattr(settings, "SAAS_API_MAX_WORKERS", 8)
+
+        def call(schema_name):
+            try:
+                return TenantResult(schema_name, func(schema_name), None)
+            except SaasApiError as exc:
+                return TenantResult(schema_name, None, exc)
+
+        # Cada chamada roda em uma cópia do contexto atual para que continue
+        # sendo atribuída à requisição (ver metrics.track_request).
+        contexts = [contextvars.copy_context() for _ in schema_names]
+        results = []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(schema_names))) as executor:
+            for result in executor.map(lambda context, name: context.run(call, name), contexts, schema_names):
+                if on_result is not None:
+                    on_result(result)
+                results.append(result)
+        return results
+
+    def retrieve_many(self, schema_names, max_workers: int = None, use_cache: bool = True) -> list:
+        """Busca vários tenants em paralelo (ver ``_parallel``)."""
+        return self._parallel(
+            lambda schema_name: self.retrieve_tenant(schema_name, use_cache=use_cache),
+            list(schema_names),
+            max_workers,
+        )
+
+    def update_many(
+        self,
+        schema_names,
+        payload: dict,
+        max_workers: int = None,
+        idempotency_prefix: str = None,
+        on_result=None,
+    ) -> list:
+        """
+        Aplica o mesmo ``payload`` (PATCH) a vários tenants em paralelo e
+        devolve um TenantResult por schema (ver ``_parallel``). Com
+        ``idempotency_prefix`` cada tenant usa a chave
+        ``<prefixo>:<schema_name>``; as repetições da mesma chamada usam a
+        mesma chave. A API guarda a resposta de cada chave, inclusive de
+        erro: quem reenvia depois de uma falha deve usar outro prefixo.
+        """
+
+        def update(schema_name):
+            key = f"{idempotency_prefix}:{schema_name}" if idempotency_prefix else None
+            return self.update_tenant(schema_name, payload, idempotency_key=key)
+
+        return self._parallel(update, list(schema_names), max_workers, on_result)
+
+    def create_tenant(self, payload: dict, idempotency_key: str = None) -> dict:
+        """
+        Cria o tenant na API. Todas as tentativas enviam o mesmo
+        Idempotency-Key, logo uma repetição após timeout não provisiona o
+        tenant duas vezes. Passe uma chave estável (ex.: a do job) para que
+        reenvios feitos em outras chamadas também sejam deduplicados.
+        """
+        data = self._request(
+            "POST",
+            "api/tenants/create/",
+            "Erro ao criar tenant na API",
+            timeout=self.CREATE_TIMEOUT,
+            idempotency_key=idempotency_key or uuid.uuid4().hex,
+            json=payload,
+        )
+        invalidate_tenant_cache(payload.get("schema_name"))
+        self._identity_map.pop(payload.get("schema_name"), None)
+        if isinstance(data, dict):
+            return data
+        return {}
+
+    def update_tenant(self, schema_name: str, payload: dict, partial: bool = True, idempotency_key: str = None) -> dict:
+        data = self._request(
+            "PATCH" if partial else "PUT",
+            f"api/tenants/{schema_name}/update/",
+            "Erro ao atualizar tenant na API",
+            idempotency_key=idempotency_key or uuid.uuid4().hex,
+            template="api/tenants/{schema_name}/update/",
+            json=payload,
+        )
+        invalidate_tenant_cache(schema_name)
+        self._identity_map.pop(schema_name, None)
+        if isinstance(data, dict):
+            return data
+        return {}
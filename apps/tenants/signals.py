@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .analytics import invalidate_month
+from .models import TenantPayment
+from .rollup import Bucket, payment_bucket, refresh_buckets
+
+
+@receiver(pre_save, sender=TenantPayment)
+def remember_previous_bucket(sender, instance, **kwargs):
+    """
+    Na edição, guarda o bucket do consolidado em que o pagamento estava, para
+    recalculá-lo também caso tenant, mês, moeda ou status tenham mudado.
+    """
+    instance._previous_bucket = None
+    if instance.pk:
+        previous = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("schema_name", "payment_date", "currency", "status")
+            .first()
+        )
+        if previous:
+            schema_name, payment_date, currency, status = previous
+            instance._previous_bucket = Bucket(schema_name, payment_date.replace(day=1), currency, status)
+
+
+@receiver(post_save, sender=TenantPayment)
+@receiver(post_delete, sender=TenantPayment)
+def refresh_payment_rollup(sender, instance, **kwargs):
+    buckets = {payment_bucket(instance)}
+    previous = getattr(instance, "_previous_bucket", None)
+    if previous:
+        buckets.add(previous)
+    refresh_buckets(buckets)
+    for bucket in buckets:
+        invalidate_month(bucket.month)
@@ -0,0 +1,414 @@
+"""
+Importação de extratos bancários (OFX ou CSV) com conciliação automática dos
+créditos em TenantPayment.
+
+O arquivo é lido em blocos, sem carregá-lo inteiro, e cada lançamento é
+conciliado contra um índice em memória dos tenants da cópia local (sem
+chamadas à API do SaaS):
+
+1. referência: o schema_name do tenant aparece na descrição do lançamento;
+2. nome: o nome do cliente aparece na descrição;
+3. valor: o valor é o valor mensal de um único tenant. Qualquer crédito
+   desse valor casaria com o tenant, então a linha apenas é sugerida para
+   revisão, sem criar o pagamento.
+
+Os créditos conciliados por referência ou nome viram pagamentos via bulk_create, em lotes, dentro
+de uma única transação. O identificador da transação no banco (FITID no
+OFX) é gravado em TenantPayment.bank_transaction_id, de modo que reimportar
+o mesmo extrato não duplica pagamentos.
+"""
+import codecs
+import csv
+import hashlib
+import html
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+
+from .analytics import invalidate_month
+from .models import Tenant, TenantPayment, TenantStatementImport
+from .rollup import payment_bucket, refresh_buckets
+
+
+IMPORT_BATCH_SIZE = 1000
+
+STATUS_CREATED = "created"
+STATUS_MATCHED = "matched"
+STATUS_REVIEW = "review"
+STATUS_AMBIGUOUS = "ambiguous"
+STATUS_UNMATCHED = "unmatched"
+STATUS_DUPLICATE = "duplicate"
+STATUS_IGNORED = "ignored"
+
+LINE_STATUS_LABELS = {
+    STATUS_CREATED: "Pagamento criado",
+    STATUS_MATCHED: "Conciliado",
+    STATUS_REVIEW: "Conciliado, requer revisão",
+    STATUS_AMBIGUOUS: "Ambíguo",
+    STATUS_UNMATCHED: "Não identificado",
+    STATUS_DUPLICATE: "Já importado",
+    STATUS_IGNORED: "Débito (ignorado)",
+}
+
+RULE_LABELS = {
+    "reference": "Referência",
+    "name": "Nome do cliente",
+    "amount": "Valor mensal",
+}
+
+# Cabeçalhos aceitos no CSV, já normalizados (minúsculas, sem acentos).
+CSV_COLUMNS = {
+    "date": ("data", "date", "data lancamento", "data do lancamento", "data movimento", "dt"),
+    "amount": ("valor", "amount", "valor (r$)", "valor r$", "montante"),
+    "credit": ("credito", "credito (r$)", "entrada"),
+    "debit": ("debito", "debito (r$)", "saida"),
+    "description": ("descricao", "historico", "description", "memo", "lancamento", "detalhe", "detalhes"),
+    "name": ("nome", "pagador", "favorecido", "remetente"),
+    "transaction_id": ("id", "fitid", "documento", "n documento", "numero documento", "identificador"),
+}
+
+OFX_TOKEN = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+class StatementError(ValueError):
+    pass
+
+
+@dataclass
+class StatementLine:
+    number: int
+    date: date
+    amount: Decimal
+    description: str
+    transaction_id: str
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.findall(r"[a-z0-9_]+", text.lower()))
+
+
+def parse_amount(value: str) -> Decimal:
+    text = (value or "").strip().upper().replace("R$", "").replace(" ", "")
+    negative = text.startswith("-") or text.endswith("D") or (text.startswith("(") and text.endswith(")"))
+    text = text.strip("-+()CD")
+    if "," in text and "." in text:
+        # O separador que aparece por último é o decimal.
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text:
+        text = text.replace(",", ".")
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise StatementError(f"Valor inválido: {value!r}.") from None
+    return -amount if negative else amount
+
+
+def parse_date(value: str) -> date:
+    text = (value or "").strip()
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%y", "%d-%m-%Y", "%Y%m%d"):
+        try:
+            return datetime.strptime(text[:10] if fmt != "%Y%m%d" else text[:8], fmt).date()
+        except ValueError:
+            continue
+    raise StatementError(f"Data inválida: {value!r}.")
+
+
+def detect_format(file_name: str, head: bytes) -> str:
+    if file_name.lower().endswith(".ofx") or b"OFXHEADER" in head or b"<OFX>" in head.upper():
+        return "ofx"
+    return "csv"
+
+
+def _detect_encoding(head: bytes) -> str:
+    upper = head.upper()
+    if b"CHARSET:1252" in upper or b"WINDOWS-1252" in upper or b"ISO-8859-1" in upper:
+        return "cp1252"
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        # Um caractere multibyte cortado no fim do trecho lido não conta.
+        if exc.start < len(head) - 3:
+            return "cp1252"
+    return "utf-8-sig"
+
+
+def _text_stream(file, head: bytes):
+    return codecs.getreader(_detect_encoding(head))(file, errors="replace")
+
+
+def _ofx_tokens(stream, chunk_size: int = 65536):
+    """(fechamento, tag, valor) de cada tag do OFX, lendo ``chunk_size`` caracteres por vez."""
+    buffer = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        # Só processa até a última tag iniciada: o valor dela pode continuar no próximo bloco.
+        cut = buffer.rfind("<")
+        if cut <= 0:
+            continue
+        for match in OFX_TOKEN.finditer(buffer, 0, cut):
+            yield match.group(1) == "/", match.group(2).upper(), match.group(3).strip()
+        buffer = buffer[cut:]
+    for match in OFX_TOKEN.finditer(buffer):
+        yield match.group(1) == "/", match.group(2).upper(), match.group(3).strip()
+
+
+def parse_ofx(stream):
+    account = ""
+    transaction_data = None
+    number = 0
+    for closing, tag, value in _ofx_tokens(stream):
+        if tag == "STMTTRN":
+            if not closing:
+                transaction_data = {}
+                continue
+            if transaction_data is not None:
+                number += 1
+                yield _ofx_line(number, account, transaction_data)
+            transaction_data = None
+        elif closing:
+            continue
+        elif transaction_data is not None:
+            transaction_data[tag] = html.unescape(value)
+        elif tag == "ACCTID":
+            account = value
+
+
+def _ofx_line(number: int, account: str, data: dict) -> StatementLine:
+    try:
+        posted = _ofx_date(data.get("DTPOSTED", ""))
+        amount = parse_amount(data.get("TRNAMT", ""))
+    except StatementError as exc:
+        raise StatementError(f"Lançamento {number}: {exc}") from None
+    parts = [data.get("NAME", ""), data.get("MEMO", "")]
+    description = " - ".join(dict.fromkeys(part for part in parts if part))
+    fitid = data.get("FITID", "")
+    transaction_id = f"ofx:{account}:{fitid}" if fitid else _fallback_id(posted, amount, description, number)
+    return StatementLine(number, posted, amount, description, transaction_id)
+
+
+def _ofx_date(value: str) -> date:
+    # DTPOSTED é sempre AAAAMMDD[HHMMSS[.XXX]][[fuso]]; strptime seria bem mais lento.
+    try:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    except ValueError:
+        raise StatementError(f"Data inválida: {value!r}.") from None
+
+
+def _fallback_id(posted: date, amount: Decimal, description: str, occurrence: int) -> str:
+    raw = f"{posted.isoformat()}|{amount}|{normalize(description)}|{occurrence}"
+    return f"hash:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def parse_csv(stream):
+    first_line = stream.readline()
+    delimiter = max(";,\t", key=first_line.count)
+    header = next(csv.reader([first_line], delimiter=delimiter), [])
+    columns = {}
+    for index, name in enumerate(header):
+        key = normalize(name.replace("_", " ")).replace("_", " ")
+        for field, aliases in CSV_COLUMNS.items():
+            if key in aliases and field not in columns:
+                columns[field] = index
+    if "date" not in columns or not ({"amount", "credit"} & set(columns)):
+        raise StatementError("O CSV deve ter colunas de data e valor (ou crédito) no cabeçalho.")
+
+    def cell(row, field):
+        index = columns.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    # Lançamentos idênticos no mesmo arquivo recebem identificadores distintos.
+    occurrences = defaultdict(int)
+    for number, row in enumerate(csv.reader(stream, delimiter=delimiter), start=2):
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            posted = parse_date(cell(row, "date"))
+            if "amount" in columns:
+                amount = parse_amount(cell(row, "amount"))
+            else:
+                credit, debit = cell(row, "credit"), cell(row, "debit")
+                amount = parse_amount(credit) if credit else -abs(parse_amount(debit or "0"))
+        except StatementError as exc:
+            raise StatementError(f"Linha {number}: {exc}") from None
+        description = " - ".join(part for part in (cell(row, "name"), cell(row, "description")) if part)
+        transaction_id = cell(row, "transaction_id")
+        if transaction_id:
+            transaction_id = f"csv:{transaction_id}"
+        else:
+            key = (posted, amount, normalize(description))
+            occurrences[key] += 1
+            transaction_id = _fallback_id(posted, amount, description, occurrences[key])
+        yield StatementLine(number, posted, amount, description, transaction_id)
+
+
+class TenantMatcher:
+    """Índices em memória dos tenants por schema, nome do cliente e valor mensal."""
+
+    MAX_NAME_WORDS = 6
+
+    def __init__(self, tenants):
+        self.by_schema = {}
+        self.by_name = defaultdict(list)
+        self.by_price = defaultdict(list)
+        for tenant in tenants:
+            self.by_schema[tenant.schema_name.lower()] = tenant
+            name = normalize(tenant.client_name)
+            if name:
+                self.by_name[name].append(tenant)
+            if tenant.monthly_price:
+                self.by_price[tenant.monthly_price].append(tenant)
+
+    def match(self, line: StatementLine):
+        """(tenant, regra, candidatos): tenant é None quando não há um único candidato."""
+        words = normalize(line.description).split()
+        found = {self.by_schema[word] for word in words if word in self.by_schema}
+        if found:
+            return self._result(found, "reference")
+
+        found = set()
+        for size in range(1, min(self.MAX_NAME_WORDS, len(words)) + 1):
+            for start in range(len(words) - size + 1):
+                found.update(self.by_name.get(" ".join(words[start : start + size]), ()))
+        if found:
+            return self._result(found, "name")
+
+        return self._result(self.by_price.get(line.amount, ()), "amount")
+
+    def _result(self, found, rule):
+        found = sorted(found, key=lambda tenant: tenant.schema_name)
+        return (found[0] if len(found) == 1 else None), rule, found
+
+
+def _price_message(tenant, amount: Decimal) -> str:
+    expected = tenant.monthly_price
+    if not expected or amount == expected:
+        return ""
+    months = amount / expected
+    if months == months.to_integral_value() and months > 1:
+        return f"Equivale a {months:.0f} mensalidades de {expected}."
+    return f"Valor diferente do valor mensal ({expected})."
+
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_statement(
+    file,
+    file_name: str,
+    user=None,
+    dry_run: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> TenantStatementImport:
+    """
+    Importa o extrato ``file`` (binário) e grava o relatório em um
+    TenantStatementImport. Com ``dry_run``, apenas concilia, sem criar
+    pagamentos. Um erro de leitura desfaz a importação inteira.
+    """
+    started = time.monotonic()
+    head = file.read(4096)
+    file.seek(0)
+    file_format = detect_format(file_name, head)
+    record = TenantStatementImport(file_name=file_name, file_format=file_format, dry_run=dry_run, created_by=user)
+    stream = _text_stream(file, head)
+    lines = parse_ofx(stream) if file_format == "ofx" else parse_csv(stream)
+    matcher = TenantMatcher(Tenant.objects.only("schema_name", "client_name", "monthly_price"))
+
+    report = []
+    buckets = set()
+    seen = set()
+    try:
+        with transaction.atomic():
+            for batch in _batches(lines, batch_size):
+                existing = set(
+                    TenantPayment.objects.filter(
+                        bank_transaction_id__in=[line.transaction_id for line in batch]
+                    ).values_list("bank_transaction_id", flat=True)
+                )
+                payments = []
+                for line in batch:
+                    entry = {
+                        "line": line.number,
+                        "date": line.date.isoformat(),
+                        "amount": str(line.amount),
+                        "description": line.description,
+                        "transaction_id": line.transaction_id,
+                        "schema_name": "",
+                        "rule": "",
+                        "candidates": [],
+                        "message": "",
+                    }
+                    report.append(entry)
+                    duplicate = line.transaction_id in existing or line.transaction_id in seen
+                    seen.add(line.transaction_id)
+                    if line.amount <= 0:
+                        entry["status"] = STATUS_IGNORED
+                        continue
+                    if duplicate:
+                        entry["status"] = STATUS_DUPLICATE
+                        continue
+                    tenant, rule, candidates = matcher.match(line)
+                    entry["rule"] = rule if candidates else ""
+                    if tenant is None:
+                        entry["status"] = STATUS_AMBIGUOUS if candidates else STATUS_UNMATCHED
+                        entry["candidates"] = [candidate.schema_name for candidate in candidates[:10]]
+                        continue
+                    entry["schema_name"] = tenant.schema_name
+                    if rule == "amount":
+                        entry["status"] = STATUS_REVIEW
+                        entry["message"] = "Identificado só pelo valor: confira e registre o pagamento manualmente."
+                        continue
+                    entry["status"] = STATUS_MATCHED if dry_run else STATUS_CREATED
+                    entry["message"] = _price_message(tenant, line.amount)
+                    if not dry_run:
+                        payment = TenantPayment(
+                            schema_name=tenant.schema_name,
+                            client_name=tenant.client_name,
+                            amount=line.amount,
+                            currency="BRL",
+                            status=TenantPayment.STATUS_PAID,
+                            payment_date=line.date,
+                            reference=line.transaction_id.rsplit(":", 1)[-1][:100],
+                            notes=f"Importado do extrato {file_name}: {line.description}",
+                            bank_transaction_id=line.transaction_id,
+                        )
+                        payments.append((entry, payment))
+                if payments:
+                    # bulk_create não dispara signals: o consolidado mensal é
+                    # atualizado abaixo para os buckets afetados.
+                    TenantPayment.objects.bulk_create([payment for _, payment in payments])
+                    for entry, payment in payments:
+                        entry["payment_id"] = payment.pk
+                        buckets.add(payment_bucket(payment))
+            refresh_buckets(buckets)
+    except StatementError as exc:
+        record.error = str(exc)
+        report = []
+    except IntegrityError:
+        record.error = "Alguns lançamentos foram importados por outra importação em andamento. Tente novamente."
+        report = []
+    else:
+        for bucket in buckets:
+            invalidate_month(bucket.month)
+    record.lines = report
+    record.duration = time.monotonic() - started
+    record.save()
+    return record
@@ -0,0 +1,282 @@
+"""
+Servidor local que simula os endpoints da API do SaaS usados pelo SaasApiClient.
+
+Usado pelos benchmarks e testes do app para medir o comportamento do cliente
+sem depender da API real. Latência, taxa de erro e quantidade de tenants são
+configuráveis; para usar com o servidor de desenvolvimento, rode o comando
+``saas_api_stub`` e aponte SAAS_API_BASE_URL para ele.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+TENANT_DETAIL_RE = re.compile(r"^/api/tenants/(?P<schema_name>[^/]+)/$")
+TENANT_UPDATE_RE = re.compile(r"^/api/tenants/(?P<schema_name>[^/]+)/update/$")
+
+
+def make_tenants(count: int) -> list:
+    return [
+        {
+            "schema_name": f"cliente{i:04d}",
+            "client_name": f"Cliente {i:04d}",
+            "primary_domain": f"cliente{i:04d}.example.com",
+            "on_trial": i % 5 == 0,
+            "paid_until": f"2026-{(i % 12) + 1:02d}-10",
+            "created_on": "2025-01-15",
+            "manager_licenses": 2,
+            "staff_licenses": 10,
+            "storage_gb": 5,
+            "monthly_price": 100 + i,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+class StubSaasApiHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantém a conexão aberta entre requisições (keep-alive).
+    protocol_version = "HTTP/1.1"
+    # Sem Nagle o corpo não espera o ACK do cabeçalho (atraso de ~40ms no keep-alive).
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.stub.count_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, data, validators: bool = False) -> None:
+        stub = self.server.stub
+        body = json.dumps(data).encode("utf-8")
+        headers = {}
+        if validators:
+            headers["ETag"] = f'"{hashlib.sha1(body).hexdigest()}"'
+            headers["Last-Modified"] = formatdate(stub.last_modified, usegmt=True)
+            if self._not_modified(headers):
+                status, body = 304, b""
+                stub.count_not_modified()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        stub.count_bytes(len(body))
+
+    def _not_modified(self, headers: dict) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return if_none_match == headers["ETag"]
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.server.stub.last_modified) <= since
+        return False
+
+    def _inject_failure(self) -> bool:
+        stub = self.server.stub
+        stub.wait()
+        if stub.take_failure():
+            self._send_json(503, {"detail": "Serviço temporariamente indisponível."})
+            return True
+        return False
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count_request()
+        if self._inject_failure():
+            return
+        if self.path == "/api/tenants/":
+            return self._send_json(200, stub.tenants, validators=stub.validators)
+        match = TENANT_DETAIL_RE.match(self.path)
+        if match:
+            tenant = stub.get_tenant(match.group("schema_name"))
+            if tenant is None:
+                return self._send_json(404, {"detail": "Tenant não encontrado."})
+            return self._send_json(200, tenant, validators=stub.validators)
+        return self._send_json(404, {"detail": "Endpoint não encontrado."})
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _write(self, handler) -> None:
+        """
+        Executa uma escrita respeitando o header Idempotency-Key: uma chave já
+        vista devolve a resposta original sem repetir a operação.
+        """
+        stub = self.server.stub
+        stub.count_request()
+        payload = self._read_json()
+        if self._inject_failure():
+            return
+        key = self.headers.get("Idempotency-Key")
+        replay = stub.idempotent_responses.get(key) if key else None
+        if replay is not None:
+            return self._send_json(*replay)
+        status, data = handler(payload)
+        if key:
+            stub.idempotent_responses[key] = (status, data)
+        return self._send_json(status, data)
+
+    def _create(self, payload: dict):
+        stub = self.server.stub
+        if self.path != "/api/tenants/create/":
+            return 404, {"detail": "Endpoint não encontrado."}
+        if stub.get_tenant(payload.get("schema_name")) is not None:
+            return 400, {"detail": "Tenant já existe."}
+        return 201, stub.add_tenant(payload)
+
+    def _update(self, payload: dict):
+        stub = self.server.stub
+        match = TENANT_UPDATE_RE.match(self.path)
+        if not match:
+            return 404, {"detail": "Endpoint não encontrado."}
+        tenant = stub.get_tenant(match.group("schema_name"))
+        if tenant is None:
+            return 404, {"detail": "Tenant não encontrado."}
+        tenant.update(payload)
+        stub.touch()
+        return 200, tenant
+
+    def do_POST(self):
+        self._write(self._create)
+
+    def do_PATCH(self):
+        self._write(self._update)
+
+    do_PUT = do_PATCH
+
+
+class StubSaasApi:
+    """
+    Sobe o servidor em uma thread própria em uma porta livre.
+
+        with StubSaasApi(tenants=make_tenants(50)) as stub:
+            client.base_url = stub.base_url
+    """
+
+    def __init__(
+        self,
+        tenants=None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        validators: bool = True,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+    ) -> None:
+        self.tenants = tenants if tenants is not None else make_tenants(10)
+        self.host = host
+        self.port = port
+        # Cada requisição espera ``latency`` segundos (mais até ``jitter``
+        # aleatórios) e responde 503 com probabilidade ``error_rate``.
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        # Com validators as leituras respondem com ETag/Last-Modified e
+        # atendem GETs condicionais com 304.
+        self.validators = validators
+        self.last_modified = time.time()
+        self.connections = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        # Próximas N requisições respondem 503 (simula falhas transitórias).
+        self.fail_next = 0
+        # Respostas já enviadas por Idempotency-Key.
+        self.idempotent_responses = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def count_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def count_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def count_bytes(self, size: int) -> None:
+        with self._lock:
+            self.bytes_sent += size
+
+    def wait(self) -> None:
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def take_failure(self) -> bool:
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return True
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    def touch(self) -> None:
+        self.last_modified = time.time()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+            self.not_modified = 0
+            self.bytes_sent = 0
+            self.fail_next = 0
+            self.idempotent_responses = {}
+
+    def get_tenant(self, schema_name: str):
+        for tenant in self.tenants:
+            if tenant.get("schema_name") == schema_name:
+                return tenant
+        return None
+
+    def add_tenant(self, payload: dict) -> dict:
+        tenant = {key: value for key, value in payload.items() if key not in ("password", "domain")}
+        tenant["primary_domain"] = payload.get("domain") or ""
+        with self._lock:
+            self.tenants.append(tenant)
+        self.touch()
+        return tenant
+
+    def start(self) -> "StubSaasApi":
+        self._server = ThreadingHTTPServer((self.host, self.port), StubSaasApiHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
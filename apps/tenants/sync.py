@@ -0,0 +1,185 @@
+import hashlib
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Tenant
+from .services import SaasApiClient
+
+
+MONTHLY_PRICES_CACHE_KEY = "tenants:monthly_prices"
+
+MONTHLY_PRICE_KEYS = ("monthly_price", "monthly_amount", "monthly_value", "valor_mensal", "monthly_fee")
+
+SYNCED_FIELDS = [
+    "client_name",
+    "primary_domain",
+    "on_trial",
+    "paid_until",
+    "created_on",
+    "manager_licenses",
+    "staff_licenses",
+    "storage_gb",
+    "storage_used_gb",
+    "storage_used_percent",
+    "monthly_price",
+    "payload_hash",
+    "synced_at",
+]
+
+
+def get_monthly_price(data: dict):
+    for key in MONTHLY_PRICE_KEYS:
+        value = data.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def _parse_date(value):
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _parse_decimal(value):
+    if value is None or value == "":
+        return None
+    try:
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+
+
+def _parse_int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def payload_hash(data: dict) -> str:
+    raw = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def tenant_fields(data: dict) -> dict:
+    """Converte o payload da API nos campos do modelo Tenant (exceto schema_name)."""
+    return {
+        "client_name": data.get("client_name") or "",
+        "primary_domain": data.get("primary_domain") or data.get("domain") or "",
+        "on_trial": bool(data.get("on_trial")),
+        "paid_until": _parse_date(data.get("paid_until")),
+        "created_on": _parse_date(data.get("created_on")),
+        "manager_licenses": _parse_int(data.get("manager_licenses")),
+        "staff_licenses": _parse_int(data.get("staff_licenses")),
+        "storage_gb": _parse_int(data.get("storage_gb")),
+        "storage_used_gb": _parse_float(data.get("storage_used_gb")),
+        "storage_used_percent": _parse_float(data.get("storage_used_percent")),
+        "monthly_price": _parse_decimal(get_monthly_price(data)),
+        "payload_hash": payload_hash(data),
+    }
+
+
+def monthly_prices() -> dict:
+    """
+    Valor mensal de todos os tenants da tabela local, já serializado em JSON e
+    com o ETag correspondente. Fica no cache por TENANT_PRICES_CACHE_TTL
+    segundos e é invalidado sempre que a tabela local muda.
+    """
+    entry = cache.get(MONTHLY_PRICES_CACHE_KEY)
+    if entry is None:
+        prices = {
+            schema_name: str(price) if price is not None else ""
+            for schema_name, price in Tenant.objects.values_list("schema_name", "monthly_price")
+        }
+        body = json.dumps({"prices": prices}, sort_keys=True).encode("utf-8")
+        entry = {"body": body, "etag": f'"{hashlib.sha1(body).hexdigest()}"'}
+        cache.set(MONTHLY_PRICES_CACHE_KEY, entry, timeout=getattr(settings, "TENANT_PRICES_CACHE_TTL", 60))
+    return entry
+
+
+def invalidate_monthly_prices() -> None:
+    cache.delete(MONTHLY_PRICES_CACHE_KEY)
+
+
+def upsert_tenant(data: dict):
+    """Grava (ou atualiza) um tenant da API na tabela local."""
+    schema_name = data.get("schema_name")
+    if not schema_name:
+        return None
+    defaults = tenant_fields(data)
+    defaults["synced_at"] = timezone.now()
+    tenant, _ = Tenant.objects.update_or_create(schema_name=schema_name, defaults=defaults)
+    invalidate_monthly_prices()
+    return tenant
+
+
+def sync_tenants(client: SaasApiClient = None, prune: bool = True, details: bool = False) -> dict:
+    """
+    Sincroniza a tabela local com a lista de tenants da API.
+
+    A sincronização é incremental: cada tenant guarda o hash do último payload
+    recebido, e apenas os registros novos ou alterados são gravados. Com
+    ``prune`` os tenants que não existem mais na API são removidos. Com
+    ``details`` o detalhe de cada tenant é buscado em paralelo e combinado ao
+    item da lista.
+    """
+    client = client or SaasApiClient()
+    remote = [t for t in client.list_tenants(use_cache=False) if t.get("schema_name")]
+    if details:
+        results = client.retrieve_many([t["schema_name"] for t in remote], use_cache=False)
+        remote = [
+            {**item, **result.data} if result.data else item
+            for item, result in zip(remote, results)
+        ]
+    existing = {tenant.schema_name: tenant for tenant in Tenant.objects.all()}
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for data in remote:
+        fields = tenant_fields(data)
+        fields["synced_at"] = now
+        tenant = existing.get(data["schema_name"])
+        if tenant is None:
+            to_create.append(Tenant(schema_name=data["schema_name"], **fields))
+        elif tenant.payload_hash != fields["payload_hash"]:
+            for name, value in fields.items():
+                setattr(tenant, name, value)
+            to_update.append(tenant)
+
+    removed = set()
+    if prune:
+        removed = set(existing) - {data["schema_name"] for data in remote}
+
+    with transaction.atomic():
+        Tenant.objects.bulk_create(to_create)
+        Tenant.objects.bulk_update(to_update, SYNCED_FIELDS)
+        if removed:
+            Tenant.objects.filter(schema_name__in=removed).delete()
+    if to_create or to_update or removed:
+        invalidate_monthly_prices()
+
+    return {
+        "created": len(to_create),
+        "updated": len(to_update),
+        "unchanged": len(remote) - len(to_create) - len(to_update),
+        "deleted": len(removed),
+    }
@@ -0,0 +1,1078 @@
+import csv
+import io
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from velzon.middleware import AuditlogMiddleware, CacheControlMiddleware, LockScreenMiddleware
+
+from . import async_views
+from .analytics import month_cache_key, overdue_tenants, revenue_summary
+from .async_services import AsyncSaasApiClient, aclose_async_client
+from .models import (
+    Tenant,
+    TenantBulkUpdate,
+    TenantPayment,
+    TenantPaymentMonthly,
+    TenantPaymentRollupState,
+    TenantProvisioningJob,
+)
+from .breaker import CircuitBreaker
+from .metrics import registry
+from .middleware import SaasApiTimingMiddleware
+from .services import (
+    TENANT_LIST_CACHE_KEY,
+    SaasApiClient,
+    SaasApiError,
+    SaasApiUnavailable,
+    transfer_stats,
+)
+from .receipts import build_receipts_zip, month_payments, receipt_storage
+from .rollup import rebuild, refresh_changed
+from .statements import import_statement
+from .stub_api import StubSaasApi, make_tenants
+from .jobs import recover_stale_jobs, resume_bulk_update, run_bulk_update, run_provisioning_job
+from .sync import sync_tenants
+from .views import TenantPaymentListView
+
+
+class StubApiTestCase(TestCase):
+    """Sobe a API simulada uma vez por classe e aponta o cliente para ela."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubSaasApi(tenants=make_tenants(5)).start()
+        cls.settings_override = override_settings(SAAS_API_BASE_URL=cls.stub.base_url)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.stub.tenants = make_tenants(5)
+        self.stub.reset_counters()
+
+
+class SaasApiClientCacheTest(StubApiTestCase):
+    def test_list_tenants_is_served_from_cache(self):
+        client = SaasApiClient()
+        first = client.list_tenants()
+        second = client.list_tenants()
+        self.assertEqual(first, second)
+        self.assertEqual(self.stub.requests, 1)
+
+    def test_stale_entry_is_served_while_revalidating(self):
+        client = SaasApiClient()
+        client.list_tenants()
+        entry = cache.get(TENANT_LIST_CACHE_KEY)
+        entry["fetched_at"] -= 120  # além do TTL (60s), dentro da janela stale
+        cache.set(TENANT_LIST_CACHE_KEY, entry)
+        self.stub.tenants[0]["client_name"] = "Renomeado"
+
+        self.assertEqual(client.list_tenants()[0]["client_name"], "Cliente 0001")
+        for _ in range(50):
+            if cache.get(TENANT_LIST_CACHE_KEY)["data"][0]["client_name"] == "Renomeado":
+                break
+            time.sleep(0.02)
+        self.assertEqual(client.list_tenants()[0]["client_name"], "Renomeado")
+        self.assertEqual(self.stub.requests, 2)
+
+    def test_update_tenant_invalidates_cache(self):
+        client = SaasApiClient()
+        client.retrieve_tenant("cliente0001")
+        client.update_tenant("cliente0001", {"client_name": "Novo nome"})
+        tenant = client.retrieve_tenant("cliente0001")
+        self.assertEqual(tenant["client_name"], "Novo nome")
+        self.assertEqual(self.stub.requests, 3)
+
+
+class ConditionalRequestTest(StubApiTestCase):
+    def expire(self, key):
+        entry = cache.get(key)
+        entry["fetched_at"] -= 3600  # fora da janela stale: revalidação síncrona
+        cache.set(key, entry)
+
+    def test_not_modified_reuses_cached_payload(self):
+        client = SaasApiClient()
+        client.list_tenants()
+        full_size = self.stub.bytes_sent
+        transfer_stats(reset=True)
+
+        self.expire(TENANT_LIST_CACHE_KEY)
+        tenants = SaasApiClient().list_tenants()
+
+        self.assertEqual(len(tenants), 5)
+        self.assertEqual(self.stub.not_modified, 1)
+        self.assertEqual(self.stub.bytes_sent, full_size)
+        stats = transfer_stats()
+        self.assertEqual(stats["not_modified"], 1)
+        self.assertEqual(stats["saved"], full_size)
+
+    def test_changed_payload_is_downloaded_again(self):
+        SaasApiClient().list_tenants()
+        self.stub.tenants[0]["client_name"] = "Renomeado"
+        self.expire(TENANT_LIST_CACHE_KEY)
+        tenants = SaasApiClient().list_tenants()
+        self.assertEqual(tenants[0]["client_name"], "Renomeado")
+        self.assertEqual(self.stub.not_modified, 0)
+
+
+class SaasApiClientRetrieveManyTest(StubApiTestCase):
+    def test_results_keep_input_order_and_capture_errors(self):
+        schemas = ["cliente0003", "inexistente", "cliente0001"]
+        results = SaasApiClient().retrieve_many(schemas, max_workers=2)
+        self.assertEqual([r.schema_name for r in results], schemas)
+        self.assertEqual(results[0].data["client_name"], "Cliente 0003")
+        self.assertIsInstance(results[1].error, SaasApiError)
+        self.assertIsNone(results[2].error)
+
+
+@override_settings(SAAS_API_CACHE_TTL=0)
+class RequestScopedClientTest(StubApiTestCase):
+    """Conta as chamadas HTTP feitas à API por requisição (cache do Django desligado)."""
+
+    def setUp(self):
+        super().setUp()
+        sync_tenants()
+        self.stub.reset_counters()
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        self.payment = TenantPayment.objects.create(
+            schema_name="cliente0001", amount="100.00", payment_date="2026-01-10"
+        )
+
+    def payment_data(self, schema_name="cliente0002"):
+        return {
+            "schema_name": schema_name,
+            "amount": "150.00",
+            "currency": "BRL",
+            "status": TenantPayment.STATUS_PAID,
+            "payment_date": "2026-02-10",
+        }
+
+    def test_payment_for_tenant_missing_from_mirror_falls_back_to_api(self):
+        Tenant.objects.filter(schema_name="cliente0002").delete()
+        with mock.patch("apps.tenants.views.get_tenant_choices", return_value=[("cliente0002", "Cliente 0002")]):
+            self.client.post(reverse("tenants:payments-create"), self.payment_data())
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual(TenantPayment.objects.latest("pk").client_name, "Cliente 0002")
+
+    def test_retrieve_after_list_reuses_listed_tenant(self):
+        client = SaasApiClient()
+        client.list_tenants()
+        self.assertEqual(client.retrieve_tenant("cliente0004")["client_name"], "Cliente 0004")
+        client.retrieve_tenant("cliente0004")
+        self.assertEqual(self.stub.requests, 1)
+
+    def test_outbound_calls_per_view(self):
+        cases = [
+            ("get", reverse("tenants:list"), None, 0),
+            ("get", reverse("tenants:detail", args=["cliente0001"]), None, 0),
+            ("get", reverse("tenants:payments-list"), None, 0),
+            ("get", reverse("tenants:payment", args=["cliente0001"]), None, 1),
+            ("post", reverse("tenants:payment", args=["cliente0001"]), self.payment_data(), 1),
+            ("post", reverse("tenants:payments-create"), self.payment_data(), 0),
+            ("post", reverse("tenants:payments-edit", args=[self.payment.pk]), self.payment_data(), 0),
+        ]
+        for method, url, data, expected in cases:
+            with self.subTest(method=method, url=url):
+                self.stub.reset_counters()
+                response = getattr(self.client, method)(url, data)
+                self.assertLess(response.status_code, 400)
+                self.assertEqual(self.stub.requests, expected)
+
+
+@override_settings(SAAS_API_BREAKER_THRESHOLD=2, SAAS_API_BREAKER_RESET_TIMEOUT=60, SAAS_API_RETRIES=0)
+class CircuitBreakerTest(StubApiTestCase):
+    def test_breaker_opens_fails_fast_and_closes_after_probe(self):
+        client = SaasApiClient()
+        client.base_url = "http://127.0.0.1:9"  # porta fechada: conexão recusada
+        for _ in range(2):
+            with self.assertRaises(SaasApiError):
+                client.retrieve_tenant("cliente0001", use_cache=False)
+        self.assertEqual(client.breaker.state(), CircuitBreaker.OPEN)
+
+        with self.assertRaises(SaasApiUnavailable):
+            client.retrieve_tenant("cliente0001", use_cache=False)
+
+        # Após o tempo de espera, uma chamada de teste bem-sucedida fecha o circuito.
+        cache.set(client.breaker.opened_at_key, time.time() - 61, timeout=None)
+        client.base_url = self.stub.base_url
+        client.retrieve_tenant("cliente0001", use_cache=False)
+        self.assertEqual(client.breaker.state(), CircuitBreaker.CLOSED)
+        self.assertEqual(client.breaker.stats()["transitions"], {"open": 1, "closed": 1})
+
+    def test_open_breaker_falls_back_to_mirror(self):
+        sync_tenants()
+        cache.delete(TENANT_LIST_CACHE_KEY)
+        cache.set(CircuitBreaker().opened_at_key, time.time(), timeout=None)
+        tenant = SaasApiClient().retrieve_tenant("cliente0002")
+        self.assertEqual(tenant["client_name"], "Cliente 0002")
+
+
+class TenantSyncTest(StubApiTestCase):
+    def test_sync_writes_only_changed_rows(self):
+        self.assertEqual(sync_tenants()["created"], 5)
+
+        self.stub.tenants[0]["client_name"] = "Renomeado"
+        del self.stub.tenants[-1]
+        stats = sync_tenants()
+        self.assertEqual(
+            stats, {"created": 0, "updated": 1, "unchanged": 3, "deleted": 1}
+        )
+        self.assertEqual(Tenant.objects.get(schema_name="cliente0001").client_name, "Renomeado")
+
+    def test_list_view_reads_local_table(self):
+        sync_tenants()
+        self.stub.reset_counters()
+        user = User.objects.create_user("operador", password="senha")
+        self.client.force_login(user)
+        response = self.client.get(reverse("tenants:list"))
+        self.assertContains(response, "Cliente 0003")
+        self.assertEqual(self.stub.requests, 0)
+
+
+@override_settings(SAAS_API_CACHE_TTL=0, SAAS_API_RETRY_BACKOFF=0)
+class RetryTest(StubApiTestCase):
+    def test_transient_errors_are_retried(self):
+        self.stub.fail_next = 2
+        with self.assertLogs("apps.tenants.services", "WARNING") as logs:
+            tenants = SaasApiClient().list_tenants()
+        self.assertEqual(len(tenants), 5)
+        self.assertEqual(self.stub.requests, 3)
+        self.assertIn("(3 tentativa(s))", logs.output[0])
+
+    def test_gives_up_after_configured_retries(self):
+        self.stub.fail_next = 3
+        with self.assertLogs("apps.tenants.services", "WARNING"), self.assertRaises(SaasApiError):
+            SaasApiClient().list_tenants()
+        self.assertEqual(self.stub.requests, 3)
+
+    def test_read_timeout_is_not_retried(self):
+        self.stub.latency = 0.3
+        self.addCleanup(setattr, self.stub, "latency", 0)
+        client = SaasApiClient()
+        client.DEFAULT_TIMEOUT = 0.1
+        with self.assertRaises(SaasApiError):
+            client.list_tenants()
+        self.assertEqual(self.stub.requests, 1)
+
+    def test_retried_call_counts_as_one_breaker_failure(self):
+        self.stub.fail_next = 3
+        client = SaasApiClient()
+        with self.assertLogs("apps.tenants.services", "WARNING"), self.assertRaises(SaasApiError):
+            client.list_tenants()
+        self.assertEqual(self.stub.requests, 3)
+        self.assertEqual(client.breaker.stats()["failures"], 1)
+
+    def test_create_retry_reuses_idempotency_key(self):
+        client = SaasApiClient()
+        payload = {"schema_name": "novocliente", "client_name": "Novo Cliente"}
+        self.stub.fail_next = 1
+        with self.assertLogs("apps.tenants.services", "WARNING"):
+            created = client.create_tenant(payload, idempotency_key="job-1")
+        # Um reenvio com a mesma chave devolve a resposta original em vez de "Tenant já existe".
+        self.assertEqual(client.create_tenant(payload, idempotency_key="job-1"), created)
+        self.assertEqual(len([t for t in self.stub.tenants if t["schema_name"] == "novocliente"]), 1)
+
+
+@override_settings(SAAS_API_CACHE_TTL=0, SAAS_API_RETRY_BACKOFF=0)
+class AsyncSaasApiClientTest(StubApiTestCase):
+    def tearDown(self):
+        self.stub.latency = 0
+
+    async def test_retrieve_many_runs_concurrently(self):
+        self.stub.latency = 0.2
+        client = AsyncSaasApiClient()
+        started = time.monotonic()
+        results = await client.retrieve_many(f"cliente{i:04d}" for i in range(1, 6))
+        elapsed = time.monotonic() - started
+        await aclose_async_client()
+        self.assertEqual([r.data["schema_name"] for r in results], [f"cliente{i:04d}" for i in range(1, 6)])
+        self.assertTrue(all(r.error is None for r in results))
+        # Sequencial levaria ~1s (5 x 200 ms).
+        self.assertLess(elapsed, 0.8)
+
+    async def test_transient_errors_are_retried(self):
+        self.stub.fail_next = 1
+        client = AsyncSaasApiClient()
+        with self.assertLogs("apps.tenants.services", "WARNING") as logs:
+            tenant = await client.retrieve_tenant("cliente0001")
+        await aclose_async_client()
+        self.assertEqual(tenant["schema_name"], "cliente0001")
+        self.assertIn("(2 tentativa(s))", logs.output[0])
+
+    async def test_update_many_reports_each_result(self):
+        received = []
+
+        async def on_result(result):
+            received.append(result.schema_name)
+
+        client = AsyncSaasApiClient()
+        results = await client.update_many(
+            ["cliente0001", "inexistente"], {"client_name": "Renomeado"}, on_result=on_result
+        )
+        await aclose_async_client()
+        self.assertEqual(sorted(received), ["cliente0001", "inexistente"])
+        self.assertIsNone(results[0].error)
+        self.assertIsNotNone(results[1].error)
+
+    async def test_breaker_cache_access_runs_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        threads = []
+        allow_request = CircuitBreaker.allow_request
+
+        def tracked(breaker):
+            threads.append(threading.get_ident())
+            return allow_request(breaker)
+
+        client = AsyncSaasApiClient()
+        with mock.patch.object(CircuitBreaker, "allow_request", tracked):
+            await client.retrieve_tenant("cliente0001")
+        await aclose_async_client()
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+
+class AsyncRequestMixin:
+    async def async_request(self, path: str = "/", user=None):
+        request = AsyncRequestFactory().get(path)
+        request.user = user or AnonymousUser()
+
+        async def auser():
+            return request.user
+
+        request.auser = auser
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+
+@override_settings(SAAS_API_CACHE_TTL=0)
+class AsyncViewsTest(AsyncRequestMixin, StubApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("operador", password="senha")
+
+    def tearDown(self):
+        async_to_sync(aclose_async_client)()
+
+    async def test_detail_fetches_and_mirrors_unsynced_tenant(self):
+        request = await self.async_request(user=self.user)
+        response = await async_views.tenant_detail(request, schema_name="cliente0001")
+        self.assertContains(response, "Cliente 0001")
+        self.assertTrue(await Tenant.objects.filter(schema_name="cliente0001").aexists())
+
+    async def test_update_form_starts_from_api(self):
+        self.stub.tenants[1]["client_name"] = "Nome Atual na API"
+        request = await self.async_request(user=self.user)
+        response = await async_views.tenant_update(request, schema_name="cliente0002")
+        # Como o handler ASGI do Django, renderiza o TemplateResponse fora do event loop.
+        await sync_to_async(response.render)()
+        self.assertContains(response, "Nome Atual na API")
+        self.assertEqual(self.stub.requests, 1)
+
+    async def test_anonymous_user_is_redirected_to_login(self):
+        response = await async_views.tenant_detail(await self.async_request(), schema_name="cliente0001")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.stub.requests, 0)
+
+
+@override_settings(SAAS_API_CACHE_TTL=0)
+class AsyncMiddlewareTest(AsyncRequestMixin, StubApiTestCase):
+    async def test_timing_middleware_reports_async_api_calls(self):
+        async def view(request):
+            await AsyncSaasApiClient().retrieve_tenant("cliente0001")
+            await aclose_async_client()
+            return HttpResponse("ok")
+
+        middleware = SaasApiTimingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(await self.async_request())
+        self.assertIn('saas-api;dur=', response["Server-Timing"])
+        self.assertIn('desc="1 chamada(s)"', response["Server-Timing"])
+
+    async def test_lock_screen_redirects_locked_session(self):
+        async def view(request):
+            return HttpResponse("ok")
+
+        middleware = LockScreenMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        user = await User.objects.acreate_user("operador", password="senha")
+        request = await self.async_request("/tenants/", user=user)
+        self.assertEqual((await middleware(request)).content, b"ok")
+        await request.session.aset("is_locked", True)
+        response = await middleware(request)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse("pages:unlock_screen"))
+
+    async def test_cache_control_and_auditlog_pass_through(self):
+        async def view(request):
+            return HttpResponse("<html></html>", content_type="text/html")
+
+        middleware = AuditlogMiddleware(CacheControlMiddleware(view))
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(await self.async_request())
+        self.assertEqual(response["Cache-Control"], "no-cache, no-store, must-revalidate")
+
+
+@override_settings(TENANT_JOBS_BACKEND="sync")
+class TenantProvisioningTest(StubApiTestCase):
+    def test_create_view_queues_job_and_reports_status(self):
+        user = User.objects.create_user("operador", password="senha")
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("tenants:create"),
+            {
+                "schema_name": "novocliente",
+                "client_name": "Novo Cliente",
+                "email": "admin@novocliente.com",
+                "primary_domain": "novocliente.example.com",
+                "generate_password": "on",
+            },
+        )
+        job = TenantProvisioningJob.objects.get()
+        self.assertRedirects(response, reverse("tenants:provisioning", kwargs={"pk": job.pk}))
+        self.assertEqual(job.status, TenantProvisioningJob.STATUS_SUCCEEDED)
+        self.assertNotIn("password", job.payload)
+        self.assertTrue(Tenant.objects.filter(schema_name="novocliente").exists())
+
+        status = self.client.get(reverse("tenants:provisioning-status", kwargs={"pk": job.pk})).json()
+        self.assertTrue(status["finished"])
+        self.assertEqual(status["status"], "succeeded")
+
+    @override_settings(TENANT_JOBS_BACKEND="worker")
+    def test_password_is_encrypted_while_queued_and_discarded_after_run(self):
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        self.client.post(
+            reverse("tenants:create"),
+            {
+                "schema_name": "novocliente",
+                "client_name": "Novo Cliente",
+                "email": "admin@novocliente.com",
+                "primary_domain": "novocliente.example.com",
+                "password": "SenhaForte123",
+            },
+        )
+        job = TenantProvisioningJob.objects.get()
+        self.assertEqual(job.status, TenantProvisioningJob.STATUS_PENDING)
+        self.assertNotIn("password", job.payload)
+        self.assertNotIn("SenhaForte123", job.encrypted_password)
+        self.assertEqual(job.get_password(), "SenhaForte123")
+
+        self.assertTrue(run_provisioning_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, TenantProvisioningJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.encrypted_password, "")
+
+    def test_unexpected_error_fails_job_and_discards_password(self):
+        job = TenantProvisioningJob(schema_name="novocliente", payload={"schema_name": "novocliente"})
+        job.set_password("SenhaForte123")
+        job.save()
+        with mock.patch.object(SaasApiClient, "create_tenant", side_effect=RuntimeError("boom")), self.assertLogs(
+            "apps.tenants.jobs", "ERROR"
+        ):
+            self.assertTrue(run_provisioning_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, TenantProvisioningJob.STATUS_FAILED)
+        self.assertIn("boom", job.error)
+        self.assertEqual(job.encrypted_password, "")
+
+    def test_stale_jobs_are_marked_failed(self):
+        old = timezone.now() - timedelta(hours=1)
+        running = TenantProvisioningJob.objects.create(
+            schema_name="travado", status=TenantProvisioningJob.STATUS_RUNNING, started_at=old, encrypted_password="x"
+        )
+        recent = TenantProvisioningJob.objects.create(
+            schema_name="recente", status=TenantProvisioningJob.STATUS_RUNNING, started_at=timezone.now()
+        )
+        self.assertEqual(recover_stale_jobs(), 1)
+        running.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(running.status, TenantProvisioningJob.STATUS_FAILED)
+        self.assertEqual(running.encrypted_password, "")
+        self.assertEqual(recent.status, TenantProvisioningJob.STATUS_RUNNING)
+
+    def test_queued_jobs_wait_for_the_worker(self):
+        job = TenantProvisioningJob.objects.create(schema_name="nafila", encrypted_password="x")
+        TenantProvisioningJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        with override_settings(TENANT_JOBS_BACKEND="worker"):
+            self.assertEqual(recover_stale_jobs(), 0)
+        with override_settings(TENANT_JOBS_BACKEND="thread"):
+            self.assertEqual(recover_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, TenantProvisioningJob.STATUS_FAILED)
+
+    def test_resubmitted_form_does_not_queue_a_second_job(self):
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        data = {
+            "schema_name": "novocliente",
+            "client_name": "Novo Cliente",
+            "email": "admin@novocliente.com",
+            "primary_domain": "novocliente.example.com",
+            "generate_password": "on",
+            "idempotency_key": "formulario-1",
+        }
+        first = self.client.post(reverse("tenants:create"), data)
+        second = self.client.post(reverse("tenants:create"), data)
+        self.assertEqual(TenantProvisioningJob.objects.count(), 1)
+        self.assertEqual(first.url, second.url)
+
+
+@override_settings(TENANT_JOBS_BACKEND="sync")
+class TenantBulkUpdateTest(StubApiTestCase):
+    def test_bulk_update_reports_per_tenant_and_resumes_failures(self):
+        sync_tenants()
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        response = self.client.post(
+            reverse("tenants:bulk-update"),
+            {"schema_names": ["cliente0001", "cliente0002"], "staff_licenses": 25},
+        )
+        bulk = TenantBulkUpdate.objects.get()
+        self.assertRedirects(response, reverse("tenants:bulk-update-detail", kwargs={"pk": bulk.pk}))
+        self.assertEqual(bulk.status, TenantBulkUpdate.STATUS_SUCCEEDED)
+        self.assertEqual(Tenant.objects.get(schema_name="cliente0002").staff_licenses, 25)
+
+        # Um tenant removido da API falha sem impedir os demais.
+        bulk = TenantBulkUpdate.objects.create(schema_names=["cliente0003", "cliente0004"], patch={"storage_gb": 50})
+        removed = self.stub.tenants.pop(3)
+        run_bulk_update(bulk.pk)
+        bulk.refresh_from_db()
+        self.assertEqual(bulk.status, TenantBulkUpdate.STATUS_PARTIAL)
+        self.assertEqual(bulk.pending_schema_names, ["cliente0004"])
+        self.assertContains(self.client.get(reverse("tenants:bulk-update-detail", kwargs={"pk": bulk.pk})), "Falhou")
+
+        # A retomada reenvia apenas o tenant que falhou, com um Idempotency-Key
+        # novo: a API não devolve de novo o 404 guardado da primeira execução.
+        self.stub.tenants.append(removed)
+        requests_before = self.stub.requests
+        self.client.post(reverse("tenants:bulk-update-detail", kwargs={"pk": bulk.pk}))
+        bulk.refresh_from_db()
+        self.assertEqual(bulk.status, TenantBulkUpdate.STATUS_SUCCEEDED)
+        self.assertEqual(bulk.attempts, 2)
+        self.assertEqual(self.stub.requests - requests_before, 1)
+
+    def test_interrupted_run_can_be_resumed_when_stale(self):
+        sync_tenants()
+        bulk = TenantBulkUpdate.objects.create(
+            schema_names=["cliente0001", "cliente0002"],
+            patch={"storage_gb": 50},
+            status=TenantBulkUpdate.STATUS_RUNNING,
+            attempts=1,
+            results={"cliente0001": {"ok": True, "error": "", "at": ""}},
+        )
+        # Em execução e com progresso recente: não é retomada.
+        self.assertFalse(resume_bulk_update(bulk))
+
+        TenantBulkUpdate.objects.filter(pk=bulk.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        requests_before = self.stub.requests
+        self.assertTrue(resume_bulk_update(bulk))
+        bulk.refresh_from_db()
+        self.assertEqual(bulk.status, TenantBulkUpdate.STATUS_SUCCEEDED)
+        self.assertEqual(self.stub.requests - requests_before, 1)
+
+
+class MonthlyPricesViewTest(StubApiTestCase):
+    def test_prices_are_served_with_etag_and_refreshed_after_sync(self):
+        sync_tenants()
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        url = reverse("tenants:monthly-prices")
+        response = self.client.get(url)
+        self.assertEqual(response.json()["prices"]["cliente0001"], "101.00")
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": response["ETag"]}).status_code, 304)
+
+        self.stub.tenants[0]["monthly_price"] = 150
+        sync_tenants()
+        refreshed = self.client.get(url, headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertEqual(refreshed.json()["prices"]["cliente0001"], "150.00")
+
+
+class RevenueAnalyticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        for schema_name, paid_until, on_trial in (
+            ("alfa", date(2026, 3, 1), False),
+            ("beta", date(2026, 2, 1), False),
+            ("gama", date(2026, 4, 30), False),
+            ("teste", date(2026, 1, 1), True),
+        ):
+            Tenant.objects.create(
+                schema_name=schema_name, paid_until=paid_until, on_trial=on_trial, synced_at=timezone.now()
+            )
+        for schema_name, amount, payment_date, status in (
+            ("alfa", "100.00", date(2026, 1, 10), TenantPayment.STATUS_PAID),
+            ("alfa", "100.00", date(2026, 2, 10), TenantPayment.STATUS_PAID),
+            ("alfa", "100.00", date(2026, 3, 10), TenantPayment.STATUS_PAID),
+            ("beta", "50.00", date(2026, 1, 5), TenantPayment.STATUS_PAID),
+            ("gama", "999.00", date(2026, 2, 5), TenantPayment.STATUS_REFUNDED),
+            ("gama", "200.00", date(2026, 3, 5), TenantPayment.STATUS_PAID),
+        ):
+            TenantPayment.objects.create(
+                schema_name=schema_name, amount=amount, payment_date=payment_date, status=status
+            )
+
+    def test_monthly_indicators(self):
+        summary = revenue_summary(3, last=date(2026, 3, 1))
+        self.assertEqual([row["month"] for row in summary], ["2026-01", "2026-02", "2026-03"])
+        self.assertEqual([row["revenue"] for row in summary], [150, 100, 300])
+        self.assertEqual([row["paying_tenants"] for row in summary], [2, 1, 2])
+        # beta segue no MRR de fevereiro (um mês de carência) e sai em março.
+        self.assertEqual([row["mrr"] for row in summary], [150, 150, 300])
+        self.assertEqual([row["churned_tenants"] for row in summary], [0, 0, 1])
+        self.assertEqual(summary[2]["new_tenants"], 1)
+        self.assertEqual(summary[2]["churn_rate"], 0.5)
+
+    def test_cached_month_is_invalidated_by_new_payment(self):
+        revenue_summary(3, last=date(2026, 3, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            TenantPayment.objects.create(schema_name="beta", amount="50.00", payment_date=date(2026, 2, 5))
+            # Até o commit, o mês segue em cache: uma leitura concorrente o regravaria com os totais antigos.
+            self.assertIsNotNone(cache.get(month_cache_key(date(2026, 2, 1))))
+        with self.assertNumQueries(1):
+            summary = revenue_summary(3, last=date(2026, 3, 1))
+        self.assertEqual(summary[1]["revenue"], 150)
+
+    @override_settings(TENANT_ANALYTICS_CURRENT_MONTH_TTL=60, TENANT_ANALYTICS_CLOSED_MONTH_TTL=3600)
+    def test_closed_months_expire(self):
+        with (
+            mock.patch("apps.tenants.analytics.cache") as analytics_cache,
+            mock.patch("django.utils.timezone.localdate", return_value=date(2026, 3, 15)),
+        ):
+            analytics_cache.get_many.return_value = {}
+            revenue_summary(2)
+        timeouts = {call.args[0]: call.kwargs["timeout"] for call in analytics_cache.set.call_args_list}
+        self.assertEqual(timeouts[month_cache_key(date(2026, 1, 1))], 3600)
+        self.assertEqual(timeouts[month_cache_key(date(2026, 3, 1))], 60)
+
+    def test_overdue_tenants(self):
+        overdue = overdue_tenants(today=date(2026, 3, 20))
+        self.assertEqual([tenant.schema_name for tenant in overdue], ["beta"])
+
+    def test_overdue_tenants_include_tenants_that_never_paid(self):
+        Tenant.objects.create(schema_name="delta", paid_until=date(2026, 3, 1), synced_at=timezone.now())
+        overdue = overdue_tenants(today=date(2026, 3, 20))
+        self.assertEqual([tenant.schema_name for tenant in overdue], ["beta", "delta"])
+        self.assertIsNone(overdue[1].last_payment)
+        self.assertEqual(overdue[0].last_payment, date(2026, 1, 5))
+
+    def test_dashboard_and_json_endpoint(self):
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        self.assertContains(self.client.get(reverse("tenants:revenue")), "Clientes em atraso")
+        data = self.client.get(reverse("tenants:revenue-data"), {"months": 6}).json()
+        self.assertEqual(len(data["months"]), 6)
+        self.assertIn("overdue", data)
+
+
+class PaymentRollupTest(TestCase):
+    def rollup(self):
+        return sorted(
+            TenantPaymentMonthly.objects.values_list("schema_name", "month", "status", "total", "count")
+        )
+
+    def test_rollup_follows_payment_changes(self):
+        payment = TenantPayment.objects.create(schema_name="alfa", amount="100.00", payment_date=date(2026, 1, 10))
+        TenantPayment.objects.create(schema_name="alfa", amount="50.00", payment_date=date(2026, 1, 20))
+        self.assertEqual(self.rollup(), [("alfa", date(2026, 1, 1), "paid", Decimal("150.00"), 2)])
+
+        payment.payment_date = date(2026, 2, 1)
+        payment.status = TenantPayment.STATUS_REFUNDED
+        payment.save()
+        self.assertEqual(
+            self.rollup(),
+            [
+                ("alfa", date(2026, 1, 1), "paid", Decimal("50.00"), 1),
+                ("alfa", date(2026, 2, 1), "refunded", Decimal("100.00"), 1),
+            ],
+        )
+        payment.delete()
+        self.assertEqual(self.rollup(), [("alfa", date(2026, 1, 1), "paid", Decimal("50.00"), 1)])
+
+    def test_incremental_refresh_and_rebuild_pick_up_bulk_writes(self):
+        TenantPayment.objects.create(schema_name="alfa", amount="100.00", payment_date=date(2026, 1, 10))
+        # bulk_create não dispara signals.
+        TenantPayment.objects.bulk_create(
+            [TenantPayment(schema_name="beta", amount="30.00", payment_date=date(2026, 1, day)) for day in (1, 2)]
+        )
+        self.assertEqual(len(self.rollup()), 1)
+        # alfa também é recalculado: está dentro da folga do modo incremental.
+        self.assertEqual(refresh_changed(), 2)
+        expected = [
+            ("alfa", date(2026, 1, 1), "paid", Decimal("100.00"), 1),
+            ("beta", date(2026, 1, 1), "paid", Decimal("60.00"), 2),
+        ]
+        self.assertEqual(self.rollup(), expected)
+        self.assertEqual(rebuild(), 2)
+        self.assertEqual(self.rollup(), expected)
+
+    def test_signal_updates_do_not_advance_incremental_watermark(self):
+        now = timezone.now()
+        TenantPaymentRollupState.objects.create(pk=1, refreshed_until=now - timedelta(hours=2))
+        TenantPayment.objects.bulk_create(
+            [TenantPayment(schema_name="beta", amount="30.00", payment_date=date(2026, 1, 1))]
+        )
+        TenantPayment.objects.filter(schema_name="beta").update(updated_at=now - timedelta(hours=1))
+        # Um save comum atualiza o consolidado pelos signals depois do bulk_create.
+        TenantPayment.objects.create(schema_name="alfa", amount="100.00", payment_date=date(2026, 1, 10))
+
+        refresh_changed()
+        self.assertIn(("beta", date(2026, 1, 1), "paid", Decimal("30.00"), 1), self.rollup())
+        self.assertGreaterEqual(TenantPaymentRollupState.objects.get().refreshed_until, now)
+
+    def test_refresh_and_rebuild_invalidate_cached_months(self):
+        cache.clear()
+        TenantPayment.objects.create(schema_name="alfa", amount="10.00", payment_date=date(2026, 1, 10))
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild()
+        self.assertEqual(revenue_summary(1, last=date(2026, 1, 1))[0]["revenue"], 10)
+
+        TenantPayment.objects.bulk_create(
+            [TenantPayment(schema_name="beta", amount="20.00", payment_date=date(2026, 1, 5))]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_changed()
+        self.assertEqual(revenue_summary(1, last=date(2026, 1, 1))[0]["revenue"], 30)
+
+        TenantPayment.objects.bulk_create(
+            [TenantPayment(schema_name="gama", amount="20.00", payment_date=date(2026, 1, 6))]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild()
+        self.assertEqual(revenue_summary(1, last=date(2026, 1, 1))[0]["revenue"], 50)
+
+
+class PaymentKeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        # Várias datas repetidas: o desempate vem de created_at e id.
+        for i in range(7):
+            TenantPayment.objects.create(schema_name="alfa", amount="10.00", payment_date=date(2026, 1, 1 + i % 3))
+        self.expected = list(TenantPayment.objects.values_list("id", flat=True))
+
+    def fetch(self, cursor=None):
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        return self.client.get(reverse("tenants:payments-api"), params).json()
+
+    def test_api_walks_forward_and_back(self):
+        pages = [self.fetch()]
+        while pages[-1]["next"]:
+            pages.append(self.fetch(pages[-1]["next"]))
+        self.assertEqual([len(page["results"]) for page in pages], [3, 3, 1])
+        self.assertEqual([row["id"] for page in pages for row in page["results"]], self.expected)
+        self.assertIsNone(pages[0]["previous"])
+
+        back = self.fetch(pages[-1]["previous"])
+        self.assertEqual(back["results"], pages[1]["results"])
+        first = self.fetch(back["previous"])
+        self.assertEqual(first["results"], pages[0]["results"])
+        self.assertIsNone(first["previous"])
+
+    def test_tampered_cursor_is_rejected(self):
+        cursor = self.fetch()["next"]
+        response = self.client.get(reverse("tenants:payments-api"), {"cursor": cursor[:-2] + "xx"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_html_list_is_paginated(self):
+        response = self.client.get(reverse("tenants:payments-list"))
+        self.assertEqual(len(response.context["payments"]), 7)
+        with mock.patch.object(TenantPaymentListView, "paginate_by", 3):
+            response = self.client.get(reverse("tenants:payments-list"))
+        self.assertEqual(len(response.context["payments"]), 3)
+        self.assertContains(response, "cursor=")
+
+
+class PaymentExportTest(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        TenantPayment.objects.create(schema_name="alfa", amount="100.00", payment_date=date(2026, 1, 10))
+        TenantPayment.objects.create(schema_name="beta", amount="50.00", payment_date=date(2026, 2, 10))
+        TenantPayment.objects.create(
+            schema_name="alfa", amount="70.00", payment_date=date(2026, 3, 10), status=TenantPayment.STATUS_REFUNDED
+        )
+
+    def test_csv_is_streamed_with_filters(self):
+        response = self.client.get(reverse("tenants:payments-export"), {"schema_name": "alfa", "status": "paid"})
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+        self.assertEqual(rows[0][:4], ["Data do pagamento", "Schema do tenant", "Nome do cliente", "Valor"])
+        self.assertEqual([row[:4] for row in rows[1:]], [["2026-01-10", "alfa", "", "100.00"]])
+        self.assertEqual(rows[1][5], "Pago")
+
+    def test_csv_neutralizes_formulas_in_free_text(self):
+        TenantPayment.objects.create(
+            schema_name="gama",
+            client_name="=HYPERLINK(\"http://x\")",
+            amount="10.00",
+            payment_date=date(2026, 4, 10),
+            reference="+55 11",
+            notes="@SUM(A1)",
+        )
+        response = self.client.get(reverse("tenants:payments-export"), {"schema_name": "gama"})
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertTrue(content.startswith("\ufeff"))
+        row = list(csv.reader(io.StringIO(content[1:])))[1]
+        self.assertEqual(row[2], "'=HYPERLINK(\"http://x\")")
+        self.assertEqual(row[6], "'+55 11")
+        self.assertEqual(row[7], "'@SUM(A1)")
+
+    def test_xlsx_writes_formula_like_text_as_string(self):
+        TenantPayment.objects.create(
+            schema_name="gama",
+            client_name="=HYPERLINK(\"http://x\")",
+            amount="10.00",
+            payment_date=date(2026, 4, 10),
+            notes="\t-1+1",
+        )
+        response = self.client.get(reverse("tenants:payments-export"), {"format": "xlsx", "schema_name": "gama"})
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)))
+        client_name, notes = workbook["Pagamentos"]["C2"], workbook["Pagamentos"]["H2"]
+        self.assertEqual(client_name.data_type, "s")
+        self.assertEqual(client_name.value, "=HYPERLINK(\"http://x\")")
+        self.assertEqual(notes.data_type, "s")
+
+    def test_xlsx_export(self):
+        response = self.client.get(reverse("tenants:payments-export"), {"format": "xlsx"})
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True)
+        rows = list(workbook["Pagamentos"].iter_rows(values_only=True))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][1], "alfa")
+        self.assertEqual(rows[1][3], 70)
+        self.assertEqual(rows[1][5], "Estornado")
+
+
+class StatementImportTest(TestCase):
+    OFX = (
+        "OFXHEADER:100\nDATA:OFXSGML\nCHARSET:1252\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>"
+        "<BANKACCTFROM><BANKID>0001<ACCTID>123</BANKACCTFROM><BANKTRANLIST>"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260110120000[-3:BRT]<TRNAMT>100.00<FITID>A1<MEMO>PIX alfa</STMTTRN>"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260111<TRNAMT>300.00<FITID>A2<NAME>CONSTRUTORA HORIZONTE LTDA</STMTTRN>"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260112<TRNAMT>80.00<FITID>A3<MEMO>TED recebida</STMTTRN>"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260113<TRNAMT>100.00<FITID>A4<MEMO>Depósito</STMTTRN>"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260114<TRNAMT>12.34<FITID>A5<MEMO>Depósito</STMTTRN>"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260115<TRNAMT>-50.00<FITID>A6<MEMO>Tarifa</STMTTRN>"
+        "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>"
+    )
+
+    def setUp(self):
+        now = timezone.now()
+        Tenant.objects.create(schema_name="alfa", client_name="Alfa", monthly_price="100.00", synced_at=now)
+        Tenant.objects.create(schema_name="beta", client_name="Construtora Horizonte", monthly_price="100.00", synced_at=now)
+        Tenant.objects.create(schema_name="gama", client_name="Gama", monthly_price="80.00", synced_at=now)
+
+    def _import(self, content: str, name: str = "extrato.ofx", **kwargs):
+        return import_statement(io.BytesIO(content.encode("cp1252")), name, **kwargs)
+
+    def test_ofx_lines_are_reconciled(self):
+        record = self._import(self.OFX)
+        statuses = {line["transaction_id"]: (line["status"], line["schema_name"], line["rule"]) for line in record.lines}
+        self.assertEqual(statuses["ofx:123:A1"], ("created", "alfa", "reference"))
+        self.assertEqual(statuses["ofx:123:A2"], ("created", "beta", "name"))
+        # Só o valor coincide: sugerido para revisão, sem criar pagamento.
+        self.assertEqual(statuses["ofx:123:A3"], ("review", "gama", "amount"))
+        self.assertEqual(statuses["ofx:123:A4"][0], "ambiguous")
+        self.assertEqual(statuses["ofx:123:A5"][0], "unmatched")
+        self.assertEqual(statuses["ofx:123:A6"][0], "ignored")
+        self.assertIn("3 mensalidades", record.lines[1]["message"])
+
+        payment = TenantPayment.objects.get(bank_transaction_id="ofx:123:A1")
+        self.assertEqual((payment.amount, payment.payment_date), (Decimal("100.00"), date(2026, 1, 10)))
+        # bulk_create não dispara signals: o consolidado é atualizado pela importação.
+        self.assertEqual(TenantPaymentMonthly.objects.get(schema_name="beta").total, Decimal("300.00"))
+
+        self.assertFalse(TenantPayment.objects.filter(bank_transaction_id="ofx:123:A3").exists())
+
+        again = self._import(self.OFX)
+        self.assertEqual(again.summary["duplicate"], 2)
+        self.assertEqual(again.summary["review"], 1)
+        self.assertEqual(TenantPayment.objects.count(), 2)
+
+    def test_csv_dry_run(self):
+        content = "Data;Histórico;Valor\n10/01/2026;PIX ALFA;1.100,00\n10/01/2026;PIX ALFA;1.100,00\n11/01/2026;Tarifa;-5,00\n"
+        record = self._import(content, "extrato.csv", dry_run=True)
+        self.assertEqual(record.summary, {"matched": 2, "ignored": 1})
+        self.assertNotEqual(record.lines[0]["transaction_id"], record.lines[1]["transaction_id"])
+        self.assertEqual(record.lines[0]["amount"], "1100.00")
+        self.assertFalse(TenantPayment.objects.exists())
+
+    def test_invalid_file_is_reported(self):
+        record = self._import("Data;Valor\n32/01/2026;10,00\n", "extrato.csv")
+        self.assertIn("Linha 2", record.error)
+
+    def test_import_view(self):
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        upload = SimpleUploadedFile("extrato.ofx", self.OFX.encode("cp1252"))
+        response = self.client.post(reverse("tenants:payments-import"), {"file": upload})
+        self.assertEqual(TenantPayment.objects.count(), 2)
+        response = self.client.get(response.url, {"status": "ambiguous"})
+        self.assertEqual([line["line"] for line in response.context["lines"]], [4])
+
+
+class InvoiceStorageTest(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.media_root = media.name
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+
+    def _payment(self, file_name: str, content: bytes = b"%PDF-1.4 nota fiscal"):
+        return TenantPayment.objects.create(
+            schema_name="alfa",
+            amount="100.00",
+            payment_date=date(2026, 1, 10),
+            invoice_file=SimpleUploadedFile(file_name, content),
+        )
+
+    def test_identical_files_are_stored_once(self):
+        first = self._payment("janeiro.pdf")
+        second = self._payment("copia.PDF")
+        self.assertEqual(first.invoice_file.name, second.invoice_file.name)
+        self.assertEqual(len(first.invoice_sha256), 64)
+        self.assertEqual((first.invoice_name, second.invoice_name), ("janeiro.pdf", "copia.PDF"))
+        files = [name for _, _, names in os.walk(self.media_root) for name in names]
+        self.assertEqual(files, [f"{first.invoice_sha256}.pdf"])
+
+    def test_download_with_cache_and_range(self):
+        payment = self._payment("janeiro.pdf")
+        url = reverse("tenants:payments-invoice", args=[payment.pk])
+
+        response = self.client.get(url, {"v": payment.invoice_sha256})
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.4 nota fiscal")
+        self.assertEqual(response["ETag"], f'"{payment.invoice_sha256}"')
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn('filename="janeiro.pdf"', response["Content-Disposition"])
+
+        response = self.client.get(url, headers={"If-None-Match": f'"{payment.invoice_sha256}"'})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, headers={"Range": "bytes=5-7"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"1.4")
+        self.assertEqual(response["Content-Range"], "bytes 5-7/20")
+
+        response = self.client.get(url, headers={"Range": "bytes=-5", "If-Range": '"outra-versao"'})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, headers={"Range": "bytes=50-"})
+        self.assertEqual(response.status_code, 416)
+
+
+class PaymentReceiptsTest(TestCase):
+    def setUp(self):
+        receipts = tempfile.TemporaryDirectory()
+        self.addCleanup(receipts.cleanup)
+        self.enterContext(override_settings(TENANT_RECEIPT_DIR=receipts.name))
+        self.alfa = TenantPayment.objects.create(
+            schema_name="alfa", client_name="Alfa & Cia", amount="1234.50", payment_date=date(2026, 1, 10)
+        )
+        TenantPayment.objects.create(schema_name="beta", amount="50.00", payment_date=date(2026, 1, 20))
+        TenantPayment.objects.create(schema_name="gama", amount="70.00", payment_date=date(2026, 2, 1))
+
+    def _build(self, **kwargs):
+        file = io.BytesIO()
+        counts = build_receipts_zip(month_payments(date(2026, 1, 1)), file, **kwargs)
+        return counts, zipfile.ZipFile(file)
+
+    def test_only_changed_payments_are_rendered_again(self):
+        counts, archive = self._build()
+        self.assertEqual(counts, {"total": 2, "rendered": 2, "cached": 0})
+        self.assertEqual(archive.namelist(), [f"recibo-{self.alfa.pk:06d}-alfa.pdf", mock.ANY])
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b"%PDF"))
+
+        self.assertEqual(self._build()[0], {"total": 2, "rendered": 0, "cached": 2})
+        self.alfa.reference = "NF 10"
+        self.alfa.save()
+        self.assertEqual(self._build()[0], {"total": 2, "rendered": 1, "cached": 1})
+
+    def test_old_versions_are_pruned_only_on_request(self):
+        self._build()
+        self.alfa.reference = "NF 10"
+        self.alfa.save()
+        storage = receipt_storage()
+        self._build()
+        self.assertEqual(len(storage.listdir(str(self.alfa.pk))[1]), 2)
+        self.alfa.reference = "NF 11"
+        self.alfa.save()
+        counts, archive = self._build(prune=True)
+        self.assertEqual(counts["rendered"], 1)
+        self.assertEqual(len(storage.listdir(str(self.alfa.pk))[1]), 1)
+
+    def test_receipts_view(self):
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        with mock.patch("apps.tenants.views.build_receipts_zip", wraps=build_receipts_zip) as build:
+            response = self.client.get(reverse("tenants:payments-receipts"), {"month": "2026-02"})
+        self.assertEqual(build.call_args.kwargs, {"workers": 1})
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="recibos-2026-02.zip"')
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 1)
+
+
+class TenantListViewTest(StubApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.stub.tenants = make_tenants(30)
+        sync_tenants()
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+
+    def test_list_is_paginated_and_sorted(self):
+        response = self.client.get(reverse("tenants:list"), {"sort": "-client_name"})
+        page = response.context["page_obj"]
+        self.assertEqual(page.paginator.count, 30)
+        self.assertEqual(len(page.object_list), 25)
+        self.assertEqual(page.object_list[0].client_name, "Cliente 0030")
+
+    def test_list_filters_by_search_and_status(self):
+        response = self.client.get(reverse("tenants:list"), {"q": "cliente002", "status": "trial"})
+        names = [tenant.schema_name for tenant in response.context["page_obj"].object_list]
+        self.assertEqual(names, ["cliente0020", "cliente0025"])
+
+
+class SaasApiMetricsTest(StubApiTestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def test_calls_are_recorded_by_path_template_and_summarized_per_request(self):
+        user = User.objects.create_user("admin", password="senha", is_staff=True)
+        self.client.force_login(user)
+        with override_settings(SAAS_API_DEBUG_PANEL=True):
+            response = self.client.get(reverse("tenants:update", kwargs={"schema_name": "cliente0001"}))
+        self.assertIn('saas-api;dur=', response["Server-Timing"])
+        self.assertContains(response, 'id="saas-api-panel"')
+
+        SaasApiClient().retrieve_tenant("cliente0002", use_cache=False)
+        calls = self.client.get(reverse("tenants:metrics"), {"format": "json"}).json()["calls"]
+        self.assertEqual(
+            [(c["method"], c["path"], c["status"], c["count"]) for c in calls],
+            [("GET", "api/tenants/{schema_name}/", "200", 2)],
+        )
+        self.assertIn(
+            'saas_api_request_duration_ms_count{method="GET",path="api/tenants/{schema_name}/",status="200"} 2',
+            self.client.get(reverse("tenants:metrics")).content.decode(),
+        )
+
+    def test_metrics_require_staff(self):
+        self.client.force_login(User.objects.create_user("operador", password="senha"))
+        self.assertEqual(self.client.get(reverse("tenants:metrics")).status_code, 403)
@@ -1,14 +1,29 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import (
+    SaasApiMetricsView,
+    TenantBulkUpdateDetailView,
+    TenantBulkUpdateView,
     TenantCreateView,
     TenantDetailView,
     TenantListView,
+    TenantMonthlyPricesView,
+    TenantPaymentApiView,
     TenantPaymentCreateView,
     TenantPaymentDeleteView,
     TenantPaymentEditView,
+    TenantPaymentExportView,
+    TenantPaymentInvoiceView,
     TenantPaymentListView,
+    TenantPaymentReceiptsView,
     TenantPaymentUpdateView,
+    TenantProvisioningJobStatusView,
+    TenantProvisioningJobView,
+    TenantRevenueDataView,
+    TenantRevenueView,
+    TenantStatementImportDetailView,
+    TenantStatementImportView,
     TenantUpdateView,
 )
 
@@ -16,13 +31,48 @@ from .views import (
 app_name = "tenants"
 
 
+if getattr(settings, "TENANT_ASYNC_VIEWS", False):
+    from . import async_views
+
+    detail_view = async_views.tenant_detail
+    update_view = async_views.tenant_update
+    payment_view = async_views.tenant_payment
+else:
+    detail_view = TenantDetailView.as_view()
+    update_view = TenantUpdateView.as_view()
+    payment_view = TenantPaymentUpdateView.as_view()
+
+
 urlpatterns = [
     path("", TenantListView.as_view(), name="list"),
     path("novo/", TenantCreateView.as_view(), name="create"),
+    path("provisionamentos/<int:pk>/", TenantProvisioningJobView.as_view(), name="provisioning"),
+    path(
+        "provisionamentos/<int:pk>/status/",
+        TenantProvisioningJobStatusView.as_view(),
+        name="provisioning-status",
+    ),
+    path("lote/", TenantBulkUpdateView.as_view(), name="bulk-update"),
+    path("lote/<int:pk>/", TenantBulkUpdateDetailView.as_view(), name="bulk-update-detail"),
+    path("metricas/", SaasApiMetricsView.as_view(), name="metrics"),
+    path("precos/", TenantMonthlyPricesView.as_view(), name="monthly-prices"),
+    path("receita/", TenantRevenueView.as_view(), name="revenue"),
+    path("receita/dados/", TenantRevenueDataView.as_view(), name="revenue-data"),
     path("pagamentos/", TenantPaymentListView.as_view(), name="payments-list"),
     path("pagamentos/novo/", TenantPaymentCreateView.as_view(), name="payments-create"),
+    path("pagamentos/api/", TenantPaymentApiView.as_view(), name="payments-api"),
+    path("pagamentos/exportar/", TenantPaymentExportView.as_view(), name="payments-export"),
+    path("pagamentos/recibos/", TenantPaymentReceiptsView.as_view(), name="payments-receipts"),
+    path("pagamentos/importar/", TenantStatementImportView.as_view(), name="payments-import"),
+    path(
+        "pagamentos/importacoes/<int:pk>/",
+        TenantStatementImportDetailView.as_view(),
+        name="payments-import-detail",
+    ),
     path("pagamentos/<int:pk>/editar/", TenantPaymentEditView.as_view(), name="payments-edit"),
     path("pagamentos/<int:pk>/excluir/", TenantPaymentDeleteView.as_view(), name="payments-delete"),
-    path("<str:schema_name>/", TenantDetailView.as_view(), name="detail"),
-    path("<str:schema_name>/editar/", TenantUpdateView.as_view(), name="update"),
+    path("pagamentos/<int:pk>/nota-fiscal/", TenantPaymentInvoiceView.as_view(), name="payments-invoice"),
+    path("<str:schema_name>/", detail_view, name="detail"),
+    path("<str:schema_name>/editar/", update_view, name="update"),
+    path("<str:schema_name>/pagamentos/", payment_view, name="payment"),
 ]
@@ -1,42 +1,110 @@
-from datetime import date
 import secrets
 import string
+import uuid
+from datetime import date
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.views import View
 from django.views.generic.edit import FormView
 
-from .forms import TenantForm, TenantPaymentForm
-from .models import TenantPayment
-from .services import SaasApiClient, SaasApiError
+from apps.core.xlsx import temp_file_response
+
+from .analytics import overdue_tenants, revenue_summary
+from .breaker import CircuitBreaker
+from .exports import csv_response, xlsx_response
+from .forms import StatementImportForm, TenantBulkUpdateForm, TenantForm, TenantPaymentForm
+from .invoices import invoice_response
+from .jobs import enqueue_bulk_update, enqueue_provisioning, recover_stale_jobs, resume_bulk_update
+from .metrics import registry
+from .models import Tenant, TenantBulkUpdate, TenantPayment, TenantProvisioningJob, TenantStatementImport
+from .pagination import InvalidCursor, keyset_paginate
+from .receipts import build_receipts_zip, month_payments
+from .services import SaasApiClient, SaasApiError, transfer_stats
+from .statements import LINE_STATUS_LABELS, RULE_LABELS, import_statement
+from .sync import monthly_prices, sync_tenants, upsert_tenant
+
+
+def get_tenant_choices():
+    return [
+        (schema_name, f"{client_name} ({schema_name})")
+        for schema_name, client_name in Tenant.objects.values_list("schema_name", "client_name")
+    ]
+
+
+def get_tenant_client_name(request, schema_name: str) -> str:
+    """Nome do cliente pela tabela local; a API só é consultada se o tenant não estiver nela."""
+    client_name = Tenant.objects.filter(schema_name=schema_name).values_list("client_name", flat=True).first()
+    if client_name is not None:
+        return client_name
+    try:
+        tenant = SaasApiClient.for_request(request).retrieve_tenant(schema_name)
+    except SaasApiError as exc:
+        messages.error(request, str(exc))
+        return ""
+    if not isinstance(tenant, dict):
+        return ""
+    return tenant.get("client_name") or ""
 
 
 class TenantListView(LoginRequiredMixin, View):
     template_name = "tenants/tenant_list.html"
+    paginate_by = 25
+    sort_fields = ("client_name", "schema_name", "paid_until", "created_on", "monthly_price")
 
     def get(self, request):
-        client = SaasApiClient()
-        tenants = []
         error_message = None
-        try:
-            tenants = client.list_tenants()
-        except SaasApiError as exc:
-            error_message = str(exc)
-            messages.error(request, error_message)
-        for tenant in tenants:
-            for key in ("paid_until", "created_on"):
-                value = tenant.get(key)
-                if isinstance(value, str):
-                    try:
-                        tenant[key] = date.fromisoformat(value)
-                    except ValueError:
-                        continue
+        if not Tenant.objects.exists():
+            # Primeira carga: popula a tabela local a partir da API.
+            try:
+                sync_tenants()
+            except SaasApiError as exc:
+                error_message = str(exc)
+                messages.error(request, error_message)
+
+        today = timezone.localdate()
+        tenants = Tenant.objects.all()
+        search = (request.GET.get("q") or "").strip()
+        status = request.GET.get("status") or ""
+        sort = request.GET.get("sort") or "client_name"
+        if search:
+            tenants = tenants.filter(
+                Q(client_name__icontains=search)
+                | Q(schema_name__icontains=search)
+                | Q(primary_domain__icontains=search)
+            )
+        if status == "trial":
+            tenants = tenants.filter(on_trial=True)
+        elif status == "active":
+            tenants = tenants.filter(on_trial=False, paid_until__gte=today)
+        elif status == "overdue":
+            tenants = tenants.filter(on_trial=False, paid_until__lt=today)
+        elif status == "pending":
+            tenants = tenants.filter(on_trial=False, paid_until__isnull=True)
+        if sort.lstrip("-") not in self.sort_fields:
+            sort = "client_name"
+        tenants = tenants.order_by(sort, "schema_name")
+
+        # Apenas as linhas da página são lidas do banco.
+        page_obj = Paginator(tenants, self.paginate_by).get_page(request.GET.get("page"))
         context = {
-            "tenants": tenants,
+            "tenants": page_obj.object_list,
+            "page_obj": page_obj,
+            "today": today,
+            "filter_q": search,
+            "filter_status": status,
+            "sort": sort,
+            # Clicar na coluna já ordenada inverte a direção.
+            "sort_links": {field: f"-{field}" if sort == field else field for field in self.sort_fields},
             "error_message": error_message,
         }
         return render(request, self.template_name, context)
@@ -55,17 +123,7 @@ class TenantPaymentEditView(LoginRequiredMixin, FormView):
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        client = SaasApiClient()
-        tenant_choices = []
-        try:
-            tenants = client.list_tenants()
-            tenant_choices = [
-                (t.get("schema_name"), f'{t.get("client_name")} ({t.get("schema_name")})')
-                for t in tenants
-                if t.get("schema_name")
-            ]
-        except SaasApiError as exc:
-            messages.error(self.request, str(exc))
+        tenant_choices = get_tenant_choices()
         kwargs["instance"] = self.payment
         kwargs["tenant_choices"] = tenant_choices
         return kwargs
@@ -76,16 +134,8 @@ class TenantPaymentEditView(LoginRequiredMixin, FormView):
         return context
 
     def form_valid(self, form):
-        client = SaasApiClient()
         schema_name = form.cleaned_data.get("schema_name")
-        client_name = ""
-        if schema_name:
-            try:
-                tenant = client.retrieve_tenant(schema_name)
-                if isinstance(tenant, dict):
-                    client_name = tenant.get("client_name") or ""
-            except SaasApiError as exc:
-                messages.error(self.request, str(exc))
+        client_name = get_tenant_client_name(self.request, schema_name) if schema_name else ""
         payment = form.save(commit=False)
         if schema_name:
             payment.schema_name = schema_name
@@ -106,14 +156,50 @@ class TenantPaymentDeleteView(LoginRequiredMixin, View):
         return redirect("tenants:payments-list")
 
 
+class TenantPaymentInvoiceView(LoginRequiredMixin, View):
+    """Nota fiscal do pagamento, com suporte a Range e cache (ver invoices.py)."""
+
+    def get(self, request, pk: int):
+        payment = get_object_or_404(TenantPayment.objects.only("invoice_file", "invoice_name"), pk=pk)
+        if not payment.invoice_file:
+            raise Http404("Pagamento sem nota fiscal.")
+        try:
+            return invoice_response(request, payment)
+        except FileNotFoundError:
+            raise Http404("Arquivo da nota fiscal não encontrado.") from None
+
+
 class TenantCreateView(LoginRequiredMixin, FormView):
     template_name = "tenants/tenant_form.html"
     form_class = TenantForm
     success_url = reverse_lazy("tenants:list")
 
+    def get_initial(self):
+        initial = super().get_initial()
+        initial["idempotency_key"] = uuid.uuid4().hex
+        return initial
+
+    def _existing_job(self, key: str):
+        """Job já criado por um envio anterior deste mesmo formulário."""
+        if not key:
+            return None
+        return (
+            TenantProvisioningJob.objects.filter(idempotency_key=key)
+            .exclude(status=TenantProvisioningJob.STATUS_FAILED)
+            .first()
+        )
+
     def form_valid(self, form):
-        client = SaasApiClient()
         data = form.cleaned_data
+        key = data.get("idempotency_key")
+        existing = self._existing_job(key)
+        if existing is not None:
+            messages.info(self.request, "Este formulário já foi enviado; acompanhe o provisionamento abaixo.")
+            return redirect("tenants:provisioning", pk=existing.pk)
+        if not key or TenantProvisioningJob.objects.filter(idempotency_key=key).exists():
+            # Após uma tentativa que falhou, o reenvio corrigido vira um novo job.
+            key = uuid.uuid4().hex
+
         paid_until = data.get("paid_until")
         manager_licenses = data.get("manager_licenses")
         staff_licenses = data.get("staff_licenses")
@@ -142,22 +228,112 @@ class TenantCreateView(LoginRequiredMixin, FormView):
             "paid_until": paid_until.isoformat() if paid_until else None,
             "domain": data.get("primary_domain"),
             "email": email,
-            "password": password,
             "monthly_price": float(monthly_price) if monthly_price is not None else 0,
             "manager_licenses": manager_licenses if manager_licenses is not None else 0,
             "staff_licenses": staff_licenses if staff_licenses is not None else 0,
             "storage_gb": storage_gb if storage_gb is not None else 0,
         }
         try:
-            client.create_tenant(payload)
-            messages.success(
-                self.request,
-                f"Tenant criado com sucesso na API. Senha do super usuário: {password}",
-            )
-            return redirect(self.get_success_url())
-        except SaasApiError as exc:
-            messages.error(self.request, str(exc))
-            return self.form_invalid(form)
+            with transaction.atomic():
+                job = TenantProvisioningJob(
+                    schema_name=payload["schema_name"],
+                    client_name=payload["client_name"] or "",
+                    payload=payload,
+                    idempotency_key=key,
+                    created_by=self.request.user,
+                )
+                job.set_password(password)
+                job.save()
+        except IntegrityError:
+            # Dois envios simultâneos do mesmo formulário.
+            return redirect("tenants:provisioning", pk=TenantProvisioningJob.objects.get(idempotency_key=key).pk)
+        enqueue_provisioning(job)
+        messages.success(
+            self.request,
+            f"Criação do tenant enviada para processamento. Senha do super usuário: {password}",
+        )
+        return redirect("tenants:provisioning", pk=job.pk)
+
+
+class TenantProvisioningJobView(LoginRequiredMixin, View):
+    template_name = "tenants/provisioning_job.html"
+
+    def get(self, request, pk: int):
+        job = get_object_or_404(TenantProvisioningJob, pk=pk)
+        return render(request, self.template_name, {"job": job})
+
+
+class TenantProvisioningJobStatusView(LoginRequiredMixin, View):
+    def get(self, request, pk: int):
+        job = get_object_or_404(TenantProvisioningJob, pk=pk)
+        if not job.is_finished and recover_stale_jobs():
+            job.refresh_from_db()
+        return JsonResponse(
+            {
+                "id": job.pk,
+                "schema_name": job.schema_name,
+                "status": job.status,
+                "status_display": job.get_status_display(),
+                "finished": job.is_finished,
+                "error": job.error,
+                "created_at": job.created_at.isoformat(),
+                "started_at": job.started_at.isoformat() if job.started_at else None,
+                "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+                "duration": job.duration,
+                "detail_url": reverse("tenants:detail", kwargs={"schema_name": job.schema_name}),
+            }
+        )
+
+
+class TenantBulkUpdateView(LoginRequiredMixin, FormView):
+    template_name = "tenants/bulk_update_form.html"
+    form_class = TenantBulkUpdateForm
+
+    def get_initial(self):
+        initial = super().get_initial()
+        # Seleção vinda da lista de clientes ou da ação do admin.
+        initial["schema_names"] = self.request.GET.getlist("schema_name")
+        return initial
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["tenant_choices"] = get_tenant_choices()
+        return kwargs
+
+    def form_valid(self, form):
+        bulk = TenantBulkUpdate.objects.create(
+            schema_names=form.cleaned_data["schema_names"],
+            patch=form.get_patch(),
+            created_by=self.request.user,
+        )
+        enqueue_bulk_update(bulk)
+        messages.success(self.request, "Atualização em lote enviada para processamento.")
+        return redirect("tenants:bulk-update-detail", pk=bulk.pk)
+
+
+class TenantBulkUpdateDetailView(LoginRequiredMixin, View):
+    template_name = "tenants/bulk_update_detail.html"
+
+    def get(self, request, pk: int):
+        bulk = get_object_or_404(TenantBulkUpdate, pk=pk)
+        names = dict(Tenant.objects.filter(schema_name__in=bulk.schema_names).values_list("schema_name", "client_name"))
+        rows = [
+            {
+                "schema_name": schema_name,
+                "client_name": names.get(schema_name, ""),
+                "result": bulk.results.get(schema_name),
+            }
+            for schema_name in bulk.schema_names
+        ]
+        return render(request, self.template_name, {"bulk": bulk, "rows": rows})
+
+    def post(self, request, pk: int):
+        bulk = get_object_or_404(TenantBulkUpdate, pk=pk)
+        if resume_bulk_update(bulk):
+            messages.success(request, f"Reenviando a atualização para {len(bulk.pending_schema_names)} tenant(s).")
+        else:
+            messages.error(request, "Esta atualização não tem falhas para reenviar nem está interrompida.")
+        return redirect("tenants:bulk-update-detail", pk=bulk.pk)
 
 
 class TenantUpdateView(LoginRequiredMixin, FormView):
@@ -178,14 +354,22 @@ class TenantUpdateView(LoginRequiredMixin, FormView):
             email_field.required = False
         return form
 
+    # Tenant já buscado pela view async (async_views.py); {} indica falha.
+    prefetched_tenant = None
+
     def get_initial(self):
         initial = super().get_initial()
-        schema_name = self.kwargs.get("schema_name")
-        client = SaasApiClient()
-        try:
-            tenant = client.retrieve_tenant(schema_name)
-        except SaasApiError as exc:
-            messages.error(self.request, str(exc))
+        tenant = self.prefetched_tenant
+        if tenant is None:
+            schema_name = self.kwargs.get("schema_name")
+            client = SaasApiClient.for_request(self.request)
+            try:
+                # O formulário de edição parte sempre do estado atual da API.
+                tenant = client.retrieve_tenant(schema_name, use_cache=False)
+            except SaasApiError as exc:
+                messages.error(self.request, str(exc))
+                return initial
+        if not tenant:
             return initial
         monthly_price = None
         if isinstance(tenant, dict):
@@ -210,7 +394,7 @@ class TenantUpdateView(LoginRequiredMixin, FormView):
         return initial
 
     def form_valid(self, form):
-        client = SaasApiClient()
+        client = SaasApiClient.for_request(self.request)
         schema_name = self.kwargs.get("schema_name")
         data = form.cleaned_data
         paid_until = data.get("paid_until")
@@ -230,7 +414,13 @@ class TenantUpdateView(LoginRequiredMixin, FormView):
         if monthly_price is not None:
             payload["monthly_price"] = float(monthly_price)
         try:
-            client.update_tenant(schema_name, payload)
+            updated = client.update_tenant(schema_name, payload)
+            if not updated.get("schema_name"):
+                try:
+                    updated = client.retrieve_tenant(schema_name, use_cache=False)
+                except SaasApiError:
+                    updated = {}
+            upsert_tenant(updated)
             messages.success(self.request, "Tenant atualizado com sucesso na API.")
             return redirect(self.get_success_url())
         except SaasApiError as exc:
@@ -242,20 +432,14 @@ class TenantDetailView(LoginRequiredMixin, View):
     template_name = "tenants/tenant_detail.html"
 
     def get(self, request, schema_name: str):
-        client = SaasApiClient()
-        tenant = None
-        try:
-            tenant = client.retrieve_tenant(schema_name)
-        except SaasApiError as exc:
-            messages.error(request, str(exc))
-        if isinstance(tenant, dict):
-            for key in ("paid_until", "created_on"):
-                value = tenant.get(key)
-                if isinstance(value, str):
-                    try:
-                        tenant[key] = date.fromisoformat(value)
-                    except ValueError:
-                        continue
+        tenant = Tenant.objects.filter(schema_name=schema_name).first()
+        if tenant is None:
+            # Tenant ainda não sincronizado: busca na API e grava localmente.
+            client = SaasApiClient.for_request(request)
+            try:
+                tenant = upsert_tenant(client.retrieve_tenant(schema_name))
+            except SaasApiError as exc:
+                messages.error(request, str(exc))
         payments = TenantPayment.objects.filter(schema_name=schema_name)
         context = {
             "schema_name": schema_name,
@@ -271,15 +455,19 @@ class TenantPaymentUpdateView(LoginRequiredMixin, FormView):
     def get_success_url(self):
         return reverse("tenants:payment", kwargs={"schema_name": self.kwargs.get("schema_name")})
 
+    # Tenant já buscado pela view async (async_views.py); {} indica falha.
+    prefetched_tenant = None
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         schema_name = self.kwargs.get("schema_name")
-        client = SaasApiClient()
-        tenant = None
-        try:
-            tenant = client.retrieve_tenant(schema_name)
-        except SaasApiError as exc:
-            messages.error(self.request, str(exc))
+        tenant = self.prefetched_tenant or None
+        if self.prefetched_tenant is None:
+            client = SaasApiClient.for_request(self.request)
+            try:
+                tenant = client.retrieve_tenant(schema_name)
+            except SaasApiError as exc:
+                messages.error(self.request, str(exc))
         context.update(
             {
                 "schema_name": schema_name,
@@ -291,7 +479,7 @@ class TenantPaymentUpdateView(LoginRequiredMixin, FormView):
 
     def form_valid(self, form):
         schema_name = self.kwargs.get("schema_name")
-        client = SaasApiClient()
+        client = SaasApiClient.for_request(self.request)
         try:
             tenant = client.retrieve_tenant(schema_name)
         except SaasApiError as exc:
@@ -309,98 +497,198 @@ class TenantPaymentUpdateView(LoginRequiredMixin, FormView):
         return redirect(self.get_success_url())
 
 
+def parse_date_param(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def filter_payments(params):
+    """Pagamentos filtrados por ``schema_name``, ``status``, ``start_date`` e ``end_date`` (GET)."""
+    status = params.get("status") or ""
+    filters = {
+        "schema_name": params.get("schema_name") or "",
+        "status": status if status in dict(TenantPayment.STATUS_CHOICES) else "",
+        "start_date": parse_date_param(params.get("start_date")),
+        "end_date": parse_date_param(params.get("end_date")),
+    }
+    payments = TenantPayment.objects.all()
+    if filters["schema_name"]:
+        payments = payments.filter(schema_name=filters["schema_name"])
+    if filters["status"]:
+        payments = payments.filter(status=filters["status"])
+    if filters["start_date"]:
+        payments = payments.filter(payment_date__gte=filters["start_date"])
+    if filters["end_date"]:
+        payments = payments.filter(payment_date__lte=filters["end_date"])
+    return payments, filters
+
+
 class TenantPaymentListView(LoginRequiredMixin, View):
     template_name = "tenants/payment_list.html"
+    paginate_by = 50
 
     def get(self, request):
-        client = SaasApiClient()
-        tenant_choices = []
+        tenant_choices = get_tenant_choices()
+        payments, filters = filter_payments(request.GET)
         try:
-            tenants = client.list_tenants()
-            tenant_choices = [
-                (t.get("schema_name"), f'{t.get("client_name")} ({t.get("schema_name")})')
-                for t in tenants
-                if t.get("schema_name")
-            ]
-        except SaasApiError as exc:
+            page = keyset_paginate(payments, request.GET.get("cursor"), self.paginate_by)
+        except InvalidCursor as exc:
             messages.error(request, str(exc))
-        payments = TenantPayment.objects.all()
-        filter_schema_name = request.GET.get("schema_name") or ""
-        filter_start_date = request.GET.get("start_date") or ""
-        filter_end_date = request.GET.get("end_date") or ""
-        if filter_schema_name:
-            payments = payments.filter(schema_name=filter_schema_name)
-        if filter_start_date:
-            payments = payments.filter(payment_date__gte=filter_start_date)
-        if filter_end_date:
-            payments = payments.filter(payment_date__lte=filter_end_date)
+            page = keyset_paginate(payments, None, self.paginate_by)
         context = {
-            "payments": payments,
+            "payments": page.items,
+            "page": page,
             "tenant_choices": tenant_choices,
-            "filter_schema_name": filter_schema_name,
-            "filter_start_date": filter_start_date,
-            "filter_end_date": filter_end_date,
+            "status_choices": TenantPayment.STATUS_CHOICES,
+            "filter_schema_name": filters["schema_name"],
+            "filter_status": filters["status"],
+            "filter_start_date": filters["start_date"].isoformat() if filters["start_date"] else "",
+            "filter_end_date": filters["end_date"].isoformat() if filters["end_date"] else "",
+        }
+        return render(request, self.template_name, context)
+
+
+class TenantPaymentExportView(LoginRequiredMixin, View):
+    """Pagamentos filtrados como na listagem, em CSV (padrão) ou ``?format=xlsx``."""
+
+    def get(self, request):
+        payments, _ = filter_payments(request.GET)
+        if request.GET.get("format") == "xlsx":
+            return xlsx_response(payments)
+        return csv_response(payments)
+
+
+class TenantPaymentReceiptsView(LoginRequiredMixin, View):
+    """Zip com os recibos em PDF dos pagamentos do mês ``?month=AAAA-MM`` (padrão: mês atual)."""
+
+    def get(self, request):
+        try:
+            month = date.fromisoformat(f"{request.GET.get('month')}-01")
+        except ValueError:
+            month = timezone.localdate().replace(day=1)
+        payments = month_payments(month)
+        if not payments.exists():
+            messages.info(request, f"Nenhum pagamento em {month:%m/%Y} para gerar recibos.")
+            return redirect("tenants:payments-list")
+        return temp_file_response(
+            # Dentro do worker web, sem um pool de processos do tamanho da máquina.
+            lambda file: build_receipts_zip(
+                payments, file, workers=getattr(settings, "TENANT_RECEIPT_VIEW_WORKERS", 1)
+            ),
+            f"recibos-{month:%Y-%m}.zip",
+        )
+
+
+class TenantStatementImportView(LoginRequiredMixin, FormView):
+    template_name = "tenants/statement_import.html"
+    form_class = StatementImportForm
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["imports"] = TenantStatementImport.objects.select_related("created_by").defer("lines")[:10]
+        return context
+
+    def form_valid(self, form):
+        file = form.cleaned_data["file"]
+        record = import_statement(
+            file,
+            file.name,
+            user=self.request.user,
+            dry_run=form.cleaned_data["dry_run"],
+        )
+        if record.error:
+            messages.error(self.request, f"Não foi possível importar o extrato: {record.error}")
+        elif record.dry_run:
+            messages.info(self.request, "Conferência concluída; nenhum pagamento foi criado.")
+        else:
+            messages.success(self.request, "Extrato importado com sucesso.")
+        return redirect("tenants:payments-import-detail", pk=record.pk)
+
+
+class TenantStatementImportDetailView(LoginRequiredMixin, View):
+    """Relatório da conciliação; ``?status=`` filtra os lançamentos."""
+
+    template_name = "tenants/statement_import_detail.html"
+
+    def get(self, request, pk: int):
+        record = get_object_or_404(TenantStatementImport, pk=pk)
+        status = request.GET.get("status", "")
+        lines = [line for line in record.lines if not status or line["status"] == status]
+        for line in lines:
+            line["status_label"] = LINE_STATUS_LABELS.get(line["status"], line["status"])
+            line["rule_label"] = RULE_LABELS.get(line["rule"], "")
+        summary = record.summary
+        context = {
+            "record": record,
+            "lines": lines,
+            "status": status,
+            "status_counts": [
+                (key, label, summary.get(key, 0)) for key, label in LINE_STATUS_LABELS.items()
+            ],
         }
         return render(request, self.template_name, context)
 
+
+class TenantPaymentApiView(LoginRequiredMixin, View):
+    """
+    Pagamentos em JSON, paginados por cursor: ``?cursor=`` recebe o ``next``
+    ou ``previous`` da resposta anterior; ``limit`` vai até max_limit. Aceita
+    os mesmos filtros da listagem.
+    """
+
+    default_limit = 50
+    max_limit = 500
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.GET.get("limit", self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        payments, _ = filter_payments(request.GET)
+        try:
+            page = keyset_paginate(payments, request.GET.get("cursor"), limit)
+        except InvalidCursor as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        return JsonResponse(
+            {
+                "results": [
+                    {
+                        "id": payment.pk,
+                        "schema_name": payment.schema_name,
+                        "client_name": payment.client_name,
+                        "amount": str(payment.amount),
+                        "currency": payment.currency,
+                        "status": payment.status,
+                        "payment_date": payment.payment_date.isoformat(),
+                        "reference": payment.reference,
+                        "created_at": payment.created_at.isoformat(),
+                    }
+                    for payment in page.items
+                ],
+                "next": page.next_cursor,
+                "previous": page.previous_cursor,
+            }
+        )
+
+
 class TenantPaymentCreateView(LoginRequiredMixin, FormView):
     template_name = "tenants/payment_form.html"
     form_class = TenantPaymentForm
 
-    def get(self, request, *args, **kwargs):
-        if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-            schema_name = request.GET.get("schema_name") or ""
-            if not schema_name:
-                return JsonResponse({"amount": ""})
-            amount = self.get_monthly_amount(schema_name)
-            return JsonResponse({"amount": amount or ""})
-        return super().get(request, *args, **kwargs)
-
     def get_success_url(self):
         return reverse("tenants:payments-list")
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        client = SaasApiClient()
-        tenant_choices = []
-        try:
-            tenants = client.list_tenants()
-            tenant_choices = [
-                (t.get("schema_name"), f'{t.get("client_name")} ({t.get("schema_name")})')
-                for t in tenants
-                if t.get("schema_name")
-            ]
-        except SaasApiError as exc:
-            messages.error(self.request, str(exc))
+        tenant_choices = get_tenant_choices()
         kwargs["tenant_choices"] = tenant_choices
         return kwargs
 
-    def get_monthly_amount(self, schema_name: str):
-        client = SaasApiClient()
-        try:
-            tenant = client.retrieve_tenant(schema_name)
-        except SaasApiError as exc:
-            messages.error(self.request, str(exc))
-            return None
-        if not isinstance(tenant, dict):
-            return None
-        for key in ("monthly_price", "monthly_amount", "monthly_value", "valor_mensal", "monthly_fee"):
-            value = tenant.get(key)
-            if value is not None:
-                return value
-        return None
-
     def form_valid(self, form):
-        client = SaasApiClient()
         schema_name = form.cleaned_data.get("schema_name")
-        client_name = ""
-        if schema_name:
-            try:
-                tenant = client.retrieve_tenant(schema_name)
-                if isinstance(tenant, dict):
-                    client_name = tenant.get("client_name") or ""
-            except SaasApiError as exc:
-                messages.error(self.request, str(exc))
+        client_name = get_tenant_client_name(self.request, schema_name) if schema_name else ""
         payment = form.save(commit=False)
         if schema_name:
             payment.schema_name = schema_name
@@ -411,3 +699,90 @@ class TenantPaymentCreateView(LoginRequiredMixin, FormView):
         payment.save()
         messages.success(self.request, "Pagamento criado com sucesso.")
         return redirect(self.get_success_url())
+
+
+class TenantMonthlyPricesView(LoginRequiredMixin, View):
+    """
+    Valor mensal de todos os tenants em uma única resposta JSON, usada pelo
+    formulário de pagamento para preencher o valor sem consultar a API a cada
+    seleção. Responde 304 quando o navegador já tem a versão atual.
+    """
+
+    def get(self, request):
+        entry = monthly_prices()
+        if request.headers.get("If-None-Match") == entry["etag"]:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(entry["body"], content_type="application/json")
+        response["ETag"] = entry["etag"]
+        response["Cache-Control"] = f"private, max-age={getattr(settings, 'TENANT_PRICES_CACHE_TTL', 60)}"
+        return response
+
+
+def _months_param(request, default: int = 12, maximum: int = 120) -> int:
+    try:
+        months = int(request.GET.get("months", default))
+    except (TypeError, ValueError):
+        months = default
+    return min(max(months, 1), maximum)
+
+
+class TenantRevenueView(LoginRequiredMixin, View):
+    """Painel de receita: MRR, tenants pagantes, churn e tenants em atraso."""
+
+    template_name = "tenants/revenue_dashboard.html"
+
+    def get(self, request):
+        months = _months_param(request)
+        summary = revenue_summary(months)
+        context = {
+            "months": months,
+            "summary": summary,
+            "summary_desc": list(reversed(summary)),
+            "current": summary[-1],
+            "previous": summary[-2] if len(summary) > 1 else None,
+            "overdue": overdue_tenants(),
+        }
+        return render(request, self.template_name, context)
+
+
+class TenantRevenueDataView(LoginRequiredMixin, View):
+    """Os mesmos indicadores do painel de receita, em JSON (``?months=``)."""
+
+    def get(self, request):
+        overdue = [
+            {
+                "schema_name": tenant.schema_name,
+                "client_name": tenant.client_name,
+                "paid_until": tenant.paid_until.isoformat(),
+                "last_payment": tenant.last_payment.isoformat() if tenant.last_payment else None,
+                "monthly_price": float(tenant.monthly_price) if tenant.monthly_price is not None else None,
+            }
+            for tenant in overdue_tenants()
+        ]
+        return JsonResponse({"months": revenue_summary(_months_param(request)), "overdue": overdue})
+
+
+class SaasApiMetricsView(View):
+    """
+    Histogramas das chamadas à API do SaaS feitas por este processo, no formato
+    texto do Prometheus ou em JSON (``?format=json``). Acessível a usuários
+    staff ou com ``Authorization: Bearer <SAAS_API_METRICS_TOKEN>``.
+    """
+
+    def get(self, request):
+        token = getattr(settings, "SAAS_API_METRICS_TOKEN", None)
+        authorized = request.user.is_staff or (
+            token and secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+        )
+        if not authorized:
+            raise PermissionDenied
+        if request.GET.get("format") == "json":
+            return JsonResponse(
+                {
+                    "calls": registry.snapshot(),
+                    "breaker": CircuitBreaker().stats(),
+                    "transfer": transfer_stats(),
+                }
+            )
+        return HttpResponse(registry.render_prometheus(), content_type="text/plain; version=0.0.4")
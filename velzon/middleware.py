@@ -1,40 +1,73 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from auditlog.cid import set_cid
+from auditlog.context import set_actor
+from auditlog.middleware import AuditlogMiddleware as BaseAuditlogMiddleware
 from django.shortcuts import redirect
 from django.urls import reverse
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
 
 class LockScreenMiddleware:
+    async_capable = True
+    sync_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
-    def __call__(self, request):
-        # Só aplica o middleware se o usuário estiver autenticado
-        if not request.user.is_authenticated:
-            return self.get_response(request)
-
+    def allowed_paths(self):
         # Caminhos que devem ser permitidos mesmo com a tela bloqueada
-        allowed_paths = [
+        return [
             reverse('pages:unlock_screen'),
             reverse('account_logout'),
         ]
 
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        # Só aplica o middleware se o usuário estiver autenticado
+        if not request.user.is_authenticated:
+            return self.get_response(request)
+
         # Se a sessão está bloqueada e o usuário não está em uma página permitida, redireciona
-        if request.session.get('is_locked') and request.path not in allowed_paths:
+        if request.session.get('is_locked') and request.path not in self.allowed_paths():
             return redirect('pages:unlock_screen')
 
         response = self.get_response(request)
         return response
 
+    async def __acall__(self, request):
+        # Versão ASGI: usuário e sessão são lidos com as APIs async do Django
+        user = await request.auser()
+        if user.is_authenticated and await request.session.aget('is_locked'):
+            if request.path not in self.allowed_paths():
+                return redirect('pages:unlock_screen')
+        return await self.get_response(request)
+
 
 class CacheControlMiddleware:
     """
     Middleware para controlar o cache das respostas HTTP.
     Adiciona headers apropriados para evitar cache de páginas HTML em produção.
     """
+    async_capable = True
+    sync_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        response = self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(self.get_response(request))
 
+    async def __acall__(self, request):
+        return self.process_response(await self.get_response(request))
+
+    def process_response(self, response):
         # Verifica se é uma resposta HTML (páginas)
         content_type = response.get('Content-Type', '')
         if 'text/html' in content_type:
@@ -44,3 +77,60 @@ class CacheControlMiddleware:
             response['Expires'] = '0'
 
         return response
+
+
+# Sob ASGI, um único middleware apenas síncrono faz o Django executar toda a
+# cadeia em uma thread compartilhada, anulando as views async. As classes
+# abaixo dão suporte async ao WhiteNoise e ao django-auditlog sem alterar o
+# comportamento sob WSGI.
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response=None, settings=None):
+        if settings is None:
+            super().__init__(get_response)
+        else:
+            super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class AuditlogMiddleware(BaseAuditlogMiddleware):
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        user = await request.auser()
+        set_cid(request)
+        with set_actor(
+            actor=user if user.is_authenticated else None,
+            remote_addr=self._get_remote_addr(request),
+            remote_port=self._get_remote_port(request),
+        ):
+            return await self.get_response(request)
@@ -41,6 +41,78 @@ NOTIFICATION_WEBHOOK_TOKEN = env('NOTIFICATION_WEBHOOK_TOKEN', default='default-
 # Configurações da API do SaaS multi-tenant
 SAAS_API_BASE_URL = env('SAAS_API_BASE_URL', default=None)
 SAAS_API_KEY = env('SAAS_API_KEY', default=None)
+# Pool de conexões keep-alive compartilhado por todos os SaasApiClient do processo.
+# POOL_MAXSIZE limita as conexões simultâneas por host; com POOL_BLOCK as threads
+# aguardam uma conexão livre em vez de abrir conexões extras descartáveis.
+SAAS_API_POOL_CONNECTIONS = env.int('SAAS_API_POOL_CONNECTIONS', default=4)
+SAAS_API_POOL_MAXSIZE = env.int('SAAS_API_POOL_MAXSIZE', default=10)
+SAAS_API_POOL_BLOCK = env.bool('SAAS_API_POOL_BLOCK', default=False)
+# Buscas paralelas (retrieve_many); mantenha <= SAAS_API_POOL_MAXSIZE.
+SAAS_API_MAX_WORKERS = env.int('SAAS_API_MAX_WORKERS', default=8)
+# Cache das leituras de tenants: servido direto por CACHE_TTL segundos e, depois,
+# por mais CACHE_STALE_TTL segundos enquanto é revalidado em segundo plano.
+SAAS_API_CACHE_TTL = env.int('SAAS_API_CACHE_TTL', default=60)
+SAAS_API_CACHE_STALE_TTL = env.int('SAAS_API_CACHE_STALE_TTL', default=300)
+# Tempo que o payload e seus validadores (ETag/Last-Modified) ficam guardados
+# para permitir revalidações condicionais (respostas 304) mesmo após o STALE_TTL.
+SAAS_API_CACHE_RETENTION = env.int('SAAS_API_CACHE_RETENTION', default=86400)
+# Circuit breaker: após BREAKER_THRESHOLD chamadas seguidas com falha (cada
+# chamada conta uma vez, com ou sem repetições) as chamadas à API falham na
+# hora por BREAKER_RESET_TIMEOUT segundos (estado no cache do Django).
+SAAS_API_BREAKER_THRESHOLD = env.int('SAAS_API_BREAKER_THRESHOLD', default=5)
+SAAS_API_BREAKER_RESET_TIMEOUT = env.int('SAAS_API_BREAKER_RESET_TIMEOUT', default=30)
+# Repetições em falhas transitórias (erro ao conectar, 429, 502, 503, 504; um
+# timeout de leitura não é repetido) com backoff exponencial e jitter: espera
+# aleatória de até BACKOFF * 2^n segundos, limitada a BACKOFF_MAX. POST/PATCH
+# só são repetidos com o header Idempotency-Key.
+SAAS_API_RETRIES = env.int('SAAS_API_RETRIES', default=2)
+SAAS_API_RETRY_BACKOFF = env.float('SAAS_API_RETRY_BACKOFF', default=0.5)
+SAAS_API_RETRY_BACKOFF_MAX = env.float('SAAS_API_RETRY_BACKOFF_MAX', default=8)
+# Métricas das chamadas à API (apps/tenants/metrics.py): o endpoint
+# /tenants/metricas/ aceita staff ou o header "Authorization: Bearer <TOKEN>";
+# o painel com as chamadas de cada página aparece para staff quando ativo.
+SAAS_API_METRICS_TOKEN = env('SAAS_API_METRICS_TOKEN', default=None)
+SAAS_API_DEBUG_PANEL = env.bool('SAAS_API_DEBUG_PANEL', default=DEBUG)
+
+# Views async das telas de tenants (apps/tenants/async_views.py) com cliente
+# httpx. Ative apenas sob ASGI (uvicorn velzon.asgi:application); sob WSGI cada
+# requisição criaria um event loop e um pool de conexões novos.
+TENANT_ASYNC_VIEWS = env.bool('TENANT_ASYNC_VIEWS', default=False)
+SAAS_API_ASYNC_MAX_CONNECTIONS = env.int('SAAS_API_ASYNC_MAX_CONNECTIONS', default=100)
+
+# Provisionamento de tenants em segundo plano (apps/tenants/jobs.py):
+# 'thread' executa no próprio processo web, 'worker' deixa na fila para o
+# comando process_tenant_jobs e 'sync' executa durante a requisição.
+TENANT_JOBS_BACKEND = env('TENANT_JOBS_BACKEND', default='thread')
+TENANT_JOBS_THREADS = env.int('TENANT_JOBS_THREADS', default=2)
+# Segundos sem progresso após os quais um job "em execução" é considerado
+# interrompido (processo encerrado no meio) e pode ser retomado.
+TENANT_JOBS_STALE_AFTER = env.int('TENANT_JOBS_STALE_AFTER', default=900)
+# Validade (segundos) da lista de valores mensais usada pelo formulário de
+# pagamento, no cache do Django e no navegador (Cache-Control max-age).
+TENANT_PRICES_CACHE_TTL = env.int('TENANT_PRICES_CACHE_TTL', default=60)
+# Indicadores de receita (apps/tenants/analytics.py): moeda considerada, meses
+# em que um tenant segue ativo no MRR após o último pagamento, validade no
+# cache do mês corrente e dos meses fechados e janela de "pagamento recente"
+# dos inadimplentes.
+TENANT_ANALYTICS_CURRENCY = env('TENANT_ANALYTICS_CURRENCY', default='BRL')
+TENANT_ANALYTICS_GRACE_MONTHS = env.int('TENANT_ANALYTICS_GRACE_MONTHS', default=1)
+TENANT_ANALYTICS_CURRENT_MONTH_TTL = env.int('TENANT_ANALYTICS_CURRENT_MONTH_TTL', default=300)
+TENANT_ANALYTICS_CLOSED_MONTH_TTL = env.int('TENANT_ANALYTICS_CLOSED_MONTH_TTL', default=86400)
+TENANT_OVERDUE_RECENT_DAYS = env.int('TENANT_OVERDUE_RECENT_DAYS', default=30)
+# Recibos em PDF já gerados (apps/tenants/receipts.py) e processos usados para
+# renderizá-los no comando generate_receipts (padrão: número de CPUs) e na
+# view de download (padrão: 1, sem pool). O diretório fica fora de MEDIA_ROOT
+# para que os recibos não sejam servidos publicamente.
+TENANT_RECEIPT_DIR = env('TENANT_RECEIPT_DIR', default=str(BASE_DIR / 'var' / 'receipts'))
+TENANT_RECEIPT_WORKERS = env.int('TENANT_RECEIPT_WORKERS', default=0)
+TENANT_RECEIPT_VIEW_WORKERS = env.int('TENANT_RECEIPT_VIEW_WORKERS', default=1)
+
+# Cache do Django. Em produção use um backend compartilhado entre os workers
+# do gunicorn, ex.: CACHE_URL=redis://localhost:6379/1
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
 
 # --- Configurações Comuns do Django (copiadas do seu settings.py) ---
 INSTALLED_APPS = [
@@ -90,7 +162,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'velzon.middleware.WhiteNoiseMiddleware', # WhiteNoise com suporte a ASGI
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -98,10 +170,11 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'auditlog.middleware.AuditlogMiddleware', # Adicionado para o django-auditlog
+    'velzon.middleware.AuditlogMiddleware', # django-auditlog com suporte a ASGI
     "allauth.account.middleware.AccountMiddleware",
     "velzon.middleware.LockScreenMiddleware", # Middleware da tela de bloqueio
     "velzon.middleware.CacheControlMiddleware", # Middleware para controle de cache
+    "apps.tenants.middleware.SaasApiTimingMiddleware", # Tempo gasto na API do SaaS por requisição
 ]
 
 ROOT_URLCONF = 'velzon.urls'
@@ -201,5 +274,12 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        # Chamadas à API do SaaS: duração e tentativas (DEBUG registra todas,
+        # WARNING apenas as que precisaram ser repetidas).
+        'apps.tenants.services': {
+            'handlers': ['console'],
+            'level': env('SAAS_API_LOG_LEVEL', default='WARNING'),
+            'propagate': True,
+        },
     },
 }